@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DepartmentPermission
+
+CACHE_KEY_PREFIX = 'access_scope'
+VERSION_KEY = 'access_scope:version'
+
+
+class AccessScope:
+    """
+    What a user may see and edit: the executive flag plus the viewable and
+    editable department IDs. Built once, cached across requests and
+    invalidated by the signals in accounts/signals.py.
+    """
+
+    def __init__(self, user_id, department_id=None, department_name=None, is_executive=False,
+                 viewable_department_ids=(), editable_department_ids=()):
+        self.user_id = user_id
+        self.department_id = department_id
+        self.department_name = department_name
+        self.is_executive = is_executive
+        self.viewable_department_ids = frozenset(viewable_department_ids)
+        self.editable_department_ids = frozenset(editable_department_ids)
+
+    @classmethod
+    def build(cls, user):
+        department = user.department
+        own_ids = {department.id} if department else set()
+        permissions = DepartmentPermission.objects.filter(user=user).values_list(
+            'department_id', 'permission_type'
+        )
+        viewable_ids = set(own_ids)
+        editable_ids = set(own_ids)
+        for department_id, permission_type in permissions:
+            viewable_ids.add(department_id)
+            if permission_type == 'edit':
+                editable_ids.add(department_id)
+        return cls(
+            user_id=user.pk,
+            department_id=department.id if department else None,
+            department_name=department.name if department else None,
+            is_executive=bool(department and department.executive),
+            viewable_department_ids=viewable_ids,
+            editable_department_ids=editable_ids,
+        )
+
+    def can_view_department(self, department_id):
+        return self.is_executive or department_id in self.viewable_department_ids
+
+    def can_edit_department(self, department_id):
+        return not self.is_executive and department_id in self.editable_department_ids
+
+    def department_info(self):
+        """The user's own department as rendered in API responses"""
+        if self.department_id is None:
+            return None
+        return {'id': self.department_id, 'name': self.department_name}
+
+
+def _cache_key(user_id):
+    version = cache.get(VERSION_KEY, 0)
+    return f'{CACHE_KEY_PREFIX}:{version}:{user_id}'
+
+
+def get_access_scope(user):
+    """Return the user's AccessScope, memoised on the user for the current request"""
+    scope = getattr(user, '_access_scope', None)
+    if scope is not None:
+        return scope
+
+    key = _cache_key(user.pk)
+    scope = cache.get(key)
+    if scope is None:
+        scope = AccessScope.build(user)
+        cache.set(key, scope, getattr(settings, 'ACCESS_SCOPE_CACHE_TIMEOUT', 300))
+    user._access_scope = scope
+    return scope
+
+
+def invalidate_access_scope(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_all_access_scopes():
+    """Drop every cached scope, e.g. when a department's executive flag changes"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+    # incr() stores the key again with the default timeout on some backends;
+    # once it expired, old versions and their cached scopes would be reused
+    cache.touch(VERSION_KEY, None)
@@ -14,6 +14,7 @@ class CustomUserAdmin(UserAdmin):
             'fields': ('is_active', 'is_staff', 'is_superuser', 'is_admin', 'groups', 'user_permissions'),
         }),
         ('Department Info', {'fields': ('department', 'role')}),
+        ('Notifications', {'fields': ('reminder_digest',)}),
         ('Important dates', {'fields': ('last_login', 'date_joined')}),
     )
     add_fieldsets = (
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_vendor_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='reminder_digest',
+            field=models.BooleanField(default=False, help_text='If checked, all agreement reminders due on a day are sent as one digest email'),
+        ),
+    ]
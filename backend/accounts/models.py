@@ -71,6 +71,10 @@ class User(AbstractUser):
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name='users')  # allow blank
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True)
     is_admin = models.BooleanField(default=False)
+    reminder_digest = models.BooleanField(
+        default=False,
+        help_text="If checked, all agreement reminders due on a day are sent as one digest email"
+    )
 
     # Remove first_name and last_name fields
     first_name = None
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_access_scope, invalidate_all_access_scopes
+from .models import Department, DepartmentPermission, User
+
+
+@receiver(post_save, sender=DepartmentPermission)
+@receiver(post_delete, sender=DepartmentPermission)
+def department_permission_changed(sender, instance, **kwargs):
+    invalidate_access_scope(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login; anything else may have moved the department
+    if update_fields is not None and 'department' not in update_fields:
+        return
+    instance.__dict__.pop('_access_scope', None)
+    invalidate_access_scope(instance.pk)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def department_changed(sender, instance, **kwargs):
+    # Executive flag, name or membership (SET_NULL on delete) may have changed
+    # for every user in the department, so drop all cached scopes
+    invalidate_all_access_scopes()
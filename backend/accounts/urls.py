@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import LoginView, LogoutView, DashboardView, DepartmentListAPIView, VendorListAPIView, MyDepartmentsAPIView
-from .views import ChangePasswordView
+from .views import ChangePasswordView, NotificationPreferencesView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='api-login'),
@@ -10,4 +10,5 @@ urlpatterns = [
     path('vendors/', VendorListAPIView.as_view(), name='vendor-list-api'),
     path('my_departments/', MyDepartmentsAPIView.as_view(), name='my-departments-api'),
     path('change-password/', ChangePasswordView.as_view(), name='api-change-password'),
+    path('notification-preferences/', NotificationPreferencesView.as_view(), name='api-notification-preferences'),
 ]
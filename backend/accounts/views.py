@@ -12,6 +12,7 @@ from django.utils.decorators import method_decorator
 from rest_framework.permissions import AllowAny
 from django.shortcuts import redirect
 from rest_framework_simplejwt.tokens import SlidingToken
+from .access import get_access_scope
 
 
 class LoginView(APIView):
@@ -26,33 +27,19 @@ class LoginView(APIView):
             token = SlidingToken.for_user(user)
             
             # Get user's department and permissions
-            department_ids = set()
-            if user.department:
-                department_ids.add(user.department.id)
-            
-            permitted_dept_ids = DepartmentPermission.objects.filter(
-                user=user,
-                permission_type='edit'
-            ).values_list('department_id', flat=True)
-            department_ids.update(permitted_dept_ids)
+            scope = get_access_scope(user)
             
             # Get permitted departments
-            permitted_departments = Department.objects.filter(id__in=department_ids)
+            permitted_departments = Department.objects.filter(id__in=scope.editable_department_ids)
             
             # Prepare user data
             user_data = {
                 'id': user.id,
                 'email': user.email,
                 'full_name': user.full_name,
-                'department': {
-                    'id': user.department.id,
-                    'name': user.department.name
-                } if user.department else None,
+                'department': scope.department_info(),
                 'permitted_departments': DepartmentSerializer(permitted_departments, many=True).data,
-                'is_executive': Department.objects.filter(
-                    executive=True,
-                    users=user
-                ).exists()
+                'is_executive': scope.is_executive
             }
             
             return Response({
@@ -76,24 +63,11 @@ class DashboardView(APIView):
         user = request.user
         
         # Get user's department and permissions
-        department_ids = set()
-        if user.department:
-            department_ids.add(user.department.id)
-        
-        permitted_dept_ids = DepartmentPermission.objects.filter(
-            user=user,
-            permission_type='edit'
-        ).values_list('department_id', flat=True)
-        department_ids.update(permitted_dept_ids)
+        scope = get_access_scope(user)
+        is_executive = scope.is_executive
         
         # Get permitted departments
-        permitted_departments = Department.objects.filter(id__in=department_ids)
-        
-        # Check if user is executive
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
+        permitted_departments = Department.objects.filter(id__in=scope.editable_department_ids)
         
         # Prepare dashboard data
         dashboard_data = {
@@ -101,10 +75,7 @@ class DashboardView(APIView):
                 'id': user.id,
                 'email': user.email,
                 'full_name': user.full_name,
-                'department': {
-                    'id': user.department.id,
-                    'name': user.department.name
-                } if user.department else None,
+                'department': scope.department_info(),
                 'is_executive': is_executive
             },
             'permissions': {
@@ -129,21 +100,10 @@ class MyDepartmentsAPIView(APIView):
     
     def get(self, request):
         """Get departments where user has access (own department + permitted departments)"""
-        department_ids = set()
-        
-        # Add user's own department if they have one
-        if request.user.department:
-            department_ids.add(request.user.department.id)
-        
-        # Add departments where user has edit permission
-        permitted_dept_ids = DepartmentPermission.objects.filter(
-            user=request.user,
-            permission_type='edit'
-        ).values_list('department_id', flat=True)
-        department_ids.update(permitted_dept_ids)
+        scope = get_access_scope(request.user)
         
         # Get all departments that user has access to
-        permitted_departments = Department.objects.filter(id__in=department_ids)
+        permitted_departments = Department.objects.filter(id__in=scope.editable_department_ids)
         serializer = DepartmentSerializer(permitted_departments, many=True)
         
         return Response(serializer.data)
@@ -162,4 +122,20 @@ class ChangePasswordView(APIView):
             return Response({'error': 'New password must be at least 8 characters.'}, status=status.HTTP_400_BAD_REQUEST)
         user.set_password(new_password)
         user.save()
-        return Response({'success': 'Password changed successfully.'})
\ No newline at end of file
+        return Response({'success': 'Password changed successfully.'})
+
+
+class NotificationPreferencesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'reminder_digest': request.user.reminder_digest})
+
+    def patch(self, request):
+        reminder_digest = request.data.get('reminder_digest')
+        if not isinstance(reminder_digest, bool):
+            return Response({'error': 'reminder_digest must be true or false.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
+        user.reminder_digest = reminder_digest
+        user.save(update_fields=['reminder_digest'])
+        return Response({'success': 'Notification preferences saved.', 'reminder_digest': user.reminder_digest})
@@ -1,5 +1,9 @@
+from contextlib import contextmanager
+
 from django.contrib import admin
-from .models import Agreement, AgreementType  # Add AgreementType to imports
+from django.db import transaction
+from django.db.models import F
+from .models import Agreement, AgreementType, Job, Notification
 
 @admin.register(AgreementType)
 class AgreementTypeAdmin(admin.ModelAdmin):
@@ -17,7 +21,7 @@ class AgreementTypeAdmin(admin.ModelAdmin):
 @admin.register(Agreement)
 class AgreementAdmin(admin.ModelAdmin):
     list_display = (
-        'agreement_id', 'agreement_reference', 'title', 
+        'get_agreement_id', 'agreement_reference', 'title', 
         'get_agreement_type', 'get_department_name', 'status', 
         'start_date', 'expiry_date', 'get_creator'
     )
@@ -41,6 +45,12 @@ class AgreementAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_agreement_id(self, obj):
+        return obj.agreement_id
+    get_agreement_id.short_description = 'Agreement ID'
+    # Numeric order, so A_2025_10000 sorts after A_2025_9999
+    get_agreement_id.admin_order_field = F('sequence_year') * 1000000 + F('sequence_number')
+    
     def get_agreement_type(self, obj):
         return obj.agreement_type.name if obj.agreement_type else '-'
     get_agreement_type.short_description = 'Agreement Type'
@@ -51,4 +61,57 @@ class AgreementAdmin(admin.ModelAdmin):
     
     def get_creator(self, obj):
         return obj.creator.email if obj.creator else '-'
-    get_creator.short_description = 'Created By'
\ No newline at end of file
+    get_creator.short_description = 'Created By'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'name')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error')
+    actions = ['requeue_jobs']
+
+    @admin.action(description='Requeue selected jobs')
+    def requeue_jobs(self, request, queryset):
+        from . import jobs
+        count = jobs.requeue(queryset)
+        self.message_user(request, f'{count} job(s) requeued.')
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'action', 'message', 'created_at', 'read_at')
+    list_filter = ('action',)
+    search_fields = ('recipient__email', 'message')
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('recipient', 'actor', 'agreement')
+    readonly_fields = ('created_at',)
+
+    def has_add_permission(self, request):
+        # Notifications come from notifications.notify(), which keeps the counters
+        return False
+
+    def save_model(self, request, obj, form, change):
+        # The recipient may have been changed too
+        previous = Notification.objects.filter(pk=obj.pk).values_list('recipient_id', flat=True).first()
+        with self._recounting({previous, obj.recipient_id} - {None}):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with self._recounting({obj.recipient_id}):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with self._recounting(set(queryset.values_list('recipient_id', flat=True))):
+            super().delete_queryset(request, queryset)
+
+    @contextmanager
+    def _recounting(self, user_ids):
+        # Lock the recipients' counters before changing their rows, so a
+        # concurrent notify() or mark-read waits, then recount them
+        from . import notifications
+        with transaction.atomic():
+            notifications.lock_counters(user_ids)
+            yield
+            notifications.rebuild_counters(user_ids)
@@ -0,0 +1,118 @@
+"""
+Content-addressed attachment storage.
+
+Every attachment is stored once under agreements/blobs/<aa>/<bb>/<sha256><ext>
+and shared by all agreements with the same content. AttachmentBlob.ref_count
+tracks how many agreements point at a blob. Releasing the last reference
+leaves the row at zero; once the transaction commits, delete_unreferenced()
+deletes the file and the row under the row's lock, which store() also takes,
+so a concurrent upload of the same content either keeps the blob or writes
+the file again.
+
+An upload is streamed to temp/blobs/ while it is hashed, then either moved
+into place or, when the content is already stored, discarded.
+"""
+import os
+import uuid
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import AttachmentBlob
+from .utils.file_utils import HashingFile
+
+BLOB_DIR = 'agreements/blobs'
+INCOMING_DIR = 'temp/blobs'
+
+
+def blob_name(sha256, filename=''):
+    # Keep the extension so the file is served with a sensible content type
+    ext = os.path.splitext(filename)[1].lower()[:10]
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+def _move(source, target, storage=default_storage):
+    """Move a stored file, by rename where the storage is on a local disk"""
+    if storage.exists(target):
+        # Same name means same content
+        storage.delete(source)
+        return
+    try:
+        source_path, target_path = storage.path(source), storage.path(target)
+    except NotImplementedError:
+        with storage.open(source, 'rb') as f:
+            storage.save(target, f)
+        storage.delete(source)
+        return
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    os.replace(source_path, target_path)
+
+
+def store(content, filename, storage=default_storage):
+    """
+    Stream ``content`` into the blob store and take one reference to the
+    resulting AttachmentBlob. Call inside the transaction that saves the
+    referencing agreement, so the reference goes away if that save fails.
+    """
+    upload = HashingFile(content, name=filename)
+    incoming = storage.save(f'{INCOMING_DIR}/{uuid.uuid4().hex}', upload)
+    sha256 = upload.hexdigest()
+
+    with transaction.atomic():
+        blob = AttachmentBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            name = blob_name(sha256, filename)
+            _move(incoming, name, storage)
+            try:
+                with transaction.atomic():
+                    return AttachmentBlob.objects.create(
+                        sha256=sha256, size=upload.bytes_read, name=name, ref_count=1
+                    )
+            except IntegrityError:
+                # The same content was stored concurrently; its file is already in place
+                blob = AttachmentBlob.objects.select_for_update().get(sha256=sha256)
+        elif not storage.exists(blob.name):
+            # Lost, e.g. deleted by hand; this upload has the same content
+            _move(incoming, blob.name, storage)
+        else:
+            storage.delete(incoming)
+        AttachmentBlob.objects.filter(pk=blob.pk).update(
+            ref_count=F('ref_count') + 1,
+            dedup_hits=F('dedup_hits') + 1,
+        )
+        return blob
+
+
+def release(sha256, storage=default_storage):
+    """
+    Drop one reference to the blob with ``sha256``. Returns False if there is
+    no such blob (an attachment stored before the blob store existed).
+    """
+    with transaction.atomic():
+        blob = AttachmentBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            return False
+        if blob.ref_count > 1:
+            AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            return True
+        AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=0)
+
+    transaction.on_commit(lambda: delete_unreferenced(sha256, storage))
+    return True
+
+
+def delete_unreferenced(sha256, storage=default_storage):
+    """Delete the blob with ``sha256`` and its file if no agreement references it"""
+    with transaction.atomic():
+        blob = AttachmentBlob.objects.select_for_update().filter(sha256=sha256, ref_count=0).first()
+        if blob is None:
+            # Referenced again since it was released
+            return False
+        storage.delete(blob.name)
+        blob.delete()
+    return True
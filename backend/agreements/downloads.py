@@ -0,0 +1,185 @@
+"""
+Permission-checked attachment downloads.
+
+The view checks the same visibility rule as the agreement detail endpoint,
+then either hands the transfer to nginx with X-Accel-Redirect (when nginx
+proxied the request and said so with ``X-Sendfile-Type``) or streams the
+file itself. nginx serves byte ranges for redirected files on its own; the
+Django fallback handles a single ``Range: bytes=`` range for local runs.
+
+Links rendered by the API carry a signed, expiring ``?signature=`` for the
+agreement instead of the user's token, so a browser can follow them
+without an Authorization header and nothing reusable ends up in history,
+proxy logs or Referer headers. They are only handed to users who may view
+the agreement. API clients can also send a Bearer Authorization header.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET
+
+from accounts.access import get_access_scope
+from accounts.authentication import authenticate_jwt
+from .models import Agreement
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SIGNING_SALT = 'agreements.attachment-download'
+
+
+def get_download_url(agreement_id, request=None):
+    """Signed download link for an agreement's attachment, valid for ATTACHMENT_URL_MAX_AGE seconds"""
+    signature = signing.TimestampSigner(salt=SIGNING_SALT).sign(str(agreement_id))
+    url = f"{reverse('agreement-attachment', args=[agreement_id])}?signature={quote(signature)}"
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def check_download_signature(signature, agreement_id):
+    try:
+        value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            signature, max_age=getattr(settings, 'ATTACHMENT_URL_MAX_AGE', 900)
+        )
+    except signing.BadSignature:
+        return False
+    return value == str(agreement_id)
+
+
+def get_etag(agreement):
+    # Stored names never change content (blob names are the hash, older ones a UUID)
+    digest = agreement.attachment_sha256 or hashlib.md5(agreement.attachment.name.encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single satisfiable byte range, None to send
+    the whole file, or False if the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        # Missing, malformed or multi-range: a full 200 response is allowed
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _stream_range(file, start, length, chunk_size=64 * 1024):
+    try:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        file.close()
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+@require_GET
+def attachment_download(request, pk):
+    """Download an agreement's attachment with a signed link, or if the user may view the agreement"""
+    signature = request.GET.get('signature')
+    user = None
+    if signature:
+        if not check_download_signature(signature, pk):
+            return _error('This download link is invalid or has expired.', 403)
+    else:
+        user = authenticate_jwt(request)
+        if user is None:
+            return _error('Authentication credentials were not provided or are invalid.', 401)
+
+    agreement = Agreement.objects.filter(pk=pk).only(
+        'id', 'department_id', 'attachment', 'attachment_sha256', 'attachment_size', 'original_filename'
+    ).first()
+    if agreement is None:
+        return _error('Agreement not found.', 404)
+    if user is not None and not get_access_scope(user).can_view_department(agreement.department_id):
+        return _error('You do not have permission to view this agreement.', 403)
+    if not agreement.attachment:
+        return _error('This agreement has no attachment.', 404)
+
+    etag = get_etag(agreement)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    name = agreement.attachment.name
+    filename = agreement.original_filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    as_attachment = request.GET.get('download') in ('1', 'true')
+
+    accel_prefix = getattr(settings, 'ATTACHMENT_ACCEL_REDIRECT_PREFIX', '')
+    if accel_prefix and request.headers.get('X-Sendfile-Type') == 'X-Accel-Redirect':
+        # nginx sends the file (and handles Range) without holding a worker
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(name)
+    else:
+        response = _serve_file(request, agreement, content_type, etag)
+        if response.status_code not in (200, 206):
+            return response
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _serve_file(request, agreement, content_type, etag):
+    """Django-only fallback with single-range support"""
+    storage = agreement.attachment.storage
+    name = agreement.attachment.name
+    if not storage.exists(name):
+        return _error('Attachment file is missing.', 404)
+    size = agreement.attachment_size if agreement.attachment_size is not None else storage.size(name)
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range.strip() != etag:
+        # The client's copy is stale: send the whole file
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = storage.open(name, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_stream_range(file, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
@@ -0,0 +1,175 @@
+"""
+Server-Sent Events feed for the dashboard.
+
+Writers (any process) bump a shared version counter in the cache after an
+agreement change commits. Each ASGI process runs a single broadcaster task
+that watches that counter, rebuilds the stats once per change and fans the
+payload out to every connected dashboard, so idle connections cost no
+database queries.
+
+EventSource cannot send an Authorization header, so the client first
+exchanges its JWT for a short-lived signed ticket (stream_ticket) and
+passes that in the URL; the JWT itself never appears in a URL or an access
+log. A stream ends after DASHBOARD_EVENTS_MAX_DURATION seconds and the
+client reconnects with a fresh ticket, which re-checks its credentials.
+
+The stream is only served under ASGI (uvicorn, port 8001, reached only
+through the frontend's nginx, or the Vite proxy in development). A WSGI
+worker would hold the infinite response forever, so there it answers 503
+and the client falls back to polling dashboard-stats.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .rollup import get_dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'dashboard:version'
+TICKET_SALT = 'agreements.dashboard-stream'
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+    # incr() stores the key again with the default timeout on some backends;
+    # an expired counter would restart from a value streams have already seen
+    cache.touch(VERSION_KEY, None)
+
+
+def notify_dashboard_changed():
+    """Tell every event stream the dashboard changed, once the transaction commits"""
+    transaction.on_commit(_bump_version)
+
+
+def get_dashboard_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+class DashboardBroadcaster:
+    """One polling task per process, shared by all subscribed streams"""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.latest = None
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, payload):
+        self.latest = payload
+        for queue in list(self.subscribers):
+            # Only the newest snapshot matters to a slow client
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def run(self):
+        interval = getattr(settings, 'DASHBOARD_EVENTS_POLL_INTERVAL', 2)
+        seen = None
+        try:
+            while self.subscribers:
+                # The date is part of the key so buckets roll over at midnight
+                current = (await sync_to_async(get_dashboard_version)(), date.today())
+                if current != seen:
+                    seen = current
+                    self.publish(await sync_to_async(get_dashboard_stats)())
+                await asyncio.sleep(interval)
+        except Exception:
+            logger.exception("Dashboard event broadcaster stopped")
+        finally:
+            # Stale once nobody is listening; the next subscriber starts afresh
+            self.latest = None
+
+
+broadcaster = DashboardBroadcaster()
+
+
+def _format_event(payload):
+    return f"event: stats\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n"
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """Short-lived signed ticket that authorizes one dashboard stream connection"""
+    return Response({
+        'ticket': signing.dumps({'user': request.user.pk}, salt=TICKET_SALT),
+        'max_age': getattr(settings, 'DASHBOARD_EVENTS_TICKET_MAX_AGE', 60),
+    })
+
+
+def _ticket_user(ticket):
+    if not ticket:
+        return None
+    try:
+        data = signing.loads(
+            ticket, salt=TICKET_SALT, max_age=getattr(settings, 'DASHBOARD_EVENTS_TICKET_MAX_AGE', 60)
+        )
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=data.get('user'), is_active=True).first()
+
+
+async def dashboard_stream(request):
+    """text/event-stream of dashboard-stats payloads, pushed whenever they change"""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'The dashboard stream is only served over ASGI; poll dashboard-stats instead.'},
+            status=503
+        )
+    user = await sync_to_async(_ticket_user)(request.GET.get('ticket'))
+    if user is None:
+        return JsonResponse({'error': 'Stream ticket is missing, invalid or expired.'}, status=401)
+
+    keepalive = getattr(settings, 'DASHBOARD_EVENTS_KEEPALIVE', 15)
+    # Past this the client reconnects with a new ticket, re-checking its login
+    ends_at = time.monotonic() + getattr(settings, 'DASHBOARD_EVENTS_MAX_DURATION', 300)
+
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            while (remaining := ends_at - time.monotonic()) > 0:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=min(keepalive, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_event(payload)
+            yield "event: reconnect\ndata: {}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -147,7 +147,7 @@ class AgreementForm(forms.ModelForm):
         # Handle attachment deletion
         delete_flag = self.data.get('delete_attachment') == '1' if hasattr(self, 'data') else False
         if delete_flag and instance.attachment:
-            instance.attachment.delete(save=False)
+            # Agreement.save() releases the stored file, which other agreements may share
             instance.attachment = None
         
         # Set department from department field
@@ -0,0 +1,183 @@
+"""
+A small job queue on the Job table, so slow work such as email runs outside
+the request.
+
+enqueue() inserts a job once the current transaction commits, so a worker
+never sees a job for a row that was rolled back. ``manage.py run_jobs``
+claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+workers can poll the table without picking the same job or waiting on each
+other. A failed job is retried with exponential backoff and marked dead
+after max_attempts; dead jobs stay in the table (and the admin) until
+requeued. While a worker runs, a Heartbeat thread keeps refreshing
+locked_at of its claimed jobs, so reclaim_stale() only takes over jobs
+whose worker has stopped, never ones that are just slow.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register(name):
+    """Decorator registering a function as the handler for jobs called ``name``"""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, delay=0, max_attempts=None, **payload):
+    """
+    Queue ``name`` to be run with ``payload`` (JSON-serializable keyword
+    arguments) after the current transaction commits, or now outside one.
+    """
+    if name not in _handlers:
+        raise ValueError(f"No job handler registered for '{name}'")
+    max_attempts = max_attempts or getattr(settings, 'JOB_QUEUE_MAX_ATTEMPTS', 5)
+
+    def create():
+        Job.objects.create(
+            name=name,
+            payload=payload,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            max_attempts=max_attempts,
+        )
+
+    transaction.on_commit(create)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit=10):
+    """Lock and mark up to ``limit`` due jobs as running for ``worker``"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by('run_at')[:limit]
+        )
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1
+        )
+    for job in jobs:
+        job.status, job.locked_by, job.locked_at = Job.RUNNING, worker, now
+        job.attempts += 1
+    return jobs
+
+
+def retry_delay(attempts):
+    """Seconds before retrying after the given number of attempts, with jitter"""
+    base = getattr(settings, 'JOB_QUEUE_RETRY_DELAY', 30)
+    cap = getattr(settings, 'JOB_QUEUE_MAX_RETRY_DELAY', 3600)
+    delay = min(base * 2 ** (attempts - 1), cap)
+    # Spread retries of jobs that failed together (e.g. an SMTP outage)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run(job):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    handler = _handlers.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No job handler registered for '{job.name}'")
+        handler(**job.payload)
+    except Exception as e:
+        _fail(job, e)
+        return False
+
+    # Only if no other worker took the job over in the meantime
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=Job.DONE, finished_at=timezone.now(), last_error=''
+    )
+    return True
+
+
+def _fail(job, error):
+    now = timezone.now()
+    last_error = ''.join(traceback.format_exception(error))[-4000:]
+    if job.attempts >= job.max_attempts:
+        logger.error(f"Job {job} failed {job.attempts} time(s), giving up: {error}")
+        changes = {'status': Job.DEAD, 'finished_at': now}
+    else:
+        delay = retry_delay(job.attempts)
+        logger.warning(f"Job {job} failed (attempt {job.attempts}), retrying in {delay:.0f}s: {error}")
+        changes = {'status': Job.QUEUED, 'run_at': now + timedelta(seconds=delay)}
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(last_error=last_error, **changes)
+
+
+def beat(worker):
+    """Mark ``worker``'s claimed jobs as still being worked on"""
+    return Job.objects.filter(status=Job.RUNNING, locked_by=worker).update(locked_at=timezone.now())
+
+
+class Heartbeat:
+    """
+    Context manager running beat() for ``worker`` every quarter of
+    JOB_QUEUE_LOCK_TIMEOUT from a background thread, for as long as the
+    worker runs.
+    """
+
+    def __init__(self, worker, interval=None):
+        self.worker = worker
+        self.interval = interval or getattr(settings, 'JOB_QUEUE_LOCK_TIMEOUT', 600) / 4
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='job-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    beat(self.worker)
+                except Exception:
+                    logger.exception("Job heartbeat failed")
+        finally:
+            # This thread's own connection
+            connection.close()
+
+
+def reclaim_stale(timeout=None):
+    """Requeue running jobs whose worker died without finishing them (no heartbeat for ``timeout``)"""
+    timeout = timeout or getattr(settings, 'JOB_QUEUE_LOCK_TIMEOUT', 600)
+    stale = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=stale).update(status=Job.QUEUED, locked_by='')
+
+
+def requeue(queryset):
+    """Give dead (or any finished) jobs a fresh set of attempts"""
+    return queryset.exclude(status=Job.RUNNING).update(
+        status=Job.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None, locked_by=''
+    )
+
+
+def purge(days=None):
+    """Delete jobs that finished successfully more than ``days`` ago"""
+    days = days if days is not None else getattr(settings, 'JOB_QUEUE_KEEP_DONE_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
@@ -0,0 +1,84 @@
+"""A minimal in-process SMTP server that accepts and discards mail, for benchmarks"""
+import random
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        sink.count('connections')
+        self.reply('220 localhost SMTP sink')
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line in (b'.\r\n', b'.\n'):
+                    in_data = False
+                    if sink.latency:
+                        time.sleep(sink.latency)
+                    if sink.should_fail():
+                        sink.count('rejected')
+                        self.reply('451 4.3.0 Temporary failure, try again later')
+                    else:
+                        sink.count('messages')
+                        self.reply('250 2.0.0 OK')
+                continue
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self.reply('250 localhost')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply('250 OK')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """
+    Listens on 127.0.0.1 (a free port unless given) in a background thread.
+    ``latency`` seconds are added to every message; ``fail_rate`` of them are
+    answered with a transient 451 error.
+    """
+
+    def __init__(self, port=0, latency=0.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.stats = {'connections': 0, 'messages': 0, 'rejected': 0}
+        self.lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', port), _Handler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.fail_rate
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,121 @@
+"""
+Synthetic agreement data for the benchmark commands.
+
+Every run's rows carry a random tag (agreement IDs "B<tag>_<n>", names and
+emails containing it). Callers are expected to run inside
+``transaction.atomic()`` and roll back afterwards, or to pass the tag to
+delete_synthetic_data() in a ``finally`` block.
+"""
+import uuid
+from datetime import date, timedelta
+
+from django.db import connection, models
+
+from accounts.models import Department, User, Vendor
+from agreements.models import Agreement, AgreementType
+
+
+def new_tag():
+    return uuid.uuid4().hex[:6]
+
+
+def create_synthetic_agreements(count, departments=5, users_per_department=3, batch_size=5000,
+                                assign_users=True, tag=None):
+    """Bulk-create ``count`` agreements spread across synthetic departments"""
+    tag = tag or new_tag()
+    department_objs = [
+        Department.objects.create(name=f'Bench {tag} {i}')
+        for i in range(departments)
+    ]
+    users = []
+    for department in department_objs:
+        for i in range(users_per_department):
+            users.append(User.objects.create(
+                email=f'bench.{tag}.{department.id}.{i}@example.com',
+                full_name=f'Bench User {department.id}.{i}',
+                department=department,
+            ))
+    vendor = Vendor.objects.create(
+        name=f'Bench Vendor {tag}',
+        address='Benchmark',
+        email=f'bench.{tag}@example.com',
+        phone_number='+1234567890',
+    )
+    agreement_type = AgreementType.objects.create(name=f'Bench Type {tag}')
+
+    today = date.today()
+    statuses = ['ongoing', 'ongoing', 'ongoing', 'expired', 'draft', 'terminated']
+    created = 0
+    while created < count:
+        batch = []
+        for i in range(created, min(created + batch_size, count)):
+            expiry_date = today + timedelta(days=(i * 7) % 1200 - 400)
+            batch.append(Agreement(
+                title=f'Bench agreement {i}',
+                agreement_type=agreement_type,
+                status=statuses[i % len(statuses)],
+                start_date=expiry_date - timedelta(days=730),
+                expiry_date=expiry_date,
+                reminder_time=expiry_date - timedelta(days=180),
+                party_name=vendor,
+                department=department_objs[i % departments],
+                creator=users[i % len(users)],
+                agreement_id=f'B{tag}_{i}',
+            ))
+        Agreement.objects.bulk_create(batch)
+        created += len(batch)
+
+    agreements = Agreement.objects.filter(agreement_id__startswith=f'B{tag}_')
+    if not assign_users:
+        return agreements
+    through = Agreement.assigned_users.through
+    links = []
+    for agreement_id, department_id in agreements.values_list('id', 'department_id').iterator():
+        links.extend(
+            through(agreement_id=agreement_id, user_id=user.id)
+            for user in users if user.department_id == department_id
+        )
+        if len(links) >= batch_size:
+            through.objects.bulk_create(links)
+            links = []
+    through.objects.bulk_create(links)
+    return agreements
+
+
+def synthetic_departments(tag):
+    return Department.objects.filter(name__startswith=f'Bench {tag} ')
+
+
+def delete_synthetic_data(tag, batch_size=5000):
+    """Remove everything create_synthetic_agreements(tag=tag) has left in the database"""
+    agreements = Agreement.objects.filter(agreement_id__startswith=f'B{tag}_')
+    while batch := list(agreements.order_by('pk').values_list('pk', flat=True)[:batch_size]):
+        _delete_agreements(batch)
+    User.objects.filter(email__startswith=f'bench.{tag}.', email__endswith='@example.com').delete()
+    synthetic_departments(tag).delete()
+    Vendor.objects.filter(email=f'bench.{tag}@example.com').delete()
+    AgreementType.objects.filter(name=f'Bench Type {tag}').delete()
+
+
+def _delete_agreements(ids):
+    """
+    Delete agreements by primary key, with one statement per dependent table,
+    instead of loading them into the deletion collector. They were
+    bulk-created without signals, so Agreement's delete signals (rollup,
+    attachment references) must not run for them either.
+    """
+    Agreement.assigned_users.through.objects.filter(agreement_id__in=ids).delete()
+    for relation in Agreement._meta.related_objects:
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': ids})
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        else:
+            related.delete()
+    quote_name = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote_name(Agreement._meta.db_table)} '
+            f'WHERE {quote_name(Agreement._meta.pk.column)} IN ({placeholders})',
+            ids,
+        )
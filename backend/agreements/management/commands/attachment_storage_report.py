@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+
+from agreements import blobs
+from agreements.models import Agreement, AttachmentBlob
+
+
+def format_bytes(size):
+    size = float(size or 0)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+class Command(BaseCommand):
+    help = 'Report disk, backup and write savings from attachment deduplication and check blob reference counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backup-copies', type=int, default=1,
+            help='Number of retained backups of the media directory, to estimate backup savings'
+        )
+        parser.add_argument('--fix', action='store_true', help='Correct reference counts that disagree with the agreements')
+
+    def handle(self, *args, **options):
+        attached = Agreement.objects.exclude(attachment='').exclude(attachment__isnull=True)
+        blob_refs = attached.filter(attachment__startswith=f'{blobs.BLOB_DIR}/')
+        legacy = attached.exclude(attachment__startswith=f'{blobs.BLOB_DIR}/')
+
+        referenced = blob_refs.aggregate(files=Count('id'), total=Sum('attachment_size'))
+        stored = AttachmentBlob.objects.aggregate(
+            files=Count('id'),
+            total=Sum('size'),
+            writes_avoided=Sum(F('dedup_hits') * F('size')),
+        )
+        logical = referenced['total'] or 0
+        physical = stored['total'] or 0
+        saved = logical - physical
+
+        self.stdout.write('Blob store')
+        self.stdout.write(f'  agreements with attachments: {referenced["files"]} ({format_bytes(logical)})')
+        self.stdout.write(f'  distinct files stored:       {stored["files"]} ({format_bytes(physical)})')
+        self.stdout.write(f'  disk saved:                  {format_bytes(saved)}'
+                          + (f' ({saved / logical:.1%})' if logical else ''))
+        self.stdout.write(f'  backup saved:                {format_bytes(saved * options["backup_copies"])}'
+                          f' over {options["backup_copies"]} backup(s)')
+        self.stdout.write(f'  upload writes avoided:       {format_bytes(stored["writes_avoided"])}')
+
+        legacy_total = legacy.aggregate(files=Count('id'), total=Sum('attachment_size'))
+        if legacy_total['files']:
+            duplicates = legacy.exclude(attachment_sha256__isnull=True).order_by().values(
+                'attachment_sha256'
+            ).annotate(copies=Count('id'), file_size=Max('attachment_size')).filter(copies__gt=1)
+            reclaimable = sum((row['copies'] - 1) * (row['file_size'] or 0) for row in duplicates)
+            self.stdout.write('Not yet in the blob store (run migrate_attachments_to_blobs)')
+            self.stdout.write(f'  attachments: {legacy_total["files"]} ({format_bytes(legacy_total["total"])})')
+            self.stdout.write(f'  reclaimable from duplicates: {format_bytes(reclaimable)}')
+
+        self.check_ref_counts(blob_refs, options['fix'])
+
+    def check_ref_counts(self, blob_refs, fix):
+        actual = dict(
+            blob_refs.order_by().values('attachment_sha256').annotate(refs=Count('id')).values_list(
+                'attachment_sha256', 'refs'
+            )
+        )
+        drift = [
+            (sha256, ref_count, actual.get(sha256, 0))
+            for sha256, ref_count in AttachmentBlob.objects.values_list('sha256', 'ref_count').iterator()
+            if ref_count != actual.get(sha256, 0)
+        ]
+        # Released, but the process stopped before deleting them
+        unreferenced = list(AttachmentBlob.objects.filter(ref_count=0).values_list('sha256', flat=True))
+        if unreferenced:
+            self.stdout.write(self.style.WARNING(f'{len(unreferenced)} unreferenced blob(s) not yet deleted'))
+            if fix:
+                deleted = sum(blobs.delete_unreferenced(sha256) for sha256 in unreferenced)
+                self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} unreferenced blob(s)'))
+        if not drift:
+            self.stdout.write('Reference counts are consistent')
+            return
+
+        self.stdout.write(self.style.WARNING(f'{len(drift)} blob(s) with a wrong reference count:'))
+        for sha256, stored, refs in drift:
+            self.stdout.write(f'  {sha256}: stored {stored}, actual {refs}')
+        if not fix:
+            return
+        for sha256, stored, refs in drift:
+            with transaction.atomic():
+                if refs:
+                    AttachmentBlob.objects.filter(sha256=sha256).update(ref_count=refs)
+                else:
+                    # Unreferenced: let release() delete the row and the file
+                    AttachmentBlob.objects.filter(sha256=sha256).update(ref_count=1)
+                    blobs.release(sha256)
+        self.stdout.write(self.style.SUCCESS('Reference counts corrected'))
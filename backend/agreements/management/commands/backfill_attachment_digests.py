@@ -0,0 +1,36 @@
+import hashlib
+
+from django.core.management.base import BaseCommand
+
+from agreements.models import Agreement
+
+
+class Command(BaseCommand):
+    help = 'Compute SHA-256 and size for attachments uploaded before they were recorded on save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        pending = Agreement.objects.filter(attachment_sha256__isnull=True).exclude(attachment='').exclude(
+            attachment__isnull=True
+        ).only('id', 'attachment')
+        updated = missing = 0
+        for agreement in pending.iterator(chunk_size=options['batch_size']):
+            storage = agreement.attachment.storage
+            if not storage.exists(agreement.attachment.name):
+                missing += 1
+                continue
+            digest = hashlib.sha256()
+            size = 0
+            with storage.open(agreement.attachment.name, 'rb') as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+            # update() skips save() and its signals; only the two columns change
+            Agreement.objects.filter(pk=agreement.pk).update(attachment_sha256=digest.hexdigest(), attachment_size=size)
+            updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Recorded digests for {updated} attachment(s)'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} attachment file(s) missing from storage'))
@@ -0,0 +1,94 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from agreements.models import Agreement
+from ._synthetic import create_synthetic_agreements, delete_synthetic_data, new_tag, synthetic_departments
+
+BENCHMARK_INDEXES = (
+    'agreement_dept_created_idx',
+    'agreement_status_expiry_idx',
+    'agreement_expiry_idx',
+    'agreement_reminder_idx',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot agreement query shapes with and without the composite indexes '
+        'on a synthetic dataset. Drops and recreates indexes: never run against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Number of synthetic agreements')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+        parser.add_argument('--keep-data', action='store_true', help='Leave the synthetic rows in place')
+        parser.add_argument(
+            '--drop-indexes', action='store_true',
+            help='Confirm that the indexes may be dropped and recreated on the configured database'
+        )
+
+    def handle(self, *args, **options):
+        if not options['drop_indexes']:
+            raise CommandError(
+                f'This drops the agreement indexes on database {connection.settings_dict["NAME"]!r} '
+                'while it runs; point it at a development database and pass --drop-indexes'
+            )
+
+        tag = new_tag()
+        try:
+            self.stdout.write(f'Creating {options["rows"]} synthetic agreements...')
+            create_synthetic_agreements(options['rows'], departments=20, assign_users=False, tag=tag)
+            department = synthetic_departments(tag).first()
+
+            indexes = [index for index in Agreement._meta.indexes if index.name in BENCHMARK_INDEXES]
+            try:
+                with connection.schema_editor() as schema_editor:
+                    for index in indexes:
+                        schema_editor.remove_index(Agreement, index)
+                before = self.run_queries(department, options['repeat'])
+            finally:
+                with connection.schema_editor() as schema_editor:
+                    for index in indexes:
+                        schema_editor.add_index(Agreement, index)
+            after = self.run_queries(department, options['repeat'])
+        finally:
+            if not options['keep_data']:
+                delete_synthetic_data(tag)
+
+        self.stdout.write(f'{"query":<34} {"before (ms)":>12} {"after (ms)":>12} {"speed-up":>9}')
+        for name in before:
+            speed_up = before[name] / after[name] if after[name] else float('inf')
+            self.stdout.write(f'{name:<34} {before[name]:12.2f} {after[name]:12.2f} {speed_up:8.1f}x')
+
+    def get_queries(self, department):
+        today = date.today()
+        return {
+            'department list page': lambda: list(
+                Agreement.objects.filter(department=department).order_by('-created_at', 'id')[:50]
+            ),
+            'active, expiring in 3 months': lambda: Agreement.objects.filter(
+                status='ongoing', expiry_date__gte=today, expiry_date__lte=today + timedelta(days=90)
+            ).count(),
+            'expired': lambda: Agreement.objects.filter(status='expired').count(),
+            'expiry range (1 month)': lambda: Agreement.objects.filter(
+                expiry_date__gt=today, expiry_date__lte=today + timedelta(days=30)
+            ).count(),
+            'reminders due today': lambda: list(
+                Agreement.objects.filter(reminder_time=today).values_list('id', flat=True)
+            ),
+        }
+
+    def run_queries(self, department, repeat):
+        results = {}
+        for name, query in self.get_queries(department).items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+        return results
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.core.management.base import BaseCommand
+
+from agreements.utils.mailer import Mailer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare send_mail() (one connection per message) with the pooled Mailer '
+        'against an SMTP server, normally a local stand-in'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost', help='SMTP host (default localhost)')
+        parser.add_argument('--port', type=int, default=1025, help='SMTP port (default 1025)')
+        parser.add_argument('--tls', action='store_true', help='Use STARTTLS')
+        parser.add_argument('--messages', type=int, default=200, help='Messages per run')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent senders')
+        parser.add_argument('--pool-size', type=int, default=2, help='Mailer connections')
+        parser.add_argument(
+            '--rate', type=int, default=0,
+            help='Mailer limit in messages/minute (default 0: unlimited, to measure raw throughput)'
+        )
+
+    def handle(self, *args, **options):
+        connection_kwargs = {
+            'backend': 'django.core.mail.backends.smtp.EmailBackend',
+            'host': options['host'],
+            'port': options['port'],
+            'use_tls': options['tls'],
+            'username': '',
+            'password': '',
+        }
+        messages = [
+            EmailMessage(f'Benchmark {i}', 'Agreement reminder benchmark', settings.DEFAULT_FROM_EMAIL,
+                         [f'user{i}@example.com'])
+            for i in range(options['messages'])
+        ]
+        self.stdout.write(f'{len(messages)} messages to {options["host"]}:{options["port"]}, '
+                          f'{options["threads"]} thread(s)')
+
+        def per_message(message):
+            # What send_mail() does: a new connection (and TLS handshake) per message
+            send_mail(message.subject, message.body, message.from_email, message.to,
+                      connection=get_connection(**connection_kwargs))
+
+        baseline = self.run('send_mail', per_message, messages, options['threads'])
+        self.stdout.write(f'    connections    {len(messages)}')
+
+        # A limit of its own, so the benchmark neither waits for nor uses up the live one
+        mailer = Mailer(rate_per_minute=options['rate'], pool_size=options['pool_size'], shared=False,
+                        **connection_kwargs)
+        pooled = self.run('Mailer', mailer.send, messages, options['threads'])
+        mailer.close()
+        stats = mailer.stats
+        self.stdout.write(f'    connections    {stats["connections"]}')
+        self.stdout.write(f'    retries        {stats["retries"]}')
+        self.stdout.write(f'    failed         {stats["failed"]}')
+        self.stdout.write(f'    throttled      {stats["throttled_seconds"]:.1f} s')
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {baseline / pooled:.1f}x'))
+
+    def run(self, label, send, messages, threads):
+        failures = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(send, message) for message in messages]:
+                if future.exception() is not None:
+                    failures += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  {label:<14} {elapsed:8.2f} s  {len(messages) / elapsed:8.1f} msgs/sec'
+                          + (f'  ({failures} failed)' if failures else ''))
+        return elapsed
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from agreements.models import Agreement
+from agreements.serializers import AgreementSerializer, AgreementValuesSerializer
+from ._synthetic import create_synthetic_agreements
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row cost of AgreementSerializer and the values() list fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Number of synthetic agreements')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per serializer (best is reported)')
+        parser.add_argument('--fields', default='', help='Sparse field set for the fast path, e.g. id,title,status')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        fields = [name for name in options['fields'].split(',') if name] or None
+
+        with transaction.atomic():
+            ids = list(create_synthetic_agreements(rows).values_list('id', flat=True))
+            queryset = Agreement.objects.for_list().filter(id__in=ids).order_by('-created_at', 'id')
+
+            def run_serializer():
+                return AgreementSerializer(queryset.all(), many=True).data
+
+            def run_values():
+                values_serializer = AgreementValuesSerializer(fields=fields)
+                return values_serializer.to_representation(values_serializer.values(queryset.all()))
+
+            results = [
+                ('AgreementSerializer', self.best_of(run_serializer, options['repeat'])),
+                ('AgreementValuesSerializer', self.best_of(run_values, options['repeat'])),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{rows} rows, best of {options["repeat"]}'
+                          + (f', fields={",".join(fields)}' if fields else ''))
+        for name, seconds in results:
+            self.stdout.write(f'  {name:<28} {seconds * 1000:9.1f} ms total  {seconds / rows * 1e6:8.1f} us/row')
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {results[0][1] / results[1][1]:.1f}x'))
+
+    def best_of(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
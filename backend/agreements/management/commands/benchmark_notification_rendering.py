@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from agreements.models import Agreement
+from agreements.utils.email_utils import build_email
+from agreements.utils.rendering import NotificationRenderer, recipient_name
+from ._synthetic import create_synthetic_agreements
+
+STAGES = [('before', {'time_remaining': '30 days'}), ('on', {}), ('after', {'months_since_expiration': 1})]
+
+
+class Command(BaseCommand):
+    help = 'Compare rendering reminder emails per recipient with the render-once NotificationRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000, help='Emails in the fan-out')
+        parser.add_argument('--agreements', type=int, default=20, help='Agreements the recipients are spread over')
+
+    def handle(self, *args, **options):
+        count = options['recipients']
+        recipients = [
+            User(email=f'recipient{i}@example.com', full_name=f"Recipient {i} O'Brien")
+            for i in range(count)
+        ]
+
+        with transaction.atomic():
+            ids = list(create_synthetic_agreements(options['agreements'], assign_users=False).values_list('id', flat=True))
+
+            def fan_out(shared):
+                # Fresh instances, so party_name is a lazy FK as in the send paths
+                agreements = list(Agreement.objects.filter(id__in=ids))
+                renderer = NotificationRenderer()
+                for i, user in enumerate(recipients):
+                    agreement = agreements[i % len(agreements)]
+                    reminder_type, kwargs = STAGES[i % len(STAGES)]
+                    rendered = (renderer if shared else NotificationRenderer()).reminder(agreement, reminder_type, **kwargs)
+                    if not shared:
+                        # The per-recipient path re-reads the relation for every render
+                        Agreement.party_name.field.delete_cached_value(agreement)
+                    text, html = rendered.for_recipient(recipient_name(user))
+                    build_email(rendered.subject, text, html, [user.email])
+                return renderer
+
+            results = []
+            for label, shared in (('per recipient', False), ('render once', True)):
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                    start = time.perf_counter()
+                    renderer = fan_out(shared)
+                    elapsed = time.perf_counter() - start
+                renders = count if not shared else renderer.renders
+                results.append(elapsed)
+                self.stdout.write(
+                    f'  {label:<14} {elapsed * 1000:9.1f} ms  {elapsed / count * 1e6:7.1f} us/email  '
+                    f'{renders:6d} renders  {len(queries)} queries'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} emails over {options["agreements"]} agreements: speed-up {results[0] / results[1]:.1f}x'
+        ))
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from django.test.utils import override_settings
+
+from accounts.models import User
+from agreements.models import Agreement
+from agreements.utils.email_utils import send_agreement_notification, send_agreement_reminder
+from agreements.utils.mailer import Mailer
+from agreements.utils.rendering import NotificationRenderer
+from ._smtp_sink import SMTPSink
+from ._synthetic import create_synthetic_agreements
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive send_agreement_notification and send_agreement_reminder over synthetic agreements '
+        'against an in-process SMTP sink; reports throughput, latency, connections and failures'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--agreements', type=int, default=200, help='Synthetic agreements')
+        parser.add_argument('--recipients', type=int, default=5, help='Assigned users per agreement')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent senders')
+        parser.add_argument('--pool-size', type=int, default=2, help='SMTP connections (EMAIL_CONNECTION_POOL_SIZE)')
+        parser.add_argument('--rate', type=int, default=0, help='Messages/minute limit, default 0: unlimited')
+        parser.add_argument('--server-latency', type=float, default=0, help='Milliseconds the sink takes per message')
+        parser.add_argument('--fail-rate', type=float, default=0, help='Fraction of messages the sink rejects with 451')
+        parser.add_argument('--retry-delay', type=float, default=0.01, help='First retry delay in seconds')
+        parser.add_argument('--only', choices=['notification', 'reminder'], help='Run one of the two paths')
+
+    def handle(self, *args, **options):
+        with SMTPSink(latency=options['server_latency'] / 1000, fail_rate=options['fail_rate']) as sink, \
+                override_settings(
+                    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                    EMAIL_HOST=sink.host, EMAIL_PORT=sink.port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+                    EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+                ), transaction.atomic():
+            ids = list(create_synthetic_agreements(
+                options['agreements'], users_per_department=options['recipients']
+            ).values_list('id', flat=True))
+            agreements = list(Agreement.objects.filter(id__in=ids).select_related(
+                'party_name', 'agreement_type', 'creator'
+            ).prefetch_related(
+                Prefetch('assigned_users', queryset=User.objects.only('id', 'email', 'full_name'))
+            ))
+            self.stdout.write(f'{len(agreements)} agreements, SMTP sink on {sink.host}:{sink.port}, '
+                              f'{options["threads"]} thread(s), pool of {options["pool_size"]}')
+
+            renderer = NotificationRenderer()
+            paths = {
+                # One email to all of an agreement's users, as Agreement's send_notification() does
+                'notification': [
+                    (lambda mailer, agreement=agreement: send_agreement_notification(
+                        agreement, 'created', [user.email for user in agreement.get_users_to_notify()],
+                        renderer=renderer, mailer=mailer,
+                    ))
+                    for agreement in agreements
+                ],
+                # One email per user, as the reminder dispatch does
+                'reminder': [
+                    (lambda mailer, agreement=agreement, user=user: send_agreement_reminder(
+                        agreement, user, 'before', time_remaining='30 days', renderer=renderer, mailer=mailer,
+                    ))
+                    for agreement in agreements for user in agreement.get_users_to_notify()
+                ],
+            }
+            for name, sends in paths.items():
+                if options['only'] in (None, name):
+                    self.run(name, sends, sink, options)
+            transaction.set_rollback(True)
+
+    def run(self, name, sends, sink, options):
+        # A Mailer of its own: the process-wide one would take from (and with
+        # --rate, drain) the rate limit shared with the live senders
+        mailer = Mailer(
+            rate_per_minute=options['rate'], pool_size=options['pool_size'],
+            retry_delay=options['retry_delay'], shared=False,
+        )
+        before = dict(sink.stats)
+
+        def timed(send):
+            start = time.perf_counter()
+            ok = send(mailer)
+            return ok, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = list(executor.map(timed, sends))
+        elapsed = time.perf_counter() - start
+        mailer.close()
+        stats = mailer.stats
+
+        latencies = sorted(latency for _, latency in results)
+        failures = sum(1 for ok, _ in results if not ok)
+        self.stdout.write(f'{name}: {len(sends)} sends in {elapsed:.2f}s, '
+                          f'{(len(sends) - failures) / elapsed:.1f} msgs/sec')
+        self.stdout.write('  latency ms     p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  max {:.1f}'.format(
+            *(percentile(latencies, fraction) * 1000 for fraction in (0.5, 0.9, 0.99, 1.0))
+        ))
+        self.stdout.write(f'  connections    {sink.stats["connections"] - before["connections"]}')
+        self.stdout.write(f'  retries        {stats["retries"]} ({sink.stats["rejected"] - before["rejected"]} rejected by the sink)')
+        self.stdout.write(f'  throttled      {stats["throttled_seconds"]:.1f} s')
+        style = self.style.ERROR if failures else self.style.SUCCESS
+        self.stdout.write(style(f'  failures       {failures}'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from agreements import rollup
+
+
+class Command(BaseCommand):
+    help = 'Compare the dashboard rollup with the agreement table, report drift and rebuild it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not rebuild')
+
+    def handle(self, *args, **options):
+        drift = rollup.find_drift()
+        if drift:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} rollup counter(s) out of sync:'))
+            for (department_pk, status, bucket), stored, actual in drift:
+                self.stdout.write(
+                    f'  department={department_pk} status={status} bucket={bucket}: '
+                    f'stored {stored}, actual {actual}'
+                )
+        else:
+            self.stdout.write('Dashboard rollup is consistent')
+
+        if not options['dry_run']:
+            rollup.rebuild()
+            self.stdout.write(self.style.SUCCESS('Dashboard rollup rebuilt'))
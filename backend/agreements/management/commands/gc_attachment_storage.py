@@ -0,0 +1,170 @@
+import os
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from agreements.blobs import BLOB_DIR
+from agreements.models import Agreement, AttachmentBlob, UploadSession
+from agreements.uploads import TEMP_DIR, UPLOADS_DIR
+
+MEDIA_DIR = 'agreements'
+
+
+def iter_files(storage, top):
+    """
+    Yield (name, mtime, size) for every file below ``top``. Directories are
+    read with os.scandir where the storage is on local disk, so even a
+    directory with hundreds of thousands of entries is never listed at once.
+    """
+    try:
+        storage.path(top)
+    except NotImplementedError:
+        yield from _iter_listdir(storage, top)
+        return
+
+    pending = [top]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = os.scandir(storage.path(current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{current}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_mtime, stat.st_size
+
+
+def _iter_listdir(storage, top):
+    if not storage.exists(top):
+        return
+    directories, files = storage.listdir(top)
+    for filename in files:
+        name = f'{top}/{filename}'
+        yield name, storage.get_modified_time(name).timestamp(), storage.size(name)
+    for directory in directories:
+        yield from _iter_listdir(storage, f'{top}/{directory}')
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete attachment files no agreement references (left by queryset and cascade '
+        'deletes) and abandoned uploads under temp/, skipping anything newer than the grace period'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24, help='Leave files younger than this alone')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Files checked against the database per query')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        self.storage = default_storage
+        self.dry_run = options['dry_run']
+        self.cutoff = time.time() - options['grace_hours'] * 3600
+        self.session_cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        self.scanned = self.deleted = self.freed = 0
+
+        self.expire_upload_sessions()
+        for batch in batched(self.old_files(MEDIA_DIR), options['batch_size']):
+            self.collect_media(batch)
+        for batch in batched(self.old_files(TEMP_DIR), options['batch_size']):
+            self.collect_temp(batch)
+        if not self.dry_run:
+            self.remove_empty_directories(TEMP_DIR)
+            self.remove_empty_directories(BLOB_DIR)
+
+        verb = 'would delete' if self.dry_run else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {self.scanned} file(s), {verb} {self.deleted} ({self.freed / (1024 * 1024):.1f} MB)'
+        ))
+
+    def old_files(self, top):
+        for name, mtime, size in iter_files(self.storage, top):
+            self.scanned += 1
+            if mtime < self.cutoff:
+                yield name, size
+
+    def expire_upload_sessions(self):
+        """Drop abandoned sessions; their chunks count as unreferenced below"""
+        stale = UploadSession.objects.filter(updated_at__lt=self.session_cutoff)
+        count = stale.count()
+        if count and not self.dry_run:
+            stale.delete()
+        if count:
+            self.stdout.write(f'{"Would expire" if self.dry_run else "Expired"} {count} abandoned upload session(s)')
+
+    def collect_media(self, batch):
+        names = [name for name, _ in batch]
+        referenced = set(Agreement.objects.filter(attachment__in=names).values_list('attachment', flat=True))
+        referenced.update(AttachmentBlob.objects.filter(name__in=names).values_list('name', flat=True))
+        self.delete([(name, size) for name, size in batch if name not in referenced])
+
+    def collect_temp(self, batch):
+        # Chunks and assembled files of live upload sessions are still needed
+        session_ids = {
+            name.split('/')[2] for name, _ in batch
+            if name.startswith(f'{UPLOADS_DIR}/') and name.count('/') >= 3
+        }
+        live = set()
+        if session_ids:
+            valid_ids = [session_id for session_id in session_ids if _is_uuid(session_id)]
+            live = {
+                str(pk) for pk in UploadSession.objects.filter(
+                    pk__in=valid_ids, updated_at__gte=self.session_cutoff
+                ).values_list('pk', flat=True)
+            }
+        self.delete([
+            (name, size) for name, size in batch
+            if not (name.startswith(f'{UPLOADS_DIR}/') and name.split('/')[2] in live)
+        ])
+
+    def delete(self, files):
+        for name, size in files:
+            if self.dry_run:
+                self.stdout.write(f'  {name}')
+            else:
+                try:
+                    self.storage.delete(name)
+                except OSError as e:
+                    # e.g. PermissionError on a file still open elsewhere; retry next run
+                    self.stderr.write(f'Could not delete {name}: {e}')
+                    continue
+            self.deleted += 1
+            self.freed += size
+
+    def remove_empty_directories(self, top):
+        try:
+            root = self.storage.path(top)
+        except NotImplementedError:
+            # Object stores have no directories to clean up
+            return
+        for current, _, _ in os.walk(root, topdown=False):
+            if current != root:
+                try:
+                    # Fails, harmlessly, unless the directory is empty
+                    os.rmdir(current)
+                except OSError:
+                    pass
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,42 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from agreements import blobs
+from agreements.models import Agreement
+
+
+class Command(BaseCommand):
+    help = 'Move attachments stored before the blob store into it, sharing identical files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        legacy = Agreement.objects.exclude(attachment='').exclude(attachment__isnull=True).exclude(
+            attachment__startswith=f'{blobs.BLOB_DIR}/'
+        ).only('id', 'attachment')
+
+        moved = missing = 0
+        for agreement in legacy.iterator(chunk_size=options['batch_size']):
+            name = agreement.attachment.name
+            if not default_storage.exists(name):
+                missing += 1
+                continue
+            with transaction.atomic():
+                with default_storage.open(name, 'rb') as f:
+                    blob = blobs.store(f, name)
+                # update() leaves updated_at and the save() hooks alone
+                updated = Agreement.objects.filter(pk=agreement.pk, attachment=name).update(
+                    attachment=blob.name, attachment_sha256=blob.sha256, attachment_size=blob.size
+                )
+                if not updated:
+                    # Attachment changed while we were copying it
+                    blobs.release(blob.sha256)
+                    continue
+                transaction.on_commit(lambda name=name: default_storage.delete(name))
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} attachment(s) into the blob store'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} attachment file(s) missing from storage'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from agreements import notifications
+
+
+class Command(BaseCommand):
+    help = "Recount every user's unread in-app notifications into NotificationCounter"
+
+    def handle(self, *args, **options):
+        counts = notifications.rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(counts.values())} unread notification(s) across {len(counts)} user(s)'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from agreements import reminders
+from agreements.models import Agreement
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate every agreement's reminder schedule, e.g. after changing REMINDER_BEFORE_DAYS "
+        'or after dates were changed with queryset.update()'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Agreements rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        agreements = Agreement.objects.only('id', 'expiry_date', 'reminder_time').order_by('pk')
+        rebuilt = 0
+        for batch in reminders.batched(agreements.iterator(chunk_size=options['batch_size']), options['batch_size']):
+            reminders.rebuild_schedule(batch)
+            rebuilt += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the reminder schedule of {rebuilt} agreement(s)'))
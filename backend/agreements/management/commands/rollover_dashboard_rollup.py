@@ -0,0 +1,20 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from agreements import rollup
+
+
+class Command(BaseCommand):
+    help = 'Shift dashboard rollup expiry buckets to a new date. Schedule daily, shortly after midnight.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Roll forward to this date (YYYY-MM-DD), default today')
+
+    def handle(self, *args, **options):
+        try:
+            to_date = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError(f"Invalid date: {options['date']}")
+        rollup.rollover(to_date)
+        self.stdout.write(self.style.SUCCESS(f'Dashboard rollup rolled over to {to_date}'))
@@ -0,0 +1,70 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from agreements import jobs
+
+logger = logging.getLogger(__name__)
+
+# Requeue stale jobs and purge old finished ones this often (seconds)
+MAINTENANCE_INTERVAL = 300
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (notification emails). Several workers may run at once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per query')
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'JOB_QUEUE_POLL_INTERVAL', 2),
+            help='Seconds to wait when no job is due'
+        )
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = jobs.worker_name()
+        succeeded = failed = 0
+        next_maintenance = 0
+        self.stdout.write(f'Job worker {worker} started')
+
+        with jobs.Heartbeat(worker):
+            while not self.stopping:
+                try:
+                    close_old_connections()
+                    if time.monotonic() >= next_maintenance:
+                        reclaimed = jobs.reclaim_stale()
+                        if reclaimed:
+                            self.stdout.write(self.style.WARNING(f'Requeued {reclaimed} stale job(s)'))
+                        jobs.purge()
+                        next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+
+                    claimed = jobs.claim(worker, options['batch_size'])
+                    for job in claimed:
+                        if jobs.run(job):
+                            succeeded += 1
+                        else:
+                            failed += 1
+                except Exception:
+                    # Nothing restarts the worker, so a lost database connection
+                    # must not end it; unfinished jobs are reclaimed later
+                    logger.exception("Job worker iteration failed")
+                    close_old_connections()
+                    claimed = []
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Job worker {worker} stopped: {succeeded} succeeded, {failed} failed'))
+
+    def stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
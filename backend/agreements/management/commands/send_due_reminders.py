@@ -0,0 +1,64 @@
+import logging
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from agreements import reminders
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Send the agreement reminders due today (before expiry, on expiry and monthly after). '
+        'Safe to rerun: each reminder is sent once. Schedule daily, or run with --loop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Send what is due on this date (YYYY-MM-DD), default today')
+        parser.add_argument('--batch-size', type=int, default=500, help='Agreements fetched per query')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent senders')
+        parser.add_argument('--catch-up-days', type=int, help='Also send reminders missed in this many past days')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what is due')
+        parser.add_argument('--loop', action='store_true', help='Keep running, dispatching every --interval seconds')
+        parser.add_argument('--interval', type=int, default=3600, help='Seconds between runs with --loop')
+
+    def handle(self, *args, **options):
+        try:
+            on_date = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f"Invalid date: {options['date']}")
+
+        while True:
+            close_old_connections()
+            try:
+                self.dispatch(on_date, options)
+            except Exception:
+                if not options['loop']:
+                    raise
+                # Keep the loop alive; claims left unsent are released by a later run
+                logger.exception("Reminder dispatch failed")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def dispatch(self, on_date, options):
+        started = time.perf_counter()
+        counts = reminders.dispatch(
+            on_date=on_date,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            catch_up_days=options['catch_up_days'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+        verb = 'would send' if options['dry_run'] else 'sent'
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['due']} reminder(s) due for {counts['agreements']} agreement(s): "
+            f"{verb} {counts['due'] - counts['skipped'] if options['dry_run'] else counts['sent']}, "
+            f"{counts['skipped']} already sent, {counts['failed']} failed"
+            + ('' if options['dry_run'] else f" in {counts['emails']} email(s)")
+            + f" ({elapsed:.1f}s)"
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_vendor_options'),
+        ('agreements', '0011_agreement_remarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['department', '-created_at', 'id'], name='agreement_dept_created_idx'),
+        ),
+    ]
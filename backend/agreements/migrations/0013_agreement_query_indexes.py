@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_vendor_options'),
+        ('agreements', '0012_agreement_dept_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['status', 'expiry_date'], name='agreement_status_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['expiry_date'], name='agreement_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['reminder_time'], name='agreement_reminder_idx'),
+        ),
+    ]
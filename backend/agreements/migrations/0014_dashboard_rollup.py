@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0013_agreement_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department_pk', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('ongoing', 'Ongoing'), ('expired', 'Expired'), ('draft', 'Draft'), ('terminated', 'Terminated')], max_length=15)),
+                ('bucket', models.CharField(choices=[('past', 'Expired before as-of date'), ('today', 'Expires on as-of date'), ('1m', 'Expires within 1 month'), ('3m', 'Expires in 1-3 months'), ('6m', 'Expires in 3-6 months'), ('later', 'Expires after 6 months')], max_length=5)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Rollup',
+                'verbose_name_plural': 'Dashboard Rollups',
+                'constraints': [models.UniqueConstraint(fields=('department_pk', 'status', 'bucket'), name='unique_dashboard_rollup')],
+            },
+        ),
+    ]
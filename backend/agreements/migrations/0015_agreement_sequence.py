@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+import re
+
+AGREEMENT_ID_RE = re.compile(r'^A_(\d{4})_(\d+)$')
+
+
+def backfill_sequences(apps, schema_editor):
+    Agreement = apps.get_model('agreements', 'Agreement')
+    AgreementSequence = apps.get_model('agreements', 'AgreementSequence')
+
+    # Split existing IDs into year/number; random-suffix IDs stay unnumbered
+    batch = []
+    for agreement in Agreement.objects.only('id', 'agreement_id').iterator(chunk_size=2000):
+        match = AGREEMENT_ID_RE.match(agreement.agreement_id or '')
+        if match:
+            agreement.sequence_year = int(match.group(1))
+            agreement.sequence_number = int(match.group(2))
+            batch.append(agreement)
+        if len(batch) >= 2000:
+            Agreement.objects.bulk_update(batch, ['sequence_year', 'sequence_number'])
+            batch = []
+    if batch:
+        Agreement.objects.bulk_update(batch, ['sequence_year', 'sequence_number'])
+
+    rows = Agreement.objects.filter(sequence_year__isnull=False).order_by().values(
+        'sequence_year'
+    ).annotate(last=Max('sequence_number'))
+    AgreementSequence.objects.bulk_create([
+        AgreementSequence(year=row['sequence_year'], last_number=row['last']) for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_vendor_options'),
+        ('agreements', '0014_dashboard_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgreementSequence',
+            fields=[
+                ('year', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Agreement Sequence',
+                'verbose_name_plural': 'Agreement Sequences',
+            },
+        ),
+        migrations.AddField(
+            model_name='agreement',
+            name='sequence_number',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='agreement',
+            name='sequence_year',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='agreement',
+            constraint=models.UniqueConstraint(fields=('sequence_year', 'sequence_number'), name='unique_agreement_sequence'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0015_agreement_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agreement',
+            name='attachment_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='agreement',
+            name='attachment_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:11
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+
+# The stages as of this migration, frozen here so the migration gives the
+# same rows whatever agreements.reminders and the REMINDER_* settings say
+# later; rebuild_reminder_schedule applies changed stages.
+BEFORE_DAYS = (180, 90, 30, 7)
+AFTER_MONTHS = 3
+
+
+def build_schedule(expiry_date, reminder_time):
+    if not expiry_date:
+        return []
+    rows = []
+    if reminder_time and reminder_time < expiry_date:
+        rows.append(('before', 'before', 0, reminder_time))
+    for days in BEFORE_DAYS:
+        due_date = expiry_date - timedelta(days=days)
+        if due_date != reminder_time:
+            rows.append((f'before-{days}', 'before', 0, due_date))
+    rows.append(('on', 'on', 0, expiry_date))
+    for months in range(1, AFTER_MONTHS + 1):
+        rows.append((f'after-{months}', 'after', months, expiry_date + relativedelta(months=months)))
+    return rows
+
+
+def build_schedules(apps, schema_editor):
+    Agreement = apps.get_model('agreements', 'Agreement')
+    ReminderSchedule = apps.get_model('agreements', 'ReminderSchedule')
+
+    batch = []
+    for agreement in Agreement.objects.only('id', 'expiry_date', 'reminder_time').iterator(chunk_size=2000):
+        for stage, reminder_type, months, due_date in build_schedule(agreement.expiry_date, agreement.reminder_time):
+            batch.append(ReminderSchedule(
+                agreement_id=agreement.pk, stage=stage, reminder_type=reminder_type,
+                months_since_expiration=months, due_date=due_date,
+            ))
+        if len(batch) >= 5000:
+            ReminderSchedule.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ReminderSchedule.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0020_reminder_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('reminder_type', models.CharField(max_length=10)),
+                ('months_since_expiration', models.PositiveSmallIntegerField(default=0)),
+                ('due_date', models.DateField()),
+                ('agreement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_schedule', to='agreements.agreement')),
+            ],
+            options={
+                'verbose_name': 'Reminder Schedule',
+                'verbose_name_plural': 'Reminder Schedule',
+                'indexes': [models.Index(fields=['due_date'], name='reminder_schedule_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agreement', 'stage'), name='unique_reminder_stage')],
+            },
+        ),
+        migrations.RunPython(build_schedules, migrations.RunPython.noop),
+    ]
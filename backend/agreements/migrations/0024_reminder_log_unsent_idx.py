@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agreements', '0023_rate_limit_bucket'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminderlog',
+            index=models.Index(fields=['sent_at', 'created_at'], name='reminder_log_unsent_idx'),
+        ),
+    ]
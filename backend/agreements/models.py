@@ -3,6 +3,7 @@ from django.conf import settings
 from datetime import datetime, timedelta
 from accounts.models import Department, Vendor
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 import os
 import uuid
 from django.db import transaction, IntegrityError
@@ -18,6 +19,19 @@ def agreement_file_path(instance, filename):
     filename = f"{uuid.uuid4()}{ext}"
     return os.path.join('agreements', str(instance.agreement_type.id), filename)
 
+def release_attachment(name, sha256=None):
+    """
+    Drop one agreement's reference to an attachment. Blob-store files are
+    only deleted with their last reference; files from before the blob store
+    belong to a single agreement and are deleted outright.
+    """
+    from . import blobs
+
+    if sha256 and blobs.release(sha256):
+        return
+    if name and not blobs.is_blob_name(name):
+        transaction.on_commit(lambda: default_storage.delete(name))
+
 class AgreementType(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -40,6 +54,92 @@ class AgreementType(models.Model):
         verbose_name_plural = 'Agreement Types'
 
 
+def format_agreement_id(year, number):
+    """A_YYYY_NNNN; numbers past 9999 simply get longer, sort on sequence_* instead"""
+    return f"A_{year}_{number:04d}"
+
+
+class AgreementSequence(models.Model):
+    """
+    Last agreement number handed out per year. Allocation locks this one row
+    instead of scanning the agreement table for the current maximum.
+    """
+    year = models.PositiveSmallIntegerField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    class Meta:
+        verbose_name = 'Agreement Sequence'
+        verbose_name_plural = 'Agreement Sequences'
+
+    @classmethod
+    def next_number(cls, year):
+        """
+        Increment and return the year's counter. Must run inside the
+        transaction that inserts the agreement: the row stays locked until it
+        commits, and a rollback returns the number, so IDs stay gap-free.
+        """
+        if not transaction.get_connection().in_atomic_block:
+            raise RuntimeError('AgreementSequence.next_number() must be called inside a transaction')
+
+        if not cls.objects.filter(year=year).exists():
+            # First agreement of the year: create the row before locking it.
+            # A locking read of a missing row takes gap locks on MySQL, and
+            # concurrent first allocations would then deadlock on the insert.
+            last_number = Agreement.objects.filter(sequence_year=year).aggregate(
+                last=models.Max('sequence_number')
+            )['last'] or 0
+            try:
+                with transaction.atomic():
+                    # Start after any IDs already issued
+                    cls.objects.create(year=year, last_number=last_number)
+            except IntegrityError:
+                # Another request created the row first
+                pass
+
+        sequence = cls.objects.select_for_update().get(year=year)
+        sequence.last_number += 1
+        sequence.save(update_fields=['last_number'])
+        return sequence.last_number
+
+
+class AgreementQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Agreements the user may view, as a single SQL predicate: everything for
+        executives, otherwise ``department_id IN`` the viewable departments of
+        the user's cached AccessScope (own department plus DepartmentPermission
+        grants). Using the scope keeps lists in step with can_view_department(),
+        and an IN list is read straight off agreement_dept_created_idx. Users
+        with no department and no grants see nothing.
+        """
+        from accounts.access import get_access_scope
+
+        scope = get_access_scope(user)
+        if scope.is_executive:
+            return self
+        return self.filter(department_id__in=sorted(scope.viewable_department_ids))
+
+    def for_list(self):
+        """Eager-load the relations AgreementSerializer reads for every row"""
+        return self.select_related(
+            'department', 'agreement_type', 'party_name', 'creator'
+        ).prefetch_related(
+            models.Prefetch(
+                'assigned_users',
+                queryset=get_user_model().objects.only('id', 'full_name')
+            )
+        )
+
+    def for_detail(self):
+        """Eager-load relations for a single agreement, including full assigned users"""
+        return self.select_related(
+            'department', 'agreement_type', 'party_name', 'creator'
+        ).prefetch_related('assigned_users')
+
+
 class Agreement(models.Model):
     AGREEMENT_STATUS = (
         ('ongoing', 'Ongoing'),
@@ -89,6 +189,9 @@ class Agreement(models.Model):
         null=True
     )
     original_filename = models.CharField(max_length=255, blank=True, null=True)  # <-- Add this
+    # Computed while the upload is streamed to storage
+    attachment_sha256 = models.CharField(max_length=64, blank=True, null=True, editable=False)
+    attachment_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -111,6 +214,9 @@ class Agreement(models.Model):
         editable=False, 
         blank=True
     )
+    # Numeric parts of agreement_id, so IDs keep sorting correctly past 9999
+    sequence_year = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    sequence_number = models.PositiveIntegerField(null=True, blank=True, editable=False)
     agreement_reference = models.CharField(
         max_length=100, 
         blank=True, 
@@ -118,6 +224,8 @@ class Agreement(models.Model):
         #unique=True  # Remove if you need to allow duplicates
     )
 
+    objects = AgreementQuerySet.as_manager()
+
     def clean(self):
         super().clean()
         
@@ -144,45 +252,15 @@ class Agreement(models.Model):
     def save(self, *args, **kwargs):
     # Department must be set explicitly; do not assign agreement_type to department
             
-        # Auto-generate agreement_id if new record
-        if not self.pk and not self.agreement_id:
-            with transaction.atomic():
-                year = datetime.now().year
-                try:
-                    # Get the maximum existing ID number for this year
-                    max_id = Agreement.objects.filter(
-                        agreement_id__startswith=f"A_{year}_",
-                        agreement_id__regex=r'^A_\d{4}_\d{4}$'  # Ensure proper format
-                    ).order_by('-agreement_id').first()
-                    
-                    if max_id:
-                        last_num = int(max_id.agreement_id.split('_')[-1])
-                        count = last_num + 1
-                    else:
-                        count = 1
-                        
-                    self.agreement_id = f"A_{year}_{count:04d}"
-                    
-                    # Verify this ID doesn't already exist (final safety check)
-                    if Agreement.objects.filter(agreement_id=self.agreement_id).exists():
-                        raise IntegrityError(f"Duplicate ID generated: {self.agreement_id}")
-                        
-                except (ValueError, IndexError) as e:
-                    logger.error(f"Error parsing agreement ID: {e}")
-                    # Fallback to UUID if ID parsing fails
-                    self.agreement_id = f"A_{year}_{uuid.uuid4().hex[:4]}"
-            
         # Set default reminder if not set
         if not self.reminder_time and self.expiry_date:
             self.reminder_time = self.expiry_date - timedelta(days=180)
             
         # If a new file is uploaded, set the original filename
-        if self.attachment and hasattr(self.attachment, 'file'):
-            # Only set if the file is new or changed
-            if not self.pk or not Agreement.objects.filter(pk=self.pk, attachment=self.attachment.name).exists():
-                # Use the uploaded file's original name
-                self.original_filename = self.attachment.file.name
-        
+        if self.attachment and not self.attachment._committed:
+            # Use the uploaded file's original name
+            self.original_filename = self.attachment.file.name
+
         # Auto-manage status based on expiry date
         if self.expiry_date:
             today = timezone.now().date()
@@ -191,14 +269,123 @@ class Agreement(models.Model):
             elif self.status == 'expired' and self.expiry_date >= today:
                 # If status was expired but date is now in future, set back to ongoing
                 self.status = 'ongoing'
-        
-        super().save(*args, **kwargs)
 
-    def delete(self, *args, **kwargs):
-        """Delete associated files when agreement is deleted"""
-        if self.attachment:
-            self.attachment.delete(save=False)
-        super().delete(*args, **kwargs)
+        # One transaction for the blob reference, the agreement_id sequence
+        # row (locked until the insert commits) and the row itself
+        with transaction.atomic():
+            # Store a new upload in the blob store, hashing it on the way
+            stored = False
+            if self.attachment and not self.attachment._committed:
+                self.store_attachment()
+                stored = True
+            elif not self.attachment:
+                self.attachment_sha256 = None
+                self.attachment_size = None
+
+            # Auto-generate agreement_id if new record
+            if not self.pk and not self.agreement_id:
+                self.assign_agreement_id()
+
+            # UPDATE only the columns that changed since the row was loaded
+            if not args and not self._state.adding and not kwargs.get('force_insert') \
+                    and kwargs.get('update_fields') is None:
+                dirty = self.get_dirty_fields()
+                if dirty is not None:
+                    # updated_at is auto_now, so it is only set when listed
+                    kwargs['update_fields'] = [name for name in dirty if name != 'id'] + ['updated_at']
+
+            super().save(*args, **kwargs)
+
+            # Drop the reference to a replaced or removed attachment. An upload
+            # took a new reference even when its content (and so its name)
+            # is the same as before, so the loaded one always goes then.
+            old_name = self.get_loaded_value('attachment')
+            if old_name and (stored or old_name != (self.attachment.name or None)):
+                release_attachment(old_name, self.get_loaded_value('attachment_sha256'))
+
+            update_fields = kwargs.get('update_fields')
+            self._snapshot(None if update_fields is None else update_fields)
+
+    def store_attachment(self):
+        """Put the uncommitted attachment in the blob store and point at the shared copy"""
+        from . import blobs
+
+        blob = blobs.store(self.attachment.file, self.attachment.name)
+        self.attachment = blob.name
+        self.attachment_sha256 = blob.sha256
+        self.attachment_size = blob.size
+
+    def assign_agreement_id(self, year=None):
+        """Take the next number from the per-year sequence (call inside a transaction)"""
+        year = year or datetime.now().year
+        self.sequence_year = year
+        self.sequence_number = AgreementSequence.next_number(year)
+        self.agreement_id = format_agreement_id(year, self.sequence_number)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values: save() writes only what changed, signals
+        # move the row's dashboard count and the old attachment is released
+        instance._snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Also runs when a deferred field is first read
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
+
+    def _tracked_value(self, field):
+        if isinstance(field, models.FileField):
+            file = getattr(self, field.attname)
+            # A new, not yet stored upload never matches the loaded name
+            return (file.name or None) if file._committed else file
+        return self.__dict__[field.attname]
+
+    def _snapshot(self, fields=None):
+        """Remember the current values of loaded fields (all, or just ``fields``) as stored"""
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        names = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (names is None or field.attname in names):
+                self._loaded_values[field.attname] = self._tracked_value(field)
+
+    def get_loaded_value(self, attname, default=None):
+        """Stored value of a field as loaded or last saved"""
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def get_dirty_fields(self):
+        """
+        Attnames of fields changed since the row was loaded or saved, or None
+        if the instance was not loaded from the database (everything is dirty).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (field.attname not in loaded or self._tracked_value(field) != loaded[field.attname])
+        ]
+
+    def has_changed(self, *attnames):
+        dirty = self.get_dirty_fields()
+        return dirty is None or any(name in dirty for name in attnames)
+
+    def get_loaded_rollup_key(self):
+        """The stored (department_id, status, expiry_date), or None if not loaded"""
+        loaded = getattr(self, '_loaded_values', {})
+        if not all(name in loaded for name in ('department_id', 'status', 'expiry_date')):
+            return None
+        return (loaded['department_id'], loaded['status'], loaded['expiry_date'])
+
+    def get_rollup_key(self):
+        """(department_id, status, expiry_date) as counted by DashboardRollup, or None if deferred"""
+        values = self.__dict__
+        if not all(name in values for name in ('department_id', 'status', 'expiry_date')):
+            return None
+        return (values['department_id'], values['status'], values['expiry_date'])
 
     def __str__(self):
         return f"{self.agreement_id} - {self.title}"
@@ -207,6 +394,19 @@ class Agreement(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Agreement'
         verbose_name_plural = 'Agreements'
+        indexes = [
+            # Per-department listing in keyset order, backs visible_to()
+            models.Index(fields=['department', '-created_at', 'id'], name='agreement_dept_created_idx'),
+            # Dashboard status buckets: status equality plus expiry range
+            models.Index(fields=['status', 'expiry_date'], name='agreement_status_expiry_idx'),
+            # Expiry windows that ignore status
+            models.Index(fields=['expiry_date'], name='agreement_expiry_idx'),
+            # Reminder scans for agreements due on/before a date
+            models.Index(fields=['reminder_time'], name='agreement_reminder_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['sequence_year', 'sequence_number'], name='unique_agreement_sequence'),
+        ]
 
     def send_notification(self, user, reminder_type='before'):
         """Send reminder email for this agreement"""
@@ -220,10 +420,20 @@ class Agreement(models.Model):
                 return False
         return send_agreement_reminder(self, user, reminder_type)
 
+    def queue_notification(self, user, reminder_type='before'):
+        """
+        Add the change to the in-app feed of everyone involved and send the
+        email from a job worker once the current transaction commits
+        """
+        from . import jobs, notifications
+        user_id = user if isinstance(user, (str, int)) else user.pk
+        notifications.notify(self, reminder_type, actor=user)
+        jobs.enqueue('agreements.send_notification', agreement_id=self.pk, user_id=user_id, reminder_type=reminder_type)
+
     def send_reminder(self, recipient):
         """Send reminder email for this agreement"""
-        from django.core.mail import send_mail
-        from django.conf import settings
+        from django.core.mail import EmailMessage
+        from .utils.mailer import get_mailer
         
         subject = f"Reminder: {self.title} (Expires: {self.expiry_date})"
         message = f"""
@@ -233,13 +443,7 @@ class Agreement(models.Model):
         Expiry Date: {self.expiry_date}
         """
         
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient.email],
-            fail_silently=False,
-        )
+        get_mailer().send(EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient.email]))
         return True
 
     def get_users_to_notify(self):
@@ -252,6 +456,272 @@ class Agreement(models.Model):
             users.append(self.creator)
         return users
 
+class DashboardRollup(models.Model):
+    """
+    Agreement counts per department, status and expiry bucket, kept up to date
+    by signals so the dashboard never has to scan the agreement table.
+    Buckets are relative to DashboardRollupState.as_of; see agreements/rollup.py.
+    """
+    BUCKETS = (
+        ('past', 'Expired before as-of date'),
+        ('today', 'Expires on as-of date'),
+        ('1m', 'Expires within 1 month'),
+        ('3m', 'Expires in 1-3 months'),
+        ('6m', 'Expires in 3-6 months'),
+        ('later', 'Expires after 6 months'),
+    )
+
+    # Plain integer rather than a FK so agreements without a department (0)
+    # share one row and the unique constraint holds on every database
+    department_pk = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=15, choices=Agreement.AGREEMENT_STATUS)
+    bucket = models.CharField(max_length=5, choices=BUCKETS)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department_pk', 'status', 'bucket'], name='unique_dashboard_rollup'),
+        ]
+        verbose_name = 'Dashboard Rollup'
+        verbose_name_plural = 'Dashboard Rollups'
+
+    def __str__(self):
+        return f"{self.department_pk}/{self.status}/{self.bucket}: {self.count}"
+
+
+class DashboardRollupState(models.Model):
+    """Single row recording the date the rollup buckets are relative to"""
+    as_of = models.DateField()
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Dashboard rollup as of {self.as_of}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    One stored attachment file, named by its SHA-256 and shared by every
+    agreement whose attachment has the same content. ref_count is the number
+    of agreements using it; see agreements/blobs.py.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=255)
+    ref_count = models.PositiveIntegerField(default=0)
+    # Uploads that matched this blob and were not written again
+    dedup_hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+    class Meta:
+        verbose_name = 'Attachment Blob'
+        verbose_name_plural = 'Attachment Blobs'
+
+
+class UploadSession(models.Model):
+    """
+    A resumable attachment upload. Chunks are stored as separate files under
+    temp/uploads/<id>/ and assembled into one temp file on finalize; the
+    resulting path is then submitted as ``attachment_path``. See agreements/uploads.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Chunks 0 .. received_chunks - 1 are all on disk
+    received_chunks = models.PositiveIntegerField(default=0)
+    file_path = models.CharField(max_length=255, blank=True, null=True)
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_offset}/{self.size})"
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    @property
+    def received_offset(self):
+        return min(self.received_chunks * self.chunk_size, self.size)
+
+    def expected_chunk_size(self, index):
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    class Meta:
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+
+
+class Job(models.Model):
+    """
+    A unit of background work (e.g. a notification email) run by
+    ``manage.py run_jobs``. See agreements/jobs.py.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (DEAD, 'Dead'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # Not claimed before this time; pushed back after each failed attempt
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        indexes = [
+            # Claiming due jobs and reclaiming stale ones
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+
+class ReminderSchedule(models.Model):
+    """
+    Every reminder an agreement will get and its due date, so dispatch finds
+    what is due with one range read. Rebuilt when the agreement's
+    expiry_date or reminder_time changes; see agreements/reminders.py.
+    """
+    agreement = models.ForeignKey(Agreement, on_delete=models.CASCADE, related_name='reminder_schedule')
+    # e.g. "before-90", "before" (the agreement's own reminder_time), "on", "after-2"
+    stage = models.CharField(max_length=20)
+    reminder_type = models.CharField(max_length=10)
+    months_since_expiration = models.PositiveSmallIntegerField(default=0)
+    due_date = models.DateField()
+
+    def __str__(self):
+        return f"{self.agreement_id} {self.stage} on {self.due_date}"
+
+    class Meta:
+        verbose_name = 'Reminder Schedule'
+        verbose_name_plural = 'Reminder Schedule'
+        indexes = [
+            models.Index(fields=['due_date'], name='reminder_schedule_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['agreement', 'stage'], name='unique_reminder_stage'),
+        ]
+
+
+class ReminderLog(models.Model):
+    """
+    One reminder email for one agreement, recipient and stage, claimed by a
+    dispatch run before it is sent; the unique key makes every send happen
+    at most once. sent_at stays empty if the run died before confirming the
+    send; the next run after REMINDER_CLAIM_LEASE gives such claims back.
+    See agreements/reminders.py.
+    """
+    agreement = models.ForeignKey(Agreement, on_delete=models.CASCADE, related_name='reminder_logs')
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reminder_logs')
+    # Stage and due date, e.g. "before:2026-04-21" or "after-2:2026-12-31"
+    stage = models.CharField(max_length=32)
+    run_id = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.agreement_id} -> {self.recipient_id} ({self.stage})"
+
+    class Meta:
+        verbose_name = 'Reminder Log'
+        verbose_name_plural = 'Reminder Logs'
+        constraints = [
+            models.UniqueConstraint(fields=['agreement', 'recipient', 'stage'], name='unique_reminder_per_stage'),
+        ]
+        indexes = [
+            # Claims never confirmed as sent (see reminders.release_stale_claims)
+            models.Index(fields=['sent_at', 'created_at'], name='reminder_log_unsent_idx'),
+        ]
+
+
+class Notification(models.Model):
+    """
+    One entry in a user's in-app notification feed. Rows are written for
+    every recipient when the event happens (see agreements/notifications.py),
+    so reading the feed never joins or fans out.
+    """
+    ACTIONS = (
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+    )
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='+'
+    )
+    # Kept when the agreement is deleted; the message still says what happened
+    agreement = models.ForeignKey(
+        Agreement, on_delete=models.SET_NULL, blank=True, null=True, related_name='notifications'
+    )
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.message}"
+
+    class Meta:
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notifications'
+        indexes = [
+            # The feed, newest first, paged by id
+            models.Index(fields=['recipient', '-id'], name='notification_feed_idx'),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized count of a user's unread notifications, so the header badge
+    is one primary-key lookup. Only changed with F() updates by
+    agreements/notifications.py, in the transaction that changes the rows.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Token bucket state shared by every process that takes from it, e.g. all
+    senders of outgoing mail (agreements/utils/mailer.py). ``tokens`` may go
+    negative: each one below zero is a sender already waiting its turn.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.1f} tokens"
+
+
 def send_notification(self, action):
     """Send notification about agreement action to all assigned users"""
     from agreements.utils.email_utils import send_agreement_notification
@@ -263,9 +733,10 @@ def send_notification(self, action):
 # Add this method to your existing Agreement model
 def send_reminder_email(self):
     """Send reminder to all assigned users (or creator if no users assigned)"""
-    from django.core.mail import send_mail
+    from django.core.mail import EmailMessage
     from django.conf import settings
     from django.utils import timezone
+    from agreements.utils.mailer import get_mailer
     
     # Get recipients
     recipients = list(self.assigned_users.values_list('email', flat=True))
@@ -292,13 +763,7 @@ def send_reminder_email(self):
     
     # Send email
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipients,
-            fail_silently=False,
-        )
+        get_mailer().send(EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, recipients))
         return True
     except Exception as e:
         logger.error(f"Failed to send reminder for agreement {self.id}: {str(e)}")
@@ -0,0 +1,134 @@
+"""
+In-app notification feed.
+
+Notifications are fanned out on write: when an agreement is created or
+updated, notify() inserts one Notification row per recipient with a single
+bulk_create and bumps each recipient's NotificationCounter in the same
+transaction. Reading the feed is then a range scan over one user's rows, and
+the header badge reads NotificationCounter by primary key instead of counting
+unread rows.
+
+Every change to the counter is an F() update made in the transaction that
+inserts or marks rows read, and a row only goes from unread to read once, so
+the counter always equals the number of unread rows.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+
+def recipient_ids(agreement, actor_id=None):
+    """Assigned users and the creator, without the user who made the change"""
+    ids = set(agreement.assigned_users.values_list('id', flat=True))
+    if agreement.creator_id:
+        ids.add(agreement.creator_id)
+    ids.discard(actor_id)
+    return sorted(ids)
+
+
+def notification_message(agreement, action, actor=None):
+    name = (actor.full_name or actor.email) if actor is not None else 'Someone'
+    return f'{name} {action} agreement "{agreement.title}"'[:255]
+
+
+def lock_counters(user_ids):
+    """
+    Create the users' missing counters and lock all of them until the end of
+    the current transaction, in primary key order so concurrent fan-outs to
+    overlapping users queue up instead of deadlocking.
+    """
+    ids = sorted(user_ids)
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in ids], ignore_conflicts=True
+    )
+    list(NotificationCounter.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk'))
+
+
+def notify(agreement, action, actor=None):
+    """
+    Add a notification about ``agreement`` to the feed of everyone involved
+    in it. ``actor`` is the user (or user id) who made the change; they are
+    not notified about their own change. Returns the number of rows written.
+    """
+    if isinstance(actor, (str, int)):
+        actor = get_user_model().objects.filter(pk=actor).only('id', 'full_name', 'email').first()
+    actor_id = actor.pk if actor is not None else None
+
+    ids = recipient_ids(agreement, actor_id)
+    if not ids:
+        return 0
+    message = notification_message(agreement, action, actor)
+
+    with transaction.atomic():
+        lock_counters(ids)
+        Notification.objects.bulk_create([
+            Notification(recipient_id=user_id, actor_id=actor_id, agreement=agreement, action=action, message=message)
+            for user_id in ids
+        ])
+        NotificationCounter.objects.filter(pk__in=ids).update(unread=F('unread') + 1)
+    return len(ids)
+
+
+def unread_count(user):
+    counter = NotificationCounter.objects.filter(pk=user.pk).values_list('unread', flat=True).first()
+    return counter or 0
+
+
+def mark_read(user, notification_ids):
+    """Mark some of ``user``'s notifications read; returns how many were unread"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            recipient=user, pk__in=notification_ids, read_at__isnull=True
+        ).update(read_at=timezone.now())
+        if updated:
+            NotificationCounter.objects.filter(pk=user.pk).update(unread=F('unread') - updated)
+    return updated
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        updated = Notification.objects.filter(recipient=user, read_at__isnull=True).update(read_at=timezone.now())
+        if updated:
+            NotificationCounter.objects.filter(pk=user.pk).update(unread=F('unread') - updated)
+    return updated
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recount unread notifications after rows were changed or deleted by hand:
+    those of ``user_ids``, with their counters locked like notify() does so
+    a concurrent fan-out or mark-read is not lost, or else every user's.
+    Returns {user id: unread}.
+    """
+    if user_ids is not None:
+        return _rebuild_user_counters(user_ids)
+    User = get_user_model()
+    with transaction.atomic():
+        counts = dict(
+            User.objects.annotate(
+                unread_notifications=Count('notifications', filter=Q(notifications__read_at__isnull=True))
+            ).filter(unread_notifications__gt=0).values_list('pk', 'unread_notifications')
+        )
+        NotificationCounter.objects.exclude(pk__in=counts).update(unread=0)
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id, unread=unread) for user_id, unread in counts.items()],
+            update_conflicts=True, unique_fields=['user'], update_fields=['unread'],
+        )
+    return counts
+
+
+def _rebuild_user_counters(user_ids):
+    ids = sorted(user_ids)
+    with transaction.atomic():
+        lock_counters(ids)
+        counts = dict(
+            Notification.objects.filter(recipient_id__in=ids, read_at__isnull=True)
+            .values('recipient_id').annotate(unread=Count('pk')).values_list('recipient_id', 'unread')
+        )
+        NotificationCounter.objects.bulk_update(
+            [NotificationCounter(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in ids], ['unread']
+        )
+    return counts
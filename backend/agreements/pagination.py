@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class AgreementKeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination for agreement lists, ordered by (-created_at, id).
+
+    Each page is fetched with a `WHERE (created_at, id) < cursor` predicate
+    instead of an OFFSET, so the cost of a page does not depend on how deep
+    into the table the client has scrolled.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering = ('-created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'AGREEMENT_LIST_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'AGREEMENT_LIST_MAX_PAGE_SIZE', 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        self.count = queryset.count() if self.include_count(request) else None
+
+        if self.cursor is not None:
+            queryset = self.seek(queryset, self.cursor)
+
+        # Fetch one extra row to find out whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def seek(self, queryset, cursor):
+        """Rows after the cursor, in list order"""
+        created_at, pk = cursor
+        return queryset.filter(
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, id__gt=pk)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, 'true')
+        return value.lower() not in ('0', 'false', 'no', 'off')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            return datetime.fromisoformat(data['c']), int(data['i'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise self.invalid_cursor()
+
+    def invalid_cursor(self):
+        # A bad query parameter (400), not a missing page
+        return ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+    def encode_cursor(self, agreement):
+        # Rows are model instances, or dicts when paginating a values() queryset
+        if isinstance(agreement, dict):
+            created_at, pk = agreement['created_at'], agreement['id']
+        else:
+            created_at, pk = agreement.created_at, agreement.id
+        data = json.dumps({'c': created_at.isoformat(), 'i': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_next_link(self):
+        next_cursor = self.get_next_cursor()
+        if next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, next_cursor)
+
+    def get_paginated_data(self, data):
+        """Pagination metadata to merge into the list response"""
+        return {
+            'count': self.count,
+            'page_size': self.page_size,
+            'next_cursor': self.get_next_cursor(),
+            'next': self.get_next_link(),
+        }
+
+    def get_paginated_response(self, data):
+        return Response({'results': data, **self.get_paginated_data(data)})
+
+    def is_first_page(self):
+        return self.cursor is None
+
+
+class NotificationKeysetPagination(AgreementKeysetPagination):
+    """
+    Keyset pagination for a user's notification feed, newest first. Ids
+    increase with insertion, so the cursor is just the last id seen and each
+    page is a range read on the (recipient, -id) index. The total is only
+    counted when asked for with ``?count=true``.
+    """
+    ordering = ('-id',)
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'NOTIFICATION_PAGE_SIZE', 20)
+        self.max_page_size = getattr(settings, 'NOTIFICATION_MAX_PAGE_SIZE', 100)
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, 'false')
+        return value.lower() in ('1', 'true', 'yes', 'on')
+
+    def seek(self, queryset, cursor):
+        return queryset.filter(id__lt=cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return int(encoded)
+        except ValueError:
+            raise self.invalid_cursor()
+
+    def encode_cursor(self, notification):
+        return str(notification['id'] if isinstance(notification, dict) else notification.id)
@@ -0,0 +1,271 @@
+"""
+Scheduled reminder dispatch.
+
+Each agreement gets reminders REMINDER_BEFORE_DAYS days before expiry and on
+its own reminder_time ('before'), one on the expiry date ('on') and one every
+month for REMINDER_AFTER_MONTHS months after it ('after'). These are
+materialized in ReminderSchedule when an agreement's dates change, so
+dispatch() finds everything due with a single range read over
+ReminderSchedule.due_date, streams the rows in batches and sends over a
+thread pool (and the shared Mailer).
+
+Users who chose reminder_digest get one email listing all of their due
+reminders, sent after the scan, instead of one email per agreement. Their
+reminders are only claimed right before the digest goes out, a few users at
+a time, so a crash during the scan loses no digest.
+
+Every send is first claimed in ReminderLog under a unique (agreement,
+recipient, stage) key, so reruns, overlapping runs and crashes can never
+send a reminder twice. A send that fails gives its claim back for the next
+run to retry. A run that dies between claiming and sending leaves claims
+without sent_at; once they are older than REMINDER_CLAIM_LEASE the next run
+deletes them and sends those reminders again. A run also picks up anything
+due in the last REMINDER_CATCH_UP_DAYS days that was missed, e.g. while the
+server was down.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import ReminderLog, ReminderSchedule
+from .utils.email_utils import send_agreement_reminder, send_reminder_digest
+from .utils.rendering import NotificationRenderer
+
+logger = logging.getLogger(__name__)
+
+# No reminders for agreements that are not in force
+INACTIVE_STATUSES = ('draft', 'terminated')
+
+
+def build_schedule(expiry_date, reminder_time=None):
+    """(stage, reminder_type, months_since_expiration, due_date) for each reminder"""
+    if not expiry_date:
+        return []
+    rows = []
+    if reminder_time and reminder_time < expiry_date:
+        rows.append(('before', 'before', 0, reminder_time))
+    for days in getattr(settings, 'REMINDER_BEFORE_DAYS', (180, 90, 30, 7)):
+        due_date = expiry_date - timedelta(days=days)
+        # The default reminder_time is one of these; send it once
+        if due_date != reminder_time:
+            rows.append((f'before-{days}', 'before', 0, due_date))
+    rows.append(('on', 'on', 0, expiry_date))
+    for months in range(1, getattr(settings, 'REMINDER_AFTER_MONTHS', 3) + 1):
+        rows.append((f'after-{months}', 'after', months, expiry_date + relativedelta(months=months)))
+    return rows
+
+
+def schedule_rows(agreement):
+    return [
+        ReminderSchedule(
+            agreement_id=agreement.pk, stage=stage, reminder_type=reminder_type,
+            months_since_expiration=months, due_date=due_date,
+        )
+        for stage, reminder_type, months, due_date in build_schedule(agreement.expiry_date, agreement.reminder_time)
+    ]
+
+
+def rebuild_schedule(agreements):
+    """Replace the reminder schedule of ``agreements`` (needs expiry_date and reminder_time)"""
+    agreements = list(agreements)
+    with transaction.atomic():
+        ReminderSchedule.objects.filter(agreement_id__in=[agreement.pk for agreement in agreements]).delete()
+        ReminderSchedule.objects.bulk_create([row for agreement in agreements for row in schedule_rows(agreement)])
+
+
+def format_time_remaining(on_date, expiry_date):
+    delta = relativedelta(expiry_date, on_date)
+    parts = [
+        f'{value} {unit}{"s" if value != 1 else ""}'
+        for value, unit in ((delta.years, 'year'), (delta.months, 'month'), (delta.days, 'day'))
+        if value
+    ]
+    return ', '.join(parts) or '0 days'
+
+
+def reminder_kwargs(row, on_date):
+    if row.reminder_type == 'before':
+        return {'time_remaining': format_time_remaining(on_date, row.agreement.expiry_date)}
+    if row.reminder_type == 'after':
+        return {'months_since_expiration': row.months_since_expiration}
+    return {}
+
+
+def digest_item(row, on_date):
+    agreement = row.agreement
+    return {
+        'reminder_type': row.reminder_type,
+        'agreement_name': agreement.title,
+        'partner_name': agreement.party_name.name if agreement.party_name else '',
+        'expiration_date': agreement.expiry_date,
+        'agreement_id': agreement.agreement_id,
+        **reminder_kwargs(row, on_date),
+    }
+
+
+def stage_key(row):
+    # Includes the date, so a renewed agreement is reminded again
+    return f'{row.stage}:{row.due_date.isoformat()}'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def recipients(agreement):
+    return [user for user in agreement.get_users_to_notify() if user.is_active and user.email]
+
+
+def due_schedule(start, end):
+    """Schedule rows due in [start, end] for agreements still in force"""
+    users = get_user_model().objects.only('id', 'email', 'full_name', 'is_active', 'reminder_digest')
+    return ReminderSchedule.objects.filter(
+        due_date__range=(start, end)
+    ).exclude(
+        agreement__status__in=INACTIVE_STATUSES
+    ).exclude(
+        # A missed 'before' reminder is pointless once the agreement has expired
+        Q(reminder_type='before') & Q(agreement__expiry_date__lte=end)
+    ).select_related(
+        'agreement__party_name', 'agreement__creator'
+    ).prefetch_related(
+        Prefetch('agreement__assigned_users', queryset=users)
+    ).order_by('due_date', 'pk')
+
+
+def dispatch(on_date=None, batch_size=500, workers=4, catch_up_days=None, dry_run=False):
+    """Send every reminder due on ``on_date`` (default today). Returns counts."""
+    # Reminders are due by the local calendar, not the server's UTC one
+    on_date = on_date or timezone.localdate()
+    catch_up_days = catch_up_days if catch_up_days is not None else getattr(settings, 'REMINDER_CATCH_UP_DAYS', 7)
+    start = on_date - timedelta(days=catch_up_days)
+    run_id = uuid.uuid4()
+    counts = {'agreements': 0, 'due': 0, 'sent': 0, 'failed': 0, 'skipped': 0, 'emails': 0}
+    # Unclaimed (schedule row, user, key) due to users who get a digest, by user id
+    digest_due = defaultdict(list)
+    # Each agreement and stage is rendered once for all of its recipients
+    renderer = NotificationRenderer()
+
+    if not dry_run:
+        release_stale_claims()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in batched(due_schedule(start, on_date).iterator(chunk_size=batch_size), batch_size):
+            due = [(row, user, stage_key(row)) for row in batch for user in recipients(row.agreement)]
+            counts['agreements'] += len({row.agreement_id for row in batch})
+            counts['due'] += len(due)
+            if dry_run:
+                counts['skipped'] += len(already_logged(due))
+                continue
+            individual = []
+            for item in due:
+                if item[1].reminder_digest:
+                    digest_due[item[1].pk].append(item)
+                else:
+                    individual.append(item)
+            claimed = claim(individual, run_id)
+            counts['skipped'] += len(individual) - len(claimed)
+            send_batch(executor, claimed, on_date, counts, renderer)
+        send_digests(executor, digest_due, run_id, on_date, counts, chunk_size=workers)
+    return counts
+
+
+def release_stale_claims(lease=None):
+    """
+    Delete claims older than ``lease`` seconds (default REMINDER_CLAIM_LEASE)
+    that were never marked sent, because their run died before sending or
+    before recording the send, so this run sends those reminders again.
+    Returns the number released.
+    """
+    lease = lease if lease is not None else getattr(settings, 'REMINDER_CLAIM_LEASE', 6 * 60 * 60)
+    stale = timezone.now() - timedelta(seconds=lease)
+    released, _ = ReminderLog.objects.filter(sent_at__isnull=True, created_at__lt=stale).delete()
+    if released:
+        logger.warning(f"Released {released} reminder claim(s) left unsent by an earlier run")
+    return released
+
+
+def already_logged(due):
+    if not due:
+        return set()
+    logged = set(ReminderLog.objects.filter(
+        agreement_id__in={row.agreement_id for row, _, _ in due},
+        stage__in={key for _, _, key in due},
+    ).values_list('agreement_id', 'recipient_id', 'stage'))
+    return {item for item in due if (item[0].agreement_id, item[1].pk, item[2]) in logged}
+
+
+def claim(due, run_id):
+    """Insert log rows for ``due``; returns {log id: (schedule row, user)} for the rows this run won"""
+    if not due:
+        return {}
+    ReminderLog.objects.bulk_create(
+        [ReminderLog(agreement_id=row.agreement_id, recipient=user, stage=key, run_id=run_id) for row, user, key in due],
+        ignore_conflicts=True,
+    )
+    wanted = {(row.agreement_id, user.pk, key): (row, user) for row, user, key in due}
+    won = ReminderLog.objects.filter(
+        run_id=run_id, agreement_id__in={row.agreement_id for row, _, _ in due}
+    ).values_list('id', 'agreement_id', 'recipient_id', 'stage')
+    return {pk: wanted[(agreement_id, recipient_id, key)] for pk, agreement_id, recipient_id, key in won
+            if (agreement_id, recipient_id, key) in wanted}
+
+
+def send_batch(executor, claimed, on_date, counts, renderer):
+    def send(item):
+        pk, (row, user) = item
+        return pk, send_agreement_reminder(
+            row.agreement, user, row.reminder_type, renderer=renderer, **reminder_kwargs(row, on_date)
+        )
+
+    sent, failed = [], []
+    for pk, ok in executor.map(send, claimed.items()):
+        (sent if ok else failed).append(pk)
+    counts['emails'] += len(sent)
+    if sent:
+        ReminderLog.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+    if failed:
+        # Give the claims back so the next run retries these
+        ReminderLog.objects.filter(pk__in=failed).delete()
+    counts['sent'] += len(sent)
+    counts['failed'] += len(failed)
+
+
+def send_digests(executor, digest_due, run_id, on_date, counts, chunk_size):
+    """Claim and send each user's digest, ``chunk_size`` users at a time"""
+    def send(digest):
+        user, items = digest
+        items.sort(key=lambda item: item[1]['expiration_date'])
+        return [pk for pk, _ in items], send_reminder_digest(user, [item for _, item in items], on_date)
+
+    for chunk in batched(digest_due.values(), chunk_size):
+        due = [item for items in chunk for item in items]
+        claimed = claim(due, run_id)
+        counts['skipped'] += len(due) - len(claimed)
+        users, items = {}, defaultdict(list)
+        for pk, (row, user) in claimed.items():
+            users[user.pk] = user
+            items[user.pk].append((pk, digest_item(row, on_date)))
+
+        sent, failed = [], []
+        for pks, ok in executor.map(send, [(users[user_id], user_items) for user_id, user_items in items.items()]):
+            (sent if ok else failed).extend(pks)
+            counts['emails'] += ok
+        if sent:
+            ReminderLog.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+        if failed:
+            ReminderLog.objects.filter(pk__in=failed).delete()
+        counts['sent'] += len(sent)
+        counts['failed'] += len(failed)
@@ -0,0 +1,307 @@
+"""
+Incrementally maintained dashboard counts.
+
+DashboardRollup holds one counter per (department, status, expiry bucket).
+Buckets are relative to DashboardRollupState.as_of:
+
+    past   expiry_date <  as_of
+    today  expiry_date == as_of
+    1m     as_of +   1 .. 30 days
+    3m     as_of +  31 .. 90 days
+    6m     as_of +  91 .. 180 days
+    later  beyond 180 days
+
+Agreement signals move single counts on save/delete, remove_department()
+clears a deleted department's counters, rollover() shifts the
+agreements that crossed a bucket edge when the date changes, and rebuild()
+recomputes everything from the agreement table.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+from django.utils import timezone
+
+from accounts.models import Department
+from .models import Agreement, DashboardRollup, DashboardRollupState
+
+# (bucket, last day offset it covers); anything further out is 'later'
+BUCKET_LIMITS = (('today', 0), ('1m', 30), ('3m', 90), ('6m', 180))
+# Day offsets x where the bucket changes between x and x + 1
+BUCKET_EDGES = (-1, 0, 30, 90, 180)
+STATE_PK = 1
+
+
+def get_bucket(expiry_date, as_of):
+    days = (expiry_date - as_of).days
+    if days < 0:
+        return 'past'
+    for bucket, limit in BUCKET_LIMITS:
+        if days <= limit:
+            return bucket
+    return 'later'
+
+
+def _bucket_expression(as_of):
+    """SQL equivalent of get_bucket() for aggregate queries"""
+    whens = [When(expiry_date__lt=as_of, then=Value('past'))]
+    whens += [
+        When(expiry_date__lte=as_of + timedelta(days=limit), then=Value(bucket))
+        for bucket, limit in BUCKET_LIMITS
+    ]
+    return Case(*whens, default=Value('later'), output_field=CharField())
+
+
+def _get_state(lock=False):
+    queryset = DashboardRollupState.objects.filter(pk=STATE_PK)
+    if lock:
+        queryset = queryset.select_for_update()
+    return queryset.first()
+
+
+def _lock_rollups():
+    """
+    Lock every rollup row before rollover()/rebuild() read the agreement
+    table, so saves that already moved a count commit first and saves that
+    have not yet done so wait and then see the new as-of date.
+    """
+    list(DashboardRollup.objects.select_for_update().order_by('pk').values_list('pk'))
+
+
+def _adjust(department_pk, status, bucket, delta):
+    """
+    Atomically add ``delta`` to one rollup counter, creating it if needed.
+    Returns True if the row had to be created.
+    """
+    rollup = DashboardRollup.objects.filter(department_pk=department_pk, status=status, bucket=bucket)
+    if rollup.update(count=F('count') + delta):
+        return False
+    try:
+        with transaction.atomic():
+            DashboardRollup.objects.create(department_pk=department_pk, status=status, bucket=bucket, count=delta)
+    except IntegrityError:
+        # Another request created the row first
+        rollup.update(count=F('count') + delta)
+    return True
+
+
+def _change_rows(old_key, new_key, as_of):
+    """{(department_pk, status, bucket): delta} for moving one agreement relative to ``as_of``"""
+    deltas = defaultdict(int)
+    for key, delta in ((old_key, -1), (new_key, 1)):
+        if key is None or key[2] is None:
+            continue
+        department_id, status, expiry_date = key
+        deltas[(department_id or 0, status, get_bucket(expiry_date, as_of))] += delta
+    # Sorted, so concurrent saves lock shared rows in the same order
+    return sorted((key, delta) for key, delta in deltas.items() if delta)
+
+
+def record_change(old_key, new_key):
+    """
+    Move one agreement's count from ``old_key`` to ``new_key``, both
+    (department_id, status, expiry_date) tuples or None (created/deleted).
+
+    Only the affected rollup rows are locked (by their F() updates); the
+    as-of date is read without a lock, so agreement saves do not queue
+    behind each other. If a rollover committed while the counts were being
+    moved, the move is redone relative to the new as-of date.
+    """
+    if old_key == new_key:
+        return
+    with transaction.atomic():
+        state = _get_state()
+        if state is None:
+            # Never built; the first dashboard read rebuilds from scratch
+            return
+        as_of = state.as_of
+        rows = _change_rows(old_key, new_key, as_of)
+        if not rows:
+            return
+        created = False
+        for (department_pk, status, bucket), delta in rows:
+            created |= _adjust(department_pk, status, bucket, delta)
+
+        # A new row is not covered by _lock_rollups(), so wait for a running
+        # rollover in that (rare) case before checking the date
+        state = _get_state(lock=created)
+        if state is None or state.as_of == as_of:
+            return
+        corrections = defaultdict(int)
+        for key, delta in rows:
+            corrections[key] -= delta
+        for key, delta in _change_rows(old_key, new_key, state.as_of):
+            corrections[key] += delta
+        for (department_pk, status, bucket), delta in sorted(corrections.items()):
+            if delta:
+                _adjust(department_pk, status, bucket, delta)
+
+
+def remove_department(department_pk):
+    """
+    Move what is left of a deleted department's counts to the no-department
+    counters and drop its rows. Agreements its deletion re-pointed with a
+    queryset UPDATE (on_delete=SET_NULL) send no signals; cascade-deleted
+    ones have already been counted out and leave zeros.
+    """
+    with transaction.atomic():
+        # In the (department_pk, status, bucket) order record_change() locks rows in
+        rows = list(DashboardRollup.objects.select_for_update().filter(
+            department_pk__in=(0, department_pk)
+        ).order_by('department_pk', 'status', 'bucket').values_list('pk', 'department_pk', 'status', 'bucket', 'count'))
+        for _, row_department_pk, status, bucket, count in rows:
+            if row_department_pk == department_pk and count:
+                _adjust(0, status, bucket, count)
+        DashboardRollup.objects.filter(pk__in=[row[0] for row in rows if row[1] == department_pk]).delete()
+
+
+def compute_counts(as_of):
+    """Fresh {(department_pk, status, bucket): count} straight from the agreement table"""
+    rows = Agreement.objects.order_by().annotate(
+        bucket=_bucket_expression(as_of)
+    ).values('department_id', 'status', 'bucket').annotate(total=Count('id'))
+    counts = defaultdict(int)
+    for row in rows:
+        counts[(row['department_id'] or 0, row['status'], row['bucket'])] += row['total']
+    return dict(counts)
+
+
+def stored_counts():
+    counts = defaultdict(int)
+    for row in DashboardRollup.objects.values('department_pk', 'status', 'bucket', 'count'):
+        counts[(row['department_pk'], row['status'], row['bucket'])] += row['count']
+    return dict(counts)
+
+
+def find_drift(as_of=None):
+    """List of (key, stored, actual) where the rollup disagrees with the agreement table"""
+    state = _get_state()
+    as_of = as_of or (state.as_of if state else date.today())
+    stored = stored_counts() if state else {}
+    actual = compute_counts(as_of)
+    return [
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(set(stored) | set(actual), key=str)
+        if stored.get(key, 0) != actual.get(key, 0)
+    ]
+
+
+def rebuild(as_of=None):
+    """Recompute the whole rollup for ``as_of`` (default today)"""
+    as_of = as_of or date.today()
+    with transaction.atomic():
+        state = _get_state(lock=True)
+        if state is None:
+            try:
+                with transaction.atomic():
+                    state = DashboardRollupState.objects.create(pk=STATE_PK, as_of=as_of)
+            except IntegrityError:
+                state = _get_state(lock=True)
+        _lock_rollups()
+        DashboardRollup.objects.all().delete()
+        DashboardRollup.objects.bulk_create([
+            DashboardRollup(department_pk=department_pk, status=status, bucket=bucket, count=count)
+            for (department_pk, status, bucket), count in compute_counts(as_of).items()
+        ])
+        state.as_of = as_of
+        state.rebuilt_at = timezone.now()
+        state.save()
+
+
+def rollover(to_date=None):
+    """
+    Shift counts for agreements whose expiry bucket changed between the stored
+    as-of date and ``to_date`` (default today). Only the few expiry dates on a
+    bucket edge are read, through the expiry_date index.
+    """
+    to_date = to_date or date.today()
+    with transaction.atomic():
+        state = _get_state(lock=True)
+        if state is None or (to_date - state.as_of).days > BUCKET_EDGES[-1]:
+            rebuild(to_date)
+            return
+        if to_date <= state.as_of:
+            return
+        _lock_rollups()
+
+        crossed = Q()
+        for edge in BUCKET_EDGES:
+            crossed |= Q(
+                expiry_date__gte=state.as_of + timedelta(days=edge + 1),
+                expiry_date__lte=to_date + timedelta(days=edge),
+            )
+        rows = Agreement.objects.filter(crossed).order_by().values(
+            'department_id', 'status', 'expiry_date'
+        ).annotate(total=Count('id'))
+
+        deltas = defaultdict(int)
+        for row in rows:
+            old_bucket = get_bucket(row['expiry_date'], state.as_of)
+            new_bucket = get_bucket(row['expiry_date'], to_date)
+            if old_bucket != new_bucket:
+                department_pk = row['department_id'] or 0
+                deltas[(department_pk, row['status'], old_bucket)] -= row['total']
+                deltas[(department_pk, row['status'], new_bucket)] += row['total']
+        for (department_pk, status, bucket), delta in deltas.items():
+            if delta:
+                _adjust(department_pk, status, bucket, delta)
+
+        state.as_of = to_date
+        state.save(update_fields=['as_of'])
+
+
+def get_dashboard_counts(today=None):
+    """
+    Dashboard totals from the rollup, rolling it forward first if the date
+    has changed since the last rollover.
+    """
+    today = today or date.today()
+    state = _get_state()
+    if state is None:
+        rebuild(today)
+    elif state.as_of < today:
+        rollover(today)
+
+    totals = defaultdict(int)
+    per_department = defaultdict(int)
+    for row in DashboardRollup.objects.values('department_pk', 'status', 'bucket', 'count'):
+        totals[(row['status'], row['bucket'])] += row['count']
+        per_department[row['department_pk']] += row['count']
+
+    def total(statuses=None, buckets=None):
+        return sum(
+            count for (status, bucket), count in totals.items()
+            if (statuses is None or status in statuses) and (buckets is None or bucket in buckets)
+        )
+
+    return {
+        'active': total(['ongoing'], ['today', '1m', '3m', '6m', 'later']),
+        'expiring_soon': total(['ongoing'], ['today', '1m', '3m']),
+        'expired': total(['expired']),
+        'expiry_in_1_month': total(buckets=['1m']),
+        'expiry_in_6_months': total(buckets=['6m']),
+        'per_department': dict(per_department),
+    }
+
+
+def get_dashboard_stats(today=None):
+    """Payload of the dashboard-stats endpoint and the dashboard event stream"""
+    stats = get_dashboard_counts(today)
+    agreement_dept_data = [
+        { 'name': dept['name'], 'value': stats['per_department'].get(dept['id'], 0) }
+        for dept in Department.objects.filter(executive=False).order_by('name').values('id', 'name')
+    ]
+    agreement_status_data = [
+        { 'name': 'Expiry in 6 months', 'value': stats['expiry_in_6_months'], 'color': '#2980b9' },
+        { 'name': 'Expiry in 3 months', 'value': stats['expiring_soon'], 'color': '#f39c12' },
+        { 'name': 'Expiry within 1 month', 'value': stats['expiry_in_1_month'], 'color': '#e67e22' },
+        { 'name': 'Expired', 'value': stats['expired'], 'color': '#e74c3c' },
+    ]
+    return {
+        'active': stats['active'],
+        'expiringSoon': stats['expiring_soon'],
+        'expired': stats['expired'],
+        'agreementDeptData': agreement_dept_data,
+        'agreementStatusData': agreement_status_data,
+    }
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Agreement, AgreementType  # Add AgreementType to imports
+from .downloads import get_download_url
+from .models import Agreement, AgreementType, Notification
 from accounts.models import User, Vendor, Department
 
 class AgreementTypeSerializer(serializers.ModelSerializer):
@@ -7,7 +8,37 @@ class AgreementTypeSerializer(serializers.ModelSerializer):
         model = AgreementType
         fields = ['id', 'name', 'description', 'is_active']
 
+def get_executive_roster():
+    """Executive users as rendered in AgreementSerializer.executive_users"""
+    executives = User.objects.filter(department__executive=True).values(
+        'id', 'full_name', 'department__name'
+    )
+    return [
+        {
+            'id': user['id'],
+            'full_name': user['full_name'],
+            'department__name': user['department__name'] or ''
+        }
+        for user in executives
+    ]
+
+
+def get_attachment_download_url(agreement_id, request=None):
+    # Signed and short-lived: only rendered for users who may view the agreement
+    return get_download_url(agreement_id, request)
+
+
+class AttachmentField(serializers.FileField):
+    """Accepts uploads as usual, but renders the permission-checked download URL"""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return get_attachment_download_url(value.instance.pk, self.context.get('request'))
+
+
 class AgreementSerializer(serializers.ModelSerializer):
+    attachment = AttachmentField(required=False, allow_null=True, max_length=255)
     department_name = serializers.CharField(source='department.name', read_only=True)
     agreement_type_name = serializers.CharField(source='agreement_type.name', read_only=True)
     agreement_type_detail = AgreementTypeSerializer(source='agreement_type', read_only=True)
@@ -21,15 +52,11 @@ class AgreementSerializer(serializers.ModelSerializer):
         return [user.full_name for user in obj.assigned_users.all()]
     
     def get_executive_users(self, obj):
-        executives = User.objects.filter(department__executive=True)
-        return [
-            {
-                'id': user.id,
-                'full_name': user.full_name,
-                'department__name': user.department.name if user.department else ''
-            }
-            for user in executives
-        ]
+        # The roster is the same for every agreement, so build it once per
+        # serializer (a list serializer shares one child across all rows)
+        if not hasattr(self, '_executive_users'):
+            self._executive_users = get_executive_roster()
+        return self._executive_users
 
     class Meta:
         model = Agreement
@@ -48,4 +75,132 @@ class AgreementSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         # Department must be set explicitly; do not assign agreement_type to department
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+class AgreementValuesSerializer:
+    """
+    Read-only list serializer that builds rows from ``.values()`` dicts.
+
+    Produces the same field names and formats as AgreementSerializer without
+    instantiating model objects or per-field serializer machinery, and can be
+    restricted to a sparse field set (``?fields=id,title,status``).
+    """
+    FIELDS = AgreementSerializer.Meta.fields
+
+    # Field name -> columns it needs from .values()
+    COLUMNS = {
+        'agreement_type': ['agreement_type_id'],
+        'agreement_type_name': ['agreement_type__name'],
+        'agreement_type_detail': ['agreement_type_id'],
+        'party_name': ['party_name_id'],
+        'party_name_display': ['party_name__name'],
+        'department': ['department_id'],
+        'department_name': ['department__name'],
+        'creator': ['creator_id'],
+        'creator_name': ['creator__full_name'],
+        'assigned_users': [],
+        'executive_users': [],
+    }
+    # AgreementSerializer omits these (dotted source) fields when the relation is null
+    OMIT_IF_NULL = ('agreement_type_name', 'party_name_display', 'department_name', 'creator_name')
+
+    _date = serializers.DateField()
+    _datetime = serializers.DateTimeField()
+
+    def __init__(self, fields=None, request=None):
+        if fields:
+            unknown = [name for name in fields if name not in self.FIELDS]
+            if unknown:
+                raise serializers.ValidationError({
+                    'fields': f"Unknown field(s): {', '.join(unknown)}"
+                })
+            self.fields = [name for name in self.FIELDS if name in fields]
+        else:
+            self.fields = list(self.FIELDS)
+        self.request = request
+
+    @property
+    def columns(self):
+        # id and created_at are always fetched; the keyset cursor needs them
+        columns = ['id', 'created_at']
+        for name in self.fields:
+            for column in self.COLUMNS.get(name, [name]):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def values(self, queryset):
+        """Strip eager loading from ``queryset`` and select only the needed columns"""
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        fields = self.fields
+        ids = [row['id'] for row in rows]
+
+        # Lookups shared by every row, built once per page
+        assigned_users = {}
+        if 'assigned_users' in fields and ids:
+            through = Agreement.assigned_users.through.objects.filter(
+                agreement_id__in=ids
+            ).order_by('id').values_list('agreement_id', 'user__full_name')
+            for agreement_id, full_name in through:
+                assigned_users.setdefault(agreement_id, []).append(full_name)
+        agreement_types = {}
+        if 'agreement_type_detail' in fields:
+            agreement_types = {
+                agreement_type['id']: agreement_type
+                for agreement_type in AgreementType.objects.values('id', 'name', 'description', 'is_active')
+            }
+        executive_users = get_executive_roster() if 'executive_users' in fields else None
+
+        getters = [
+            (name, self.get_getter(name, assigned_users, agreement_types, executive_users))
+            for name in fields
+        ]
+        omit_if_null = [name for name in fields if name in self.OMIT_IF_NULL]
+        data = []
+        for row in rows:
+            item = {name: getter(row) for name, getter in getters}
+            for name in omit_if_null:
+                if item[name] is None:
+                    del item[name]
+            data.append(item)
+        return data
+
+    def get_getter(self, name, assigned_users, agreement_types, executive_users):
+        """Return a function that renders field ``name`` from a values() row"""
+        if name in ('start_date', 'expiry_date', 'reminder_time'):
+            to_representation = self._date.to_representation
+            return lambda row: to_representation(row[name]) if row[name] else None
+        if name in ('created_at', 'updated_at'):
+            to_representation = self._datetime.to_representation
+            return lambda row: to_representation(row[name]) if row[name] else None
+        if name == 'attachment':
+            return lambda row: self.get_attachment_url(row['id'], row['attachment'])
+        if name == 'agreement_type_detail':
+            return lambda row: agreement_types.get(row['agreement_type_id'])
+        if name == 'assigned_users':
+            return lambda row: assigned_users.get(row['id'], [])
+        if name == 'executive_users':
+            return lambda row: executive_users
+        column = self.COLUMNS.get(name, [name])[0]
+        return lambda row: row[column]
+
+    def get_attachment_url(self, agreement_id, name):
+        if not name:
+            return None
+        return get_attachment_download_url(agreement_id, self.request)
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    is_read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'action', 'message', 'agreement', 'created_at', 'read_at', 'is_read']
+        read_only_fields = fields
+
+    def get_is_read(self, obj):
+        return obj.read_at is not None
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Department
+from . import reminders, rollup
+from .events import notify_dashboard_changed
+from .models import Agreement, release_attachment
+
+
+def _stored_rollup_key(pk):
+    return Agreement.objects.filter(pk=pk).values_list('department_id', 'status', 'expiry_date').first()
+
+
+@receiver(pre_save, sender=Agreement)
+def remember_rollup_key(sender, instance, raw=False, **kwargs):
+    # Instances not loaded through from_db (or with deferred fields) have no snapshot
+    if raw or instance._state.adding or instance.get_loaded_rollup_key() is not None:
+        return
+    stored = _stored_rollup_key(instance.pk)
+    if stored is not None:
+        if not hasattr(instance, '_loaded_values'):
+            instance._loaded_values = {}
+        instance._loaded_values.update(zip(('department_id', 'status', 'expiry_date'), stored))
+
+
+@receiver(post_save, sender=Agreement)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_key = None if created else instance.get_loaded_rollup_key()
+    new_key = instance.get_rollup_key() or _stored_rollup_key(instance.pk)
+    if old_key != new_key:
+        rollup.record_change(old_key, new_key)
+        notify_dashboard_changed()
+
+
+@receiver(post_delete, sender=Agreement)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    old_key = instance.get_loaded_rollup_key() or instance.get_rollup_key()
+    rollup.record_change(old_key, None)
+    notify_dashboard_changed()
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def department_changed(sender, instance, **kwargs):
+    # The per-department chart lists department names
+    notify_dashboard_changed()
+
+
+@receiver(post_delete, sender=Department)
+def remove_department_rollup(sender, instance, **kwargs):
+    # The nullable foreign key leaves the order of the cascade open; once it
+    # commits, every agreement of the department is deleted or re-pointed
+    department_pk = instance.pk
+    transaction.on_commit(lambda: rollup.remove_department(department_pk))
+
+
+@receiver(post_delete, sender=Agreement)
+def release_attachment_on_delete(sender, instance, **kwargs):
+    # Also runs for queryset and cascade deletes, which skip Agreement.delete()
+    name = instance.get_loaded_value('attachment') or instance.attachment.name
+    release_attachment(name, instance.get_loaded_value('attachment_sha256') or instance.attachment_sha256)
+
+
+@receiver(post_save, sender=Agreement)
+def update_reminder_schedule(sender, instance, created, raw=False, **kwargs):
+    # The snapshot still holds the previous dates here; only rebuild on a change
+    if raw or not (created or instance.has_changed('expiry_date', 'reminder_time')):
+        return
+    reminders.rebuild_schedule([instance])
@@ -0,0 +1,21 @@
+"""Background job handlers, run by ``manage.py run_jobs``. See agreements/jobs.py."""
+from django.contrib.auth import get_user_model
+
+from . import jobs
+from .models import Agreement
+
+
+class NotificationNotSent(Exception):
+    pass
+
+
+@jobs.register('agreements.send_notification')
+def send_notification(agreement_id, user_id, reminder_type):
+    agreement = Agreement.objects.select_related('party_name').filter(pk=agreement_id).first()
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if agreement is None or user is None:
+        # Deleted since the job was queued; nothing to notify about
+        return
+    # send_agreement_reminder logs and returns False on SMTP errors: retry
+    if not agreement.send_notification(user, reminder_type):
+        raise NotificationNotSent(f"'{reminder_type}' notification for agreement {agreement_id} to user {user_id}")
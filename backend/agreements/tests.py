@@ -0,0 +1,703 @@
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import SlidingToken
+
+from accounts.models import Department, DepartmentPermission, User, Vendor
+from . import notifications, reminders, rollup, uploads
+from .downloads import get_download_url
+from .models import (
+    Agreement, AgreementSequence, AgreementType, AttachmentBlob, DashboardRollup, Notification, NotificationCounter,
+    RateLimitBucket, ReminderLog, UploadSession,
+)
+from .utils import mailer
+from .utils.mailer import SharedTokenBucket
+
+
+class AgreementFixturesMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.it = Department.objects.create(name='IT')
+        cls.hr = Department.objects.create(name='HR')
+        cls.executives = Department.objects.create(name='Executive', executive=True)
+        cls.user = User.objects.create_user('user@example.com', 'password', full_name='User', department=cls.it)
+        for i in range(3):
+            User.objects.create_user(
+                f'exec{i}@example.com', 'password', full_name=f'Executive {i}', department=cls.executives
+            )
+        cls.vendor = Vendor.objects.create(
+            name='Vendor', address='Address', email='vendor@example.com', phone_number='+1234567890'
+        )
+        cls.agreement_type = AgreementType.objects.create(name='Service')
+
+    @classmethod
+    def create_agreements(cls, count, department=None, **kwargs):
+        agreements = []
+        for i in range(count):
+            agreement = Agreement(
+                title=f'Agreement {i}',
+                agreement_type=cls.agreement_type,
+                start_date=date.today() - timedelta(days=30),
+                expiry_date=date.today() + timedelta(days=30 + i),
+                party_name=cls.vendor,
+                department=department if department is not None else cls.it,
+                creator=cls.user,
+                **kwargs,
+            )
+            agreement.save()
+            agreement.assigned_users.set([cls.user])
+            agreements.append(agreement)
+        return agreements
+
+
+class TemporaryMediaMixin:
+    """Stores files under a MEDIA_ROOT of its own, removed after the test"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class AgreementListQueryCountTests(AgreementFixturesMixin, TestCase):
+    """The list endpoint's query count must not grow with the number of rows"""
+
+    def count_list_queries(self):
+        # A fresh user and a cold access scope cache, so both requests do the same work
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/agreements/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(response.data['agreements']), len(queries)
+
+    def test_query_count_is_constant(self):
+        self.create_agreements(5)
+        rows, small = self.count_list_queries()
+        self.assertEqual(rows, 5)
+
+        self.create_agreements(5)
+        rows, large = self.count_list_queries()
+        self.assertEqual(rows, 10)
+        self.assertEqual(small, large)
+
+
+class AgreementVisibilityTests(AgreementFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_user_without_department_sees_nothing(self):
+        self.create_agreements(2)
+        Agreement.objects.filter(pk=self.create_agreements(1)[0].pk).update(department=None)
+        # e.g. after the user's department was deleted
+        user = User.objects.create_user('nodept@example.com', 'password', full_name='No Department', department=self.hr)
+        User.objects.filter(pk=user.pk).update(department=None)
+        user = User.objects.get(pk=user.pk)
+        self.assertFalse(Agreement.objects.visible_to(user).exists())
+
+    def test_visibility_matches_department_permissions(self):
+        own = self.create_agreements(2)
+        other = self.create_agreements(2, department=self.hr)
+        visible = set(Agreement.objects.visible_to(self.user).values_list('pk', flat=True))
+        self.assertEqual(visible, {agreement.pk for agreement in own})
+
+        DepartmentPermission.objects.create(user=self.user, department=self.hr, permission_type='view')
+        user = User.objects.get(pk=self.user.pk)
+        visible = set(Agreement.objects.visible_to(user).values_list('pk', flat=True))
+        self.assertEqual(visible, {agreement.pk for agreement in own + other})
+
+    def test_list_query_uses_department_index(self):
+        self.create_agreements(3)
+        self.create_agreements(3, department=self.hr)
+        plan = Agreement.objects.visible_to(self.user).order_by('-created_at', 'id').explain()
+        self.assertIn('agreement_dept_created_idx', plan)
+
+
+class RollbackRequested(Exception):
+    pass
+
+
+class AgreementSequenceTests(AgreementFixturesMixin, TestCase):
+    def test_rolled_back_number_is_reused(self):
+        first = self.create_agreements(1)[0]
+        with self.assertRaises(RollbackRequested):
+            with transaction.atomic():
+                self.create_agreements(1)
+                raise RollbackRequested()
+        second = self.create_agreements(1)[0]
+        self.assertEqual(second.sequence_number, first.sequence_number + 1)
+
+    def test_numbers_past_9999_keep_sorting(self):
+        year = date.today().year
+        AgreementSequence.objects.create(year=year, last_number=9999)
+        agreement = self.create_agreements(1)[0]
+        self.assertEqual(agreement.agreement_id, f'A_{year}_10000')
+        latest = Agreement.objects.order_by('-sequence_year', '-sequence_number').first()
+        self.assertEqual(latest.pk, agreement.pk)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class AgreementSequenceConcurrencyTests(AgreementFixturesMixin, TransactionTestCase):
+    """Parallel creates, including the first ones of a new year, get unique, gap-free IDs"""
+    WORKERS = 8
+    PER_WORKER = 10
+    ROLLBACK_EVERY = 5
+    YEAR = 2099
+
+    def setUp(self):
+        self.setUpTestData()
+
+    def test_parallel_creates(self):
+        errors = []
+        barrier = threading.Barrier(self.WORKERS)
+
+        def worker(index):
+            try:
+                barrier.wait()
+                for i in range(self.PER_WORKER):
+                    agreement = Agreement(
+                        title=f'Agreement {index}.{i}',
+                        agreement_type=self.agreement_type,
+                        party_name=self.vendor,
+                        department=self.it,
+                        start_date=date.today(),
+                        expiry_date=date.today() + timedelta(days=365),
+                    )
+                    try:
+                        with transaction.atomic():
+                            agreement.assign_agreement_id(self.YEAR)
+                            agreement.save()
+                            if i % self.ROLLBACK_EVERY == 0:
+                                # The number must go back to the sequence
+                                raise RollbackRequested()
+                    except RollbackRequested:
+                        pass
+            except Exception as e:
+                errors.append(f'worker {index}: {e!r}')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        rows = list(Agreement.objects.filter(sequence_year=self.YEAR).values_list('agreement_id', 'sequence_number'))
+        committed = self.WORKERS * (self.PER_WORKER - len(range(0, self.PER_WORKER, self.ROLLBACK_EVERY)))
+        self.assertEqual(len(rows), committed)
+        self.assertEqual(len({agreement_id for agreement_id, _ in rows}), committed)
+        self.assertEqual(sorted(number for _, number in rows), list(range(1, committed + 1)))
+        self.assertEqual(AgreementSequence.objects.get(year=self.YEAR).last_number, committed)
+
+
+class SharedTokenBucketTests(TestCase):
+    def test_waits_once_the_burst_is_used(self):
+        waits = []
+        bucket = SharedTokenBucket('test', rate=60, capacity=2, sleep=waits.append)
+        for _ in range(4):
+            bucket.acquire()
+        # A burst of two, then one token a second, reserved in turn
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(waits[0], 1, delta=0.1)
+        self.assertAlmostEqual(waits[1], 2, delta=0.1)
+
+    def test_processes_share_the_row(self):
+        SharedTokenBucket('test', rate=60, capacity=1, sleep=lambda seconds: None).acquire()
+        self.assertLess(RateLimitBucket.objects.get(pk='test').tokens, 1)
+        self.assertGreater(SharedTokenBucket('test', rate=60, capacity=1, sleep=lambda seconds: None).acquire(), 0)
+
+
+# Unthrottled: the sender threads cannot share the test transaction's connection
+@override_settings(EMAIL_RATE_LIMIT_PER_MINUTE=0)
+class ReminderClaimTests(AgreementFixturesMixin, TestCase):
+    def setUp(self):
+        mailer.reset_mailer()
+        self.addCleanup(mailer.reset_mailer)
+        self.agreement = self.create_agreements(1)[0]
+        self.on_date = self.agreement.expiry_date
+        self.stage = reminders.stage_key(self.agreement.reminder_schedule.get(stage='on'))
+
+    def claim(self, age):
+        log = ReminderLog.objects.create(
+            agreement=self.agreement, recipient=self.user, stage=self.stage, run_id=uuid.uuid4()
+        )
+        ReminderLog.objects.filter(pk=log.pk).update(created_at=timezone.now() - age)
+
+    def test_claim_of_a_dead_run_is_sent_again(self):
+        self.claim(timedelta(days=1))
+        counts = reminders.dispatch(on_date=self.on_date, catch_up_days=0, workers=1)
+        self.assertEqual((counts['sent'], counts['skipped']), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(ReminderLog.objects.get(stage=self.stage).sent_at)
+
+    def test_recent_claim_is_left_to_its_run(self):
+        self.claim(timedelta(minutes=5))
+        counts = reminders.dispatch(on_date=self.on_date, catch_up_days=0, workers=1)
+        self.assertEqual((counts['sent'], counts['skipped']), (0, 1))
+        self.assertEqual(mail.outbox, [])
+
+    def test_digest_reminders_are_claimed_when_sent(self):
+        User.objects.filter(pk=self.user.pk).update(reminder_digest=True)
+        self.create_agreements(1)
+        with mock.patch.object(reminders, 'send_digests', side_effect=RuntimeError('crashed')):
+            with self.assertRaises(RuntimeError):
+                reminders.dispatch(on_date=self.on_date, catch_up_days=0, workers=1)
+        # Nothing claimed, so the next run sends the digest
+        self.assertFalse(ReminderLog.objects.exists())
+
+        # Both agreements expire today, in one digest
+        counts = reminders.dispatch(on_date=self.on_date, catch_up_days=0, workers=1)
+        self.assertEqual((counts['sent'], counts['emails']), (2, 1))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class NotificationAdminTests(AgreementFixturesMixin, TestCase):
+    def setUp(self):
+        self.admin = site._registry[Notification]
+        self.other = User.objects.create_user('other@example.com', 'password', full_name='Other', department=self.it)
+        for agreement in self.create_agreements(2):
+            agreement.assigned_users.add(self.other)
+            notifications.notify(agreement, 'created')
+
+    def unread(self, user):
+        return NotificationCounter.objects.get(pk=user.pk).unread
+
+    def test_delete_recounts_only_the_recipients(self):
+        # Drifted by hand; only touched recipients are recounted
+        NotificationCounter.objects.filter(pk=self.other.pk).update(unread=7)
+        self.admin.delete_model(None, Notification.objects.filter(recipient=self.user).first())
+        self.assertEqual(self.unread(self.user), 1)
+        self.assertEqual(self.unread(self.other), 7)
+
+        self.admin.delete_queryset(None, Notification.objects.filter(recipient=self.other))
+        self.assertEqual((self.unread(self.user), self.unread(self.other)), (1, 0))
+
+    def test_changing_the_recipient_recounts_both(self):
+        notification = Notification.objects.filter(recipient=self.user).first()
+        notification.recipient = self.other
+        self.admin.save_model(None, notification, None, True)
+        self.assertEqual((self.unread(self.user), self.unread(self.other)), (1, 3))
+
+
+class AttachmentBlobTests(TemporaryMediaMixin, AgreementFixturesMixin, TestCase):
+    CONTENT = b'%PDF-1.4 agreement'
+
+    def upload(self, content=CONTENT, name='contract.pdf'):
+        return SimpleUploadedFile(name, content, content_type='application/pdf')
+
+    def blob(self):
+        return AttachmentBlob.objects.get()
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = (self.create_agreements(1, attachment=self.upload())[0] for _ in range(2))
+        blob = self.blob()
+        self.assertEqual((blob.ref_count, blob.dedup_hits, blob.size), (2, 1, len(self.CONTENT)))
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertEqual(first.attachment_sha256, blob.sha256)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.blob().ref_count, 1)
+        self.assertTrue(default_storage.exists(blob.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.name))
+
+    def test_same_content_reuploaded_then_deleted(self):
+        agreement = self.create_agreements(1, attachment=self.upload())[0]
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put(
+                f'/api/agreements/edit/{agreement.pk}/', {'attachment': self.upload()}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        blob = self.blob()
+        self.assertEqual(blob.ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Agreement.objects.get(pk=agreement.pk).delete()
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.name))
+
+    def test_large_upload_is_streamed_from_disk(self):
+        agreement = self.create_agreements(1)[0]
+        content = os.urandom(3 * 1024 * 1024)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        spooled = []
+        file_complete = TemporaryFileUploadHandler.file_complete
+        with mock.patch.object(
+            TemporaryFileUploadHandler, 'file_complete', autospec=True,
+            side_effect=lambda handler, size: spooled.append(size) or file_complete(handler, size),
+        ):
+            response = client.put(
+                f'/api/agreements/edit/{agreement.pk}/', {'attachment': self.upload(content)}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(spooled, [len(content)])
+        blob = self.blob()
+        self.assertEqual((blob.sha256, blob.size), (hashlib.sha256(content).hexdigest(), len(content)))
+        with default_storage.open(blob.name) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_replacing_the_attachment_releases_the_old_blob(self):
+        agreement = Agreement.objects.get(pk=self.create_agreements(1, attachment=self.upload())[0].pk)
+        old = self.blob()
+        agreement.attachment = self.upload(b'%PDF-1.4 amended')
+        with self.captureOnCommitCallbacks(execute=True):
+            agreement.save()
+        self.assertFalse(AttachmentBlob.objects.filter(pk=old.pk).exists())
+        self.assertFalse(default_storage.exists(old.name))
+        self.assertTrue(default_storage.exists(agreement.attachment.name))
+
+    def test_upload_between_release_and_delete_keeps_the_file(self):
+        agreement = self.create_agreements(1, attachment=self.upload())[0]
+        blob = self.blob()
+        with self.captureOnCommitCallbacks() as callbacks:
+            agreement.delete()
+        # The same content arrives before the released blob is deleted
+        self.create_agreements(1, attachment=self.upload())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.blob().ref_count, 1)
+        self.assertTrue(default_storage.exists(blob.name))
+
+    def test_store_rewrites_a_missing_file(self):
+        self.create_agreements(1, attachment=self.upload())
+        blob = self.blob()
+        default_storage.delete(blob.name)
+        self.create_agreements(1, attachment=self.upload())
+        self.assertTrue(default_storage.exists(blob.name))
+        with default_storage.open(blob.name) as f:
+            self.assertEqual(f.read(), self.CONTENT)
+
+    def test_gc_keeps_referenced_and_recent_files(self):
+        self.create_agreements(1, attachment=self.upload())
+        blob = self.blob()
+        orphan = default_storage.save('agreements/orphan.pdf', self.upload())
+        recent = default_storage.save('agreements/recent.pdf', self.upload())
+        day_ago = time.time() - 25 * 3600
+        for name in (blob.name, orphan):
+            os.utime(default_storage.path(name), (day_ago, day_ago))
+
+        call_command('gc_attachment_storage', stdout=StringIO())
+        self.assertTrue(default_storage.exists(blob.name))
+        self.assertFalse(default_storage.exists(orphan))
+        # Inside the grace period, e.g. an upload whose agreement is being saved
+        self.assertTrue(default_storage.exists(recent))
+
+
+class AttachmentDownloadTests(TemporaryMediaMixin, AgreementFixturesMixin, TestCase):
+    CONTENT = bytes(range(100))
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        upload = SimpleUploadedFile('contract.pdf', self.CONTENT, content_type='application/pdf')
+        self.agreement = self.create_agreements(1, attachment=upload)[0]
+        self.url = get_download_url(self.agreement.pk)
+        self.etag = f'"{self.agreement.attachment_sha256}"'
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, headers=headers)
+
+    def test_signed_link(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_byte_ranges(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[10:20])
+
+        response = self.get(Range='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[-5:])
+
+        response = self.get(Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+        # A stale copy gets the whole file instead of a range of the new one
+        response = self.get(Range='bytes=10-19', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_revalidation(self):
+        response = self.get(**{'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+
+    def test_nginx_sends_the_file(self):
+        response = self.get(**{'X-Sendfile-Type': 'X-Accel-Redirect'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.agreement.attachment.name}')
+
+    def test_expired_or_foreign_links_are_refused(self):
+        with mock.patch('django.core.signing.time.time', return_value=time.time() - 3600):
+            expired = get_download_url(self.agreement.pk)
+        self.assertEqual(self.get(expired).status_code, 403)
+
+        other = self.create_agreements(1, department=self.hr)[0]
+        url = get_download_url(other.pk).replace(f'/{other.pk}/', f'/{self.agreement.pk}/')
+        self.assertEqual(self.get(url).status_code, 403)
+
+    def test_token_only_in_authorization_header(self):
+        token = str(SlidingToken.for_user(self.user))
+        url = self.url.split('?')[0]
+        self.assertEqual(self.get(f'{url}?token={token}').status_code, 401)
+        self.assertEqual(self.get(url, Authorization=f'Bearer {token}').status_code, 200)
+
+        outsider = User.objects.create_user('hr@example.com', 'password', full_name='HR', department=self.hr)
+        token = str(SlidingToken.for_user(outsider))
+        self.assertEqual(self.get(url, Authorization=f'Bearer {token}').status_code, 403)
+
+
+class DashboardRollupTests(AgreementFixturesMixin, TestCase):
+    def setUp(self):
+        self.create_agreements(2)
+        self.create_agreements(3, department=self.hr)
+        rollup.rebuild()
+
+    def test_deleting_a_department_keeps_the_rollup_exact(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hr.delete()
+        self.assertEqual(rollup.find_drift(), [])
+        self.assertFalse(DashboardRollup.objects.filter(department_pk=self.hr.pk).exists())
+
+    def test_agreements_left_without_a_department_move_to_its_counters(self):
+        # What a department delete does with on_delete=SET_NULL: an UPDATE without signals
+        Agreement.objects.filter(department=self.hr).update(department=None)
+        rollup.remove_department(self.hr.pk)
+        self.assertEqual(rollup.find_drift(), [])
+        self.assertEqual(rollup.get_dashboard_counts()['per_department'], {self.it.pk: 2, 0: 3})
+
+
+class KeysetPaginationTests(AgreementFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.agreements = self.create_agreements(5)
+        # Ties on created_at are broken by id
+        Agreement.objects.filter(pk__in=[a.pk for a in self.agreements[1:4]]).update(
+            created_at=self.agreements[0].created_at
+        )
+
+    def get(self, url='/api/agreements/', **params):
+        return self.client.get(url, params)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Agreement.objects.order_by('-created_at', 'id').values_list('id', flat=True))
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('departments' in response.data, cursor is None)
+            self.assertEqual(response.data['count'], 5)
+            seen += [row['id'] for row in response.data['agreements']]
+            pages += 1
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+            self.assertIn(f'cursor={cursor}', response.data['next'])
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_count_can_be_skipped(self):
+        response = self.get(count='false', page_size=2)
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['agreements']), 2)
+
+    def test_bad_cursor_is_a_bad_request(self):
+        not_json = base64.urlsafe_b64encode(b'not json').decode()
+        no_keys = base64.urlsafe_b64encode(b'{"x":1}').decode()
+        for cursor in ('%%%', 'YWJj', not_json, no_keys, base64.urlsafe_b64encode(b'[1]').decode()):
+            response = self.get(cursor=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn('cursor', response.data)
+
+    def test_notification_pages(self):
+        for agreement in self.agreements:
+            Notification.objects.create(recipient=self.user, agreement=agreement, action='created', message='m')
+        url = '/api/agreements/notifications/'
+        first = self.get(url, page_size=3)
+        second = self.get(url, page_size=3, cursor=first.data['next_cursor'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, sorted(Notification.objects.values_list('id', flat=True), reverse=True))
+        self.assertIsNone(second.data['next_cursor'])
+        self.assertEqual(self.get(url, cursor='abc').status_code, 400)
+
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(TemporaryMediaMixin, AgreementFixturesMixin, TestCase):
+    CONTENT = b'%PDF-1.4 chunked'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, content=CONTENT):
+        response = self.client.post('/api/agreements/uploads/', {'filename': 'big.pdf', 'size': len(content)})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def put_chunk(self, upload_id, index, data):
+        return self.client.put(
+            f'/api/agreements/uploads/{upload_id}/chunks/{index}/', data, content_type='application/octet-stream'
+        )
+
+    def upload_all(self, session, content=CONTENT):
+        size = session['chunk_size']
+        # Out of order, so received_chunks only moves once the gap is filled
+        for index in reversed(range(session['chunk_count'])):
+            self.assertEqual(self.put_chunk(session['upload_id'], index, content[index * size:(index + 1) * size]).status_code, 200)
+
+    def finalize(self, upload_id, **data):
+        return self.client.post(f'/api/agreements/uploads/{upload_id}/finalize/', data)
+
+    def test_finalize_assembles_the_chunks(self):
+        session = self.start()
+        self.assertEqual(session['chunk_count'], 4)
+        self.upload_all(session)
+        response = self.finalize(session['upload_id'], sha256=hashlib.sha256(self.CONTENT).hexdigest())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.CONTENT).hexdigest())
+        path = response.data['attachment_path']
+        with default_storage.open(path, 'rb') as assembled:
+            self.assertEqual(assembled.read(), self.CONTENT)
+        self.assertEqual(default_storage.listdir(uploads.session_dir(UploadSession.objects.get()))[1], ['big.pdf'])
+
+    def test_wrong_chunk_size_is_rejected(self):
+        session = self.start()
+        self.assertEqual(self.put_chunk(session['upload_id'], 0, b'abc').status_code, 400)
+        self.assertEqual(self.put_chunk(session['upload_id'], 4, b'abcd').status_code, 400)
+        self.assertEqual(UploadSession.objects.get().received_chunks, 0)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        session = self.start()
+        self.put_chunk(session['upload_id'], 1, self.CONTENT[4:8])
+        response = self.finalize(session['upload_id'])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received_chunks'], 0)
+
+    def test_second_finalize_conflicts(self):
+        session = self.start()
+        self.upload_all(session)
+        path = self.finalize(session['upload_id']).data['attachment_path']
+        response = self.finalize(session['upload_id'])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['attachment_path'], path)
+        self.assertEqual(self.put_chunk(session['upload_id'], 0, self.CONTENT[:4]).status_code, 409)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        session = self.start()
+        self.upload_all(session)
+        response = self.finalize(session['upload_id'], sha256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(self.finalize(session['upload_id']).status_code, 404)
+
+    def test_only_the_uploader_can_use_the_session(self):
+        session = self.start()
+        self.upload_all(session)
+        path = self.finalize(session['upload_id']).data['attachment_path']
+        outsider = User.objects.exclude(pk=self.user.pk).first()
+        self.assertIsNone(uploads.open_temp_attachment(path, outsider))
+        self.assertIsNone(uploads.open_temp_attachment(f'{path}/../../../../settings.py', self.user))
+        upload = uploads.open_temp_attachment(path, self.user)
+        upload.close()
+        client = APIClient()
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get(f'/api/agreements/uploads/{session["upload_id"]}/').status_code, 404)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadConcurrencyTests(TemporaryMediaMixin, AgreementFixturesMixin, TransactionTestCase):
+    """Parallel finalizes of one upload assemble it once; the others get a conflict"""
+    WORKERS = 4
+    CONTENT = b'%PDF-1.4 chunked'
+
+    def setUp(self):
+        super().setUp()
+        self.setUpTestData()
+
+    def test_parallel_finalize(self):
+        session = UploadSession.objects.create(
+            user=self.user, filename='big.pdf', size=len(self.CONTENT), chunk_size=4
+        )
+        for index in range(session.chunk_count):
+            uploads.save_chunk(session, index, BytesIO(self.CONTENT[index * 4:(index + 1) * 4]))
+        uploads.advance(session.pk)
+
+        assemble = uploads.assemble
+        calls = []
+
+        def slow_assemble(session):
+            calls.append(session.pk)
+            # Keep the first finalize busy while the others arrive
+            time.sleep(0.2)
+            return assemble(session)
+
+        statuses, errors = [], []
+        barrier = threading.Barrier(self.WORKERS)
+
+        def worker():
+            try:
+                client = APIClient()
+                client.force_authenticate(self.user)
+                barrier.wait()
+                statuses.append(client.post(f'/api/agreements/uploads/{session.pk}/finalize/').status_code)
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+
+        with mock.patch.object(uploads, 'assemble', slow_assemble):
+            threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(statuses), [200] + [409] * (self.WORKERS - 1))
+        self.assertEqual(len(calls), 1)
+        session.refresh_from_db()
+        with default_storage.open(session.file_path, 'rb') as assembled:
+            self.assertEqual(assembled.read(), self.CONTENT)
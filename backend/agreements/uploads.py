@@ -0,0 +1,128 @@
+"""
+Resumable chunked uploads.
+
+    POST uploads/                      {filename, size}  -> session with chunk_size
+    PUT  uploads/<id>/chunks/<n>/      raw bytes of chunk n
+    GET  uploads/<id>/                 received offset
+    POST uploads/<id>/finalize/        {sha256?}         -> attachment_path
+
+Every chunk is its own file under temp/uploads/<id>/, so a retried or
+out-of-order PUT just replaces one part. Finalize streams the parts, in
+order, into a single temp file that the submit views accept as
+``attachment_path``.
+"""
+import os
+import posixpath
+
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+from .utils.file_utils import HashingFile
+
+TEMP_DIR = 'temp'
+UPLOADS_DIR = 'temp/uploads'
+
+
+class ChunkSequenceFile(File):
+    """File whose chunks() yields the given storage files back to back"""
+
+    def __init__(self, paths, name, storage=default_storage):
+        super().__init__(None, name)
+        self.paths = paths
+        self.storage = storage
+
+    def chunks(self, chunk_size=None):
+        for path in self.paths:
+            with self.storage.open(path, 'rb') as part:
+                yield from part.chunks(chunk_size)
+
+
+def session_dir(session):
+    return f'{UPLOADS_DIR}/{session.id}'
+
+
+def chunk_path(session, index):
+    return f'{session_dir(session)}/{index:06d}.part'
+
+
+def save_chunk(session, index, stream):
+    """
+    Stream one chunk from ``stream`` to storage. Returns the number of bytes
+    written; the caller rejects the chunk if that is not the expected size.
+    """
+    path = chunk_path(session, index)
+    # A retried chunk replaces the earlier attempt instead of getting a new name
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    upload = HashingFile(File(stream), name=os.path.basename(path))
+    default_storage.save(path, upload)
+    return upload.bytes_read
+
+
+def discard_chunk(session, index):
+    path = chunk_path(session, index)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def advance(session_id):
+    """Move received_chunks past every contiguous chunk now on disk"""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        received = session.received_chunks
+        while received < session.chunk_count and default_storage.exists(chunk_path(session, received)):
+            received += 1
+        if received != session.received_chunks:
+            session.received_chunks = received
+            session.save(update_fields=['received_chunks', 'updated_at'])
+        return session
+
+
+def assemble(session):
+    """
+    Concatenate the chunks into one temp file without holding it in memory.
+    Returns the HashingFile used, so callers can check the digest and size.
+    """
+    paths = [chunk_path(session, index) for index in range(session.chunk_count)]
+    upload = HashingFile(ChunkSequenceFile(paths, name=session.filename))
+    session.file_path = default_storage.save(f'{session_dir(session)}/{session.filename}', upload)
+    session.sha256 = upload.hexdigest()
+    session.completed_at = timezone.now()
+    session.save(update_fields=['file_path', 'sha256', 'completed_at', 'updated_at'])
+    for path in paths:
+        default_storage.delete(path)
+    return upload
+
+
+def open_temp_attachment(path, user):
+    """
+    Open a previously uploaded temp file for the ``attachment_path`` submit
+    flow. Only files under temp/ are accepted, and files from an upload
+    session only by the user who uploaded them. Returns None otherwise.
+    """
+    path = posixpath.normpath(path or '')
+    if not path.startswith(f'{TEMP_DIR}/'):
+        return None
+    if path.startswith(f'{UPLOADS_DIR}/'):
+        if not UploadSession.objects.filter(file_path=path, user=user).exists():
+            return None
+    if not default_storage.exists(path):
+        return None
+    return File(default_storage.open(path), name=os.path.basename(path))
+
+
+def release_temp_attachment(path):
+    """Delete a consumed temp file along with its upload session, if any"""
+    path = posixpath.normpath(path or '')
+    if not path.startswith(f'{TEMP_DIR}/'):
+        return
+    if default_storage.exists(path):
+        try:
+            default_storage.delete(path)
+        except PermissionError:
+            # If we can't delete now, we'll leave it for the next cleanup
+            pass
+    UploadSession.objects.filter(file_path=path).delete()
@@ -8,6 +8,10 @@ from .views import (
     available_users
 ) 
 from .views import DashboardStatsAPIView
+from .views import NotificationListAPIView, NotificationUnreadCountAPIView, NotificationMarkReadAPIView
+from .views import UploadSessionCreateAPIView, UploadSessionAPIView, UploadChunkAPIView, UploadFinalizeAPIView
+from .events import dashboard_stream, stream_ticket
+from .downloads import attachment_download
 
 
 router = DefaultRouter()
@@ -20,11 +24,21 @@ urlpatterns = [
     path('form-data/', AgreementFormDataAPIView.as_view(), name='api-agreement-form-data'),
     path('submit/', SubmitAgreementAPIView.as_view(), name='api-submit-agreement'),
     path('<int:pk>/', AgreementDetailAPIView.as_view(), name='api-agreement-detail'),
+    path('<int:pk>/attachment/', attachment_download, name='agreement-attachment'),
     path('edit/<int:agreement_id>/', EditAgreementAPIView.as_view(), name='api-edit-agreement'),
     path('<int:agreement_id>/users-with-access/', users_with_access, name='api-users-with-access'),
     path('<int:agreement_id>/users/', users_with_access, name='users_with_access'),
     path('<int:agreement_id>/users/manage/', manage_user_access, name='manage_user_access'),
     path('users/available/', available_users, name='available_users'),
     path('dashboard-stats/', DashboardStatsAPIView.as_view(), name='dashboard-stats'),
+    path('dashboard-stream/', dashboard_stream, name='dashboard-stream'),
+    path('dashboard-stream/ticket/', stream_ticket, name='dashboard-stream-ticket'),
+    path('notifications/', NotificationListAPIView.as_view(), name='notification-list'),
+    path('notifications/unread-count/', NotificationUnreadCountAPIView.as_view(), name='notification-unread-count'),
+    path('notifications/read/', NotificationMarkReadAPIView.as_view(), name='notification-mark-read'),
+    path('uploads/', UploadSessionCreateAPIView.as_view(), name='upload-create'),
+    path('uploads/<uuid:upload_id>/', UploadSessionAPIView.as_view(), name='upload-status'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', UploadChunkAPIView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/finalize/', UploadFinalizeAPIView.as_view(), name='upload-finalize'),
     
 ]
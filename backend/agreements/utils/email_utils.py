@@ -1,87 +1,79 @@
 import logging
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
+from .mailer import get_mailer
+from .rendering import NotificationRenderer, recipient_name
 
 logger = logging.getLogger(__name__)
 
-def send_agreement_reminder(agreement, user, reminder_type, months_since_expiration=None, time_remaining=None):
+def build_email(subject, message, html_message, recipients):
+    """The message send_mail() would build, for sending through the shared Mailer"""
+    email = EmailMultiAlternatives(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
+    if html_message:
+        email.attach_alternative(html_message, 'text/html')
+    return email
+
+def send_agreement_reminder(agreement, user, reminder_type, months_since_expiration=None, time_remaining=None,
+                            renderer=None, mailer=None):
     """
     Send event-based reminder email for an agreement to a specific user.
     reminder_type: 'before', 'on', or 'after'
+    Pass a shared NotificationRenderer when sending to many users, so each
+    agreement and stage is rendered once. Mail goes through ``mailer``, by
+    default the process-wide one.
     """
     try:
-        # Prepare context
-        context = {
-            'recipient_name': getattr(user, 'full_name', getattr(user, 'username', 'User')),
-            'agreement_name': agreement.title,
-            'partner_name': agreement.party_name.name if agreement.party_name else '',
-            'expiration_date': agreement.expiry_date,
-            'agreement_id': agreement.agreement_id,
-            'company_name': getattr(settings, 'COMPANY_NAME', 'Your Company Name'),
-            'support_contact': getattr(settings, 'SUPPORT_CONTACT', 'Support Email/Phone'),
-            'reminder_type': reminder_type,
-            'months_since_expiration': months_since_expiration,
-            'time_remaining': time_remaining,
-        }
-
-        if reminder_type == 'before':
-            subject = f"Reminder: Your agreement '{agreement.title}' expires on {agreement.expiry_date}"
-        elif reminder_type == 'on':
-            subject = f"Your agreement '{agreement.title}' has expired today ({agreement.expiry_date})"
-        elif reminder_type == 'after':
-            subject = f"Follow-up: Your agreement '{agreement.title}' expired on {agreement.expiry_date}"
-        else:
-            subject = f"Agreement Notification: {agreement.title}"
-
-        message = render_to_string('emails/agreement_reminder.txt', context)
-        html_message = render_to_string('emails/agreement_reminder.html', context)
-
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-            html_message=html_message
+        rendered = (renderer or NotificationRenderer()).reminder(
+            agreement, reminder_type, months_since_expiration, time_remaining
         )
+        message, html_message = rendered.for_recipient(recipient_name(user))
+
+        (mailer or get_mailer()).send(build_email(rendered.subject, message, html_message, [user.email]))
         return True
     except Exception as e:
         logger.error(f"Failed to send {reminder_type} reminder for agreement {agreement.id} to {user.email}: {str(e)}")
         return False
 
-def send_agreement_notification(agreement, action, recipients):
+def send_agreement_notification(agreement, action, recipients, renderer=None, mailer=None):
     """
     Send notification about agreement creation/update
     """
     try:
-        subject = f"Agreement {action}: {agreement.title}"
+        rendered = (renderer or NotificationRenderer()).notification(agreement, action)
         
+        (mailer or get_mailer()).send(build_email(rendered.subject, rendered.text, rendered.html, recipients))
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send {action} notification for agreement {agreement.id}: {str(e)}")
+        return False
+
+
+def send_reminder_digest(user, reminders, digest_date):
+    """
+    Send one email listing all of a user's due reminders.
+    reminders: dicts with reminder_type, agreement_name, partner_name,
+    expiration_date, agreement_id, time_remaining and months_since_expiration
+    """
+    try:
         context = {
-            'agreement': agreement,
-            'action': action,
-            'agreement_reference': agreement.agreement_reference,
-            'start_date': agreement.start_date,
-            'expiry_date': agreement.expiry_date,
-            'reminder_date': agreement.reminder_time,
-            'vendor_name': agreement.party_name.name if agreement.party_name else '',
-            'department_name': agreement.agreement_type.name if agreement.agreement_type else ''
+            'recipient_name': recipient_name(user),
+            'digest_date': digest_date,
+            'reminder_count': len(reminders),
+            'expiring': [item for item in reminders if item['reminder_type'] == 'before'],
+            'expired_today': [item for item in reminders if item['reminder_type'] == 'on'],
+            'expired': [item for item in reminders if item['reminder_type'] == 'after'],
+            'company_name': getattr(settings, 'COMPANY_NAME', 'Your Company Name'),
         }
-        
-        message = render_to_string('emails/agreement_notification.txt', context)
-        html_message = render_to_string('emails/agreement_notification.html', context)
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            recipients,
-            fail_silently=False,
-            html_message=html_message
-        )
+        subject = f"Agreement reminders for {digest_date}: {len(reminders)} agreement{'s' if len(reminders) != 1 else ''}"
+
+        message = render_to_string('emails/reminder_digest.txt', context)
+        html_message = render_to_string('emails/reminder_digest.html', context)
+
+        get_mailer().send(build_email(subject, message, html_message, [user.email]))
         return True
     except Exception as e:
-        logger.error(f"Failed to send {action} notification for agreement {agreement.id}: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error(f"Failed to send reminder digest to {user.email}: {str(e)}")
+        return False
@@ -0,0 +1,29 @@
+import hashlib
+
+from django.core.files.base import File
+
+
+class HashingFile(File):
+    """
+    Wraps an uploaded file so that storage.save() streams it chunk by chunk
+    while the SHA-256 digest and byte size are computed in the same pass.
+
+    Deliberately hides temporary_file_path(): FileSystemStorage would
+    otherwise move the temp file without reading it, leaving nothing hashed.
+    """
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name or getattr(file, 'name', None))
+        self._sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def chunks(self, chunk_size=None):
+        # UploadedFile.chunks() rewinds and reads in upload-handler sized pieces
+        source = self.file.chunks(chunk_size) if hasattr(self.file, 'chunks') else super().chunks(chunk_size)
+        for chunk in source:
+            self._sha256.update(chunk)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
@@ -0,0 +1,305 @@
+"""
+Pooled, rate-limited SMTP delivery.
+
+send_mail() opens and TLS-negotiates a new SMTP connection for every
+message. Mail sent through a Mailer instead reuses a small pool of open
+connections from get_connection(), waits on a token bucket so we stay under
+the provider's per-minute sending limit, and is retried with backoff on
+transient failures (dropped connections, timeouts, 4xx replies) rather than
+logged and lost. A Mailer is thread-safe; get_mailer() returns the one
+shared by the process.
+
+Mail goes out from several processes (the gunicorn workers, run_jobs and
+send_due_reminders), each with its own Mailer, so by default the token
+bucket is a SharedTokenBucket kept in the database and the limit holds for
+all of them together.
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Allows ``rate`` acquisitions per minute on average and at most
+    ``capacity`` in a burst. A rate of 0 or None disables the limit.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = (rate or 0) / 60.0
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+
+class SharedTokenBucket:
+    """
+    A TokenBucket kept in the RateLimitBucket row called ``name``, so every
+    process taking from it shares one limit. Each acquisition takes its
+    token straight away, letting the count go negative, and then sleeps
+    until the token would have been there; the row is locked for a single
+    read and write, never while waiting.
+    """
+
+    def __init__(self, name, rate, capacity=1, sleep=time.sleep):
+        self.name = name
+        self.rate = (rate or 0) / 60.0
+        self.capacity = max(1, capacity)
+        self.sleep = sleep
+
+    def reserve(self):
+        """Take one token; returns the seconds to wait before using it"""
+        from agreements.models import RateLimitBucket
+
+        buckets = RateLimitBucket.objects.filter(pk=self.name)
+        if not buckets.exists():
+            # Create the row before locking it; a locking read of a missing
+            # row takes gap locks on MySQL and deadlocks concurrent inserts
+            RateLimitBucket.objects.bulk_create(
+                [RateLimitBucket(name=self.name, tokens=self.capacity, updated_at=timezone.now())],
+                ignore_conflicts=True,
+            )
+        with transaction.atomic():
+            bucket = buckets.select_for_update().get()
+            now = timezone.now()
+            elapsed = max(0.0, (now - bucket.updated_at).total_seconds())
+            tokens = min(self.capacity, bucket.tokens + elapsed * self.rate) - 1
+            buckets.update(tokens=tokens, updated_at=now)
+        return max(0.0, -tokens) / self.rate
+
+    def acquire(self):
+        """Take one token, sleeping until it is available. Returns the seconds waited."""
+        if not self.rate:
+            return 0.0
+        wait = self.reserve()
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+def is_transient(error):
+    """Whether sending again later (on a new connection) may succeed"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPConnectError):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    # Socket errors: refused, reset, timed out
+    return isinstance(error, OSError)
+
+
+class _FairSlots:
+    """
+    A counting semaphore that hands released slots to waiters in arrival
+    order. threading.Semaphore lets the releasing thread take the slot
+    straight back, so with more senders than connections some wait for
+    the whole run.
+    """
+
+    def __init__(self, size):
+        self._free = size
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            turn = threading.Event()
+            self._waiters.append(turn)
+        turn.wait()
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            if self._waiters:
+                # The slot passes directly to the longest waiting thread
+                self._waiters.popleft().set()
+            else:
+                self._free += 1
+
+
+class _Lease:
+    def __init__(self, connection=None, sent=0):
+        self.connection = connection
+        self.sent = sent
+
+
+class Mailer:
+    """
+    Sends EmailMessages over at most ``pool_size`` concurrent SMTP
+    connections, each reused for up to ``max_messages`` messages or until
+    idle for ``idle_timeout`` seconds. Unset options come from settings.
+    The rate limit is shared with every other process unless ``shared`` is
+    False, when it only counts this Mailer's messages.
+    """
+
+    def __init__(self, rate_per_minute=None, burst=None, pool_size=None, max_messages=None,
+                 idle_timeout=None, retries=None, retry_delay=None, shared=True, **connection_kwargs):
+        def setting(value, name, default):
+            return value if value is not None else getattr(settings, name, default)
+
+        rate = setting(rate_per_minute, 'EMAIL_RATE_LIMIT_PER_MINUTE', 30)
+        burst = setting(burst, 'EMAIL_RATE_LIMIT_BURST', 5)
+        self.bucket = SharedTokenBucket('email', rate, burst) if shared else TokenBucket(rate, burst)
+        self.max_messages = setting(max_messages, 'EMAIL_CONNECTION_MAX_MESSAGES', 100)
+        self.idle_timeout = setting(idle_timeout, 'EMAIL_CONNECTION_IDLE_TIMEOUT', 60)
+        self.retries = setting(retries, 'EMAIL_SEND_RETRIES', 3)
+        self.retry_delay = setting(retry_delay, 'EMAIL_SEND_RETRY_DELAY', 2)
+        self.connection_kwargs = connection_kwargs
+        self._slots = _FairSlots(setting(pool_size, 'EMAIL_CONNECTION_POOL_SIZE', 2))
+        self._idle = queue.LifoQueue()
+        self._stats_lock = threading.Lock()
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0, 'connections': 0, 'throttled_seconds': 0.0}
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _open(self):
+        # Reuse the most recently used connection that has not gone stale
+        while True:
+            try:
+                connection, sent, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used < self.idle_timeout:
+                return connection, sent
+            self._close(connection)
+        connection = get_connection(fail_silently=False, **self.connection_kwargs)
+        connection.open()
+        self._count('connections')
+        return connection, 0
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            # Already dropped by the server
+            pass
+
+    @contextmanager
+    def _lease(self):
+        with self._slots:
+            lease = _Lease()
+            try:
+                yield lease
+            finally:
+                if lease.connection is not None:
+                    self._idle.put((lease.connection, lease.sent, time.monotonic()))
+
+    def _send(self, lease, message):
+        for attempt in range(self.retries + 1):
+            self._count('throttled_seconds', self.bucket.acquire())
+            try:
+                if lease.connection is None:
+                    lease.connection, lease.sent = self._open()
+                lease.connection.send_messages([message])
+            except Exception as e:
+                if lease.connection is not None:
+                    self._close(lease.connection)
+                    lease.connection = None
+                if attempt == self.retries or not is_transient(e):
+                    self._count('failed')
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                self._count('retries')
+                logger.warning(f"Sending '{message.subject}' failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                continue
+
+            self._count('sent')
+            lease.sent += 1
+            if lease.sent >= self.max_messages:
+                # Servers cap messages per session; start a fresh one
+                self._close(lease.connection)
+                lease.connection = None
+            return
+
+    def send(self, message):
+        """Send one message, raising the last error if every attempt fails"""
+        with self._lease() as lease:
+            self._send(lease, message)
+
+    def send_messages(self, messages):
+        """
+        Send messages over one connection (reconnecting as needed). Returns
+        a list of (message, error) for those that could not be sent.
+        """
+        failures = []
+        with self._lease() as lease:
+            for message in messages:
+                try:
+                    self._send(lease, message)
+                except Exception as e:
+                    logger.error(f"Failed to send '{message.subject}' to {', '.join(message.recipients())}: {e}")
+                    failures.append((message, e))
+        return failures
+
+    def close(self):
+        """Close idle connections"""
+        while True:
+            try:
+                connection, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer():
+    """The process-wide Mailer, so every sender shares its connections and rate limit"""
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            _mailer = Mailer()
+        return _mailer
+
+
+def reset_mailer():
+    """Close and drop the process-wide Mailer, so the next one reads current settings"""
+    global _mailer
+    with _mailer_lock:
+        if _mailer is not None:
+            _mailer.close()
+        _mailer = None
@@ -0,0 +1,119 @@
+"""
+Render-once email bodies for notification fan-out.
+
+Rendering the .txt and .html templates for every recipient repeats the
+same work (and, through agreement.party_name / agreement_type, the same
+queries) for each of them. A NotificationRenderer renders each agreement
+and stage once with a placeholder for the recipient's name and caches the
+result; per recipient only the placeholder is replaced, escaped as the
+template's autoescaping would have done.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+# Survives autoescaping unchanged and cannot occur in real content
+RECIPIENT_NAME = 'RCPTNAME0f3c9a1e'
+
+
+def recipient_name(user):
+    return getattr(user, 'full_name', getattr(user, 'username', 'User'))
+
+
+class RenderedEmail:
+    def __init__(self, subject, text, html):
+        self.subject = subject
+        self.text = text
+        self.html = html
+
+    def for_recipient(self, name):
+        """(text, html) with the recipient's name filled in"""
+        # Both templates are rendered with autoescaping on
+        name = escape(name)
+        return self.text.replace(RECIPIENT_NAME, name), self.html.replace(RECIPIENT_NAME, name)
+
+
+class NotificationRenderer:
+    """
+    Caches rendered agreement emails by (template, agreement, stage). Keep
+    one per fan-out (a dispatch run, a benchmark); it is thread-safe and
+    holds at most ``max_entries`` bodies.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _get(self, key, render):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        rendered = render()
+        with self._lock:
+            self.renders += 1
+            self._cache[key] = rendered
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return rendered
+
+    def reminder(self, agreement, reminder_type, months_since_expiration=None, time_remaining=None):
+        key = ('reminder', agreement.pk, agreement.expiry_date, reminder_type, months_since_expiration, time_remaining)
+        return self._get(key, lambda: render_reminder(agreement, reminder_type, months_since_expiration, time_remaining))
+
+    def notification(self, agreement, action):
+        key = ('notification', agreement.pk, action)
+        return self._get(key, lambda: render_notification(agreement, action))
+
+
+def render_reminder(agreement, reminder_type, months_since_expiration=None, time_remaining=None):
+    context = {
+        'recipient_name': RECIPIENT_NAME,
+        'agreement_name': agreement.title,
+        'partner_name': agreement.party_name.name if agreement.party_name else '',
+        'expiration_date': agreement.expiry_date,
+        'agreement_id': agreement.agreement_id,
+        'company_name': getattr(settings, 'COMPANY_NAME', 'Your Company Name'),
+        'support_contact': getattr(settings, 'SUPPORT_CONTACT', 'Support Email/Phone'),
+        'reminder_type': reminder_type,
+        'months_since_expiration': months_since_expiration,
+        'time_remaining': time_remaining,
+    }
+
+    if reminder_type == 'before':
+        subject = f"Reminder: Your agreement '{agreement.title}' expires on {agreement.expiry_date}"
+    elif reminder_type == 'on':
+        subject = f"Your agreement '{agreement.title}' has expired today ({agreement.expiry_date})"
+    elif reminder_type == 'after':
+        subject = f"Follow-up: Your agreement '{agreement.title}' expired on {agreement.expiry_date}"
+    else:
+        subject = f"Agreement Notification: {agreement.title}"
+
+    return RenderedEmail(
+        subject,
+        render_to_string('emails/agreement_reminder.txt', context),
+        render_to_string('emails/agreement_reminder.html', context),
+    )
+
+
+def render_notification(agreement, action):
+    context = {
+        'agreement': agreement,
+        'action': action,
+        'agreement_reference': agreement.agreement_reference,
+        'start_date': agreement.start_date,
+        'expiry_date': agreement.expiry_date,
+        'reminder_date': agreement.reminder_time,
+        'vendor_name': agreement.party_name.name if agreement.party_name else '',
+        'department_name': agreement.agreement_type.name if agreement.agreement_type else ''
+    }
+    return RenderedEmail(
+        f"Agreement {action}: {agreement.title}",
+        render_to_string('emails/agreement_notification.txt', context),
+        render_to_string('emails/agreement_notification.html', context),
+    )
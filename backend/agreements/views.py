@@ -6,16 +6,21 @@ from rest_framework.views import APIView
 from django.core.files.storage import default_storage
 from django.core.files import File
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
 import os
 import logging
 from .models import Agreement
 from .models import AgreementType
-from .serializers import AgreementSerializer, AgreementTypeSerializer
+from .serializers import AgreementSerializer, AgreementTypeSerializer, AgreementValuesSerializer, NotificationSerializer
+from .pagination import AgreementKeysetPagination, NotificationKeysetPagination
+from .rollup import get_dashboard_stats
+from . import notifications, uploads
+from .models import Notification, UploadSession
 from .forms import AgreementForm
 from accounts.models import Department, User, DepartmentPermission, Vendor
 from accounts.serializers import DepartmentSerializer
-from django.core.files.base import ContentFile
+from accounts.access import get_access_scope
 from django.core.exceptions import PermissionDenied
 from datetime import date, timedelta
 
@@ -24,56 +29,64 @@ from django.core.mail import EmailMessage
 
 logger = logging.getLogger(__name__)
 
+
+def get_values_serializer(request, **kwargs):
+    """
+    Return an AgreementValuesSerializer when the client asked for the
+    lightweight list (``?fields=id,title`` or ``?mode=lite``), else None.
+    """
+    fields = request.query_params.get('fields')
+    if not fields and request.query_params.get('mode') != 'lite':
+        return None
+    fields = [name.strip() for name in fields.split(',') if name.strip()] if fields else None
+    return AgreementValuesSerializer(fields=fields, **kwargs)
+
+
+def can_edit_agreement(user, agreement):
+    """Own department, edit permission on the agreement's department, or assigned"""
+    scope = get_access_scope(user)
+    return (
+        scope.can_edit_department(agreement.department_id) or
+        user in agreement.assigned_users.all()
+    )
+
+
 class AgreementViewSet(viewsets.ModelViewSet):
     queryset = Agreement.objects.all()
     serializer_class = AgreementSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AgreementKeysetPagination
 
     def perform_create(self, serializer):
         agreement = serializer.save(creator=self.request.user)
         # Send notification to assigned users
-        agreement.send_notification(self.request.user, 'created')
+        agreement.queue_notification(self.request.user, 'created')
 
     def get_queryset(self):
         """Filter agreements based on user permissions"""
-        user = self.request.user
-        user_departments = [user.department] if user.department else []
-        
-        # Get departments where user has permissions through DepartmentPermission
-        permitted_departments = Department.objects.filter(
-            permitted_users__user=user
-        ).distinct()
-        user_departments.extend(permitted_departments)
-        
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
-        
-        if is_executive:
-            # Executive users can see all agreements
-            return Agreement.objects.all().order_by('-created_at')
-        else:
-            # Regular users can only see agreements from their departments
-            return Agreement.objects.filter(
-                department__in=user_departments
-            ).order_by('-created_at')
+        # Executives see everything, others only their departments
+        return Agreement.objects.for_list().visible_to(self.request.user).order_by('-created_at')
 
     @action(detail=False, methods=['get'], url_path='list')
     def agreement_list(self, request):
         """Get list of agreements with user permissions"""
-        agreements = self.get_queryset()
-        serializer = self.get_serializer(agreements, many=True)
+        values_serializer = get_values_serializer(request, request=request)
+        if values_serializer:
+            # Read-only fast path: rows come straight from .values()
+            page = self.paginate_queryset(values_serializer.values(self.get_queryset()))
+            agreements_data = values_serializer.to_representation(page)
+        else:
+            page = self.paginate_queryset(self.get_queryset())
+            agreements_data = self.get_serializer(page, many=True).data
+        response_data = {'agreements': agreements_data}
         
-        # Get departments for filtering
-        departments = Department.objects.all()
-        department_serializer = DepartmentSerializer(departments, many=True)
+        # Departments for filtering are only needed with the first page
+        if self.paginator.is_first_page():
+            departments = Department.objects.all()
+            response_data['departments'] = DepartmentSerializer(departments, many=True).data
         
-        return Response({
-            'agreements': serializer.data,
-            'departments': department_serializer.data
-        })
+        response_data.update(self.paginator.get_paginated_data(agreements_data))
+        return Response(response_data)
 
     @action(detail=True, methods=['get'], url_path='detail')
     def agreement_detail(self, request, pk=None):
@@ -81,22 +94,12 @@ class AgreementViewSet(viewsets.ModelViewSet):
         agreement = self.get_object()
         
         # Check if user has access to this agreement
-        user = request.user
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
+        scope = get_access_scope(request.user)
         
-        if not is_executive:
-            # Check if user has access to this agreement
-            if not (user.department == agreement.department or 
-                    DepartmentPermission.objects.filter(
-                        user=user,
-                        department=agreement.department
-                    ).exists()):
-                return Response({
-                    'error': 'You do not have permission to view this agreement.'
-                }, status=status.HTTP_403_FORBIDDEN)
+        if not scope.can_view_department(agreement.department_id):
+            return Response({
+                'error': 'You do not have permission to view this agreement.'
+            }, status=status.HTTP_403_FORBIDDEN)
         
         serializer = self.get_serializer(agreement)
         return Response(serializer.data)
@@ -105,30 +108,15 @@ class AgreementViewSet(viewsets.ModelViewSet):
     def form_data(self, request):
         """Get form data for creating/editing agreements"""
         user = request.user
+        scope = get_access_scope(user)
 
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
-
-        if is_executive:
+        if scope.is_executive:
             return Response({
                 'error': 'Executive users cannot create agreements.'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Get user's departments and permitted departments
-        department_ids = set()
-        if user.department:
-            department_ids.add(user.department.id)
-
-        permitted_dept_ids = DepartmentPermission.objects.filter(
-            user=user,
-            permission_type='edit'
-        ).values_list('department_id', flat=True)
-        department_ids.update(permitted_dept_ids)
-
-        permitted_departments = Department.objects.filter(id__in=department_ids)
+        # User's own department plus departments with edit permission
+        permitted_departments = Department.objects.filter(id__in=scope.editable_department_ids)
         department_serializer = DepartmentSerializer(permitted_departments, many=True)
 
         # Get active agreement types
@@ -142,10 +130,7 @@ class AgreementViewSet(viewsets.ModelViewSet):
                 'id': user.id,
                 'email': user.email,
                 'full_name': user.full_name,
-                'department': {
-                    'id': user.department.id,
-                    'name': user.department.name
-                } if user.department else None
+                'department': scope.department_info()
             }
         })
 
@@ -153,31 +138,15 @@ class AgreementViewSet(viewsets.ModelViewSet):
     def edit_agreement(self, request, pk=None):
         """Edit an existing agreement"""
         agreement = self.get_object()
-        user = request.user
-        
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
+        scope = get_access_scope(request.user)
         
-        if is_executive:
+        if scope.is_executive:
             return Response({
                 'error': 'Executive users cannot edit agreements.'
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Check if user has permission to edit
-        has_permission = (
-            user in agreement.assigned_users.all() or
-            (hasattr(user, 'department') and user.department == agreement.department) or
-            DepartmentPermission.objects.filter(
-                user=user,
-                department=agreement.department,
-                permission_type='edit'
-            ).exists()
-        )
-        
-        if not has_permission:
+        if not can_edit_agreement(request.user, agreement):
             return Response({
                 'error': 'You do not have permission to edit this agreement.'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -193,7 +162,7 @@ class AgreementViewSet(viewsets.ModelViewSet):
             # Send notification to assigned users
             from accounts.models import User
             user_obj = request.user
-            updated_agreement.send_notification(user_obj, 'updated')
+            updated_agreement.queue_notification(user_obj, 'updated')
             return Response({
                 'success': True,
                 'message': 'Agreement updated successfully!',
@@ -216,18 +185,17 @@ class AgreementViewSet(viewsets.ModelViewSet):
             post_data = request.data.copy()
             temp_file = None
             temp_path = None
+            saved = False
             
             try:
                 # If there's a temporary file path, get the file
                 if 'attachment_path' in request.data:
                     temp_path = request.data['attachment_path']
-                    if default_storage.exists(temp_path):
-                        # Get the file from storage
-                        temp_file = default_storage.open(temp_path)
-                        # Create a new file object
-                        file_obj = File(temp_file, name=os.path.basename(temp_path))
+                    # Only temp/ files, and upload sessions owned by this user
+                    temp_file = uploads.open_temp_attachment(temp_path, request.user)
+                    if temp_file:
                         # Add to FILES
-                        request.FILES['attachment'] = file_obj
+                        request.FILES['attachment'] = temp_file
                 
                 form = AgreementForm(post_data, request.FILES, user=request.user)
                 if form.is_valid():
@@ -235,9 +203,10 @@ class AgreementViewSet(viewsets.ModelViewSet):
                     agreement.creator = request.user
                     agreement.save()
                     form.save_m2m()  # Save many-to-many relationships
+                    saved = True
                     
                     # Send notification to assigned users
-                    agreement.send_notification(request.user, 'created')
+                    agreement.queue_notification(request.user, 'created')
                     
                     # Clear the preview form data from session if it exists
                     if 'preview_form_data' in request.session:
@@ -258,12 +227,9 @@ class AgreementViewSet(viewsets.ModelViewSet):
                 # Clean up temporary file if it exists
                 if temp_file:
                     temp_file.close()
-                if temp_path and default_storage.exists(temp_path):
-                    try:
-                        default_storage.delete(temp_path)
-                    except PermissionError:
-                        # If we can't delete now, we'll leave it for the next cleanup
-                        pass
+                    # Keep a finished upload for a corrected resubmit if validation failed
+                    if saved:
+                        uploads.release_temp_attachment(temp_path)
         except Exception as e:
             return Response({
                 'success': False,
@@ -277,40 +243,27 @@ class AgreementListAPIView(APIView):
     
     def get(self, request):
         """Get list of agreements with user permissions"""
-        user = request.user
-        user_departments = [user.department] if user.department else []
-        
-        # Get departments where user has permissions through DepartmentPermission
-        permitted_departments = Department.objects.filter(
-            permitted_users__user=user
-        ).distinct()
-        user_departments.extend(permitted_departments)
-        
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
-        
-        if is_executive:
-            # Executive users can see all agreements
-            agreements = Agreement.objects.all()
+        # Executives see everything, others only their departments
+        agreements = Agreement.objects.for_list().visible_to(request.user)
+        
+        paginator = AgreementKeysetPagination()
+        values_serializer = get_values_serializer(request)
+        if values_serializer:
+            # Read-only fast path: rows come straight from .values()
+            page = paginator.paginate_queryset(values_serializer.values(agreements), request, view=self)
+            agreements_data = values_serializer.to_representation(page)
         else:
-            # Regular users can only see agreements from their departments
-            agreements = Agreement.objects.filter(
-                department__in=user_departments
-            )
-        
-        agreements = agreements.order_by('-created_at')
-        departments = Department.objects.all()
+            page = paginator.paginate_queryset(agreements, request, view=self)
+            agreements_data = AgreementSerializer(page, many=True).data
+        response_data = {'agreements': agreements_data}
         
-        agreement_serializer = AgreementSerializer(agreements, many=True)
-        department_serializer = DepartmentSerializer(departments, many=True)
+        # Departments for filtering are only needed with the first page
+        if paginator.is_first_page():
+            departments = Department.objects.all()
+            response_data['departments'] = DepartmentSerializer(departments, many=True).data
         
-        return Response({
-            'agreements': agreement_serializer.data,
-            'departments': department_serializer.data
-        })
+        response_data.update(paginator.get_paginated_data(agreements_data))
+        return Response(response_data)
 
 class AgreementDetailAPIView(APIView):
     """API view for agreement detail - matches path('<int:pk>/', views.agreement_detail)"""
@@ -318,25 +271,14 @@ class AgreementDetailAPIView(APIView):
     
     def get(self, request, pk):
         """Get detailed information about a specific agreement"""
-        agreement = get_object_or_404(Agreement, pk=pk)
-        user = request.user
-        
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
+        agreement = get_object_or_404(Agreement.objects.for_detail(), pk=pk)
+        scope = get_access_scope(request.user)
         
-        if not is_executive:
-            # Check if user has access to this agreement
-            if not (user.department == agreement.department or 
-                    DepartmentPermission.objects.filter(
-                        user=user,
-                        department=agreement.department
-                    ).exists()):
-                return Response({
-                    'error': 'You do not have permission to view this agreement.'
-                }, status=status.HTTP_403_FORBIDDEN)
+        # Executives can view everything, others only their departments
+        if not scope.can_view_department(agreement.department_id):
+            return Response({
+                'error': 'You do not have permission to view this agreement.'
+            }, status=status.HTTP_403_FORBIDDEN)
         
         serializer = AgreementSerializer(agreement)
         return Response(serializer.data)
@@ -348,36 +290,17 @@ class AgreementFormDataAPIView(APIView):
     def get(self, request):
         """Get form data for creating/editing agreements"""
         user = request.user
+        scope = get_access_scope(user)
         
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
-        
-        if is_executive:
+        if scope.is_executive:
             return Response({
                 'error': 'Executive users cannot create agreements.'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Get user's departments and permitted departments
-        department_ids = set()
-        if user.department:
-            department_ids.add(user.department.id)
-        
-        permitted_dept_ids = DepartmentPermission.objects.filter(
-            user=user,
-            permission_type='edit'
-        ).values_list('department_id', flat=True)
-        department_ids.update(permitted_dept_ids)
-        
-        permitted_departments = Department.objects.filter(id__in=department_ids)
+        # User's own department plus departments with edit permission
+        permitted_departments = Department.objects.filter(id__in=scope.editable_department_ids)
         department_serializer = DepartmentSerializer(permitted_departments, many=True)
 
-        agreement_types = AgreementType.objects.filter(is_active=True)
-        agreement_type_serializer = AgreementTypeSerializer(agreement_types, many=True)
-
-        
         # Get active agreement types
         agreement_types = AgreementType.objects.filter(is_active=True)
         agreement_type_serializer = AgreementTypeSerializer(agreement_types, many=True)
@@ -389,10 +312,7 @@ class AgreementFormDataAPIView(APIView):
                 'id': user.id,
                 'email': user.email,
                 'full_name': user.full_name,
-                'department': {
-                    'id': user.department.id,
-                    'name': user.department.name
-                } if user.department else None
+                'department': scope.department_info()
             }
         })
 
@@ -400,6 +320,9 @@ class SubmitAgreementAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        temp_file = None
+        temp_path = None
+        saved = False
         try:
             # Debug logging
             logger.info("Starting agreement submission")
@@ -410,6 +333,12 @@ class SubmitAgreementAPIView(APIView):
             form_data = request.data.dict()
             files = {'attachment': request.FILES.get('attachment')}
 
+            # A file finished through the resumable upload API
+            temp_path = form_data.get('attachment_path')
+            if not files['attachment'] and temp_path:
+                temp_file = uploads.open_temp_attachment(temp_path, request.user)
+                files['attachment'] = temp_file
+
             # Create form instance
             form = AgreementForm(form_data, files, user=request.user)
 
@@ -425,15 +354,14 @@ class SubmitAgreementAPIView(APIView):
 
                 # Handle file upload
                 if 'attachment' in request.FILES:
-                    if agreement.pk and agreement.attachment:
-                        agreement.attachment.delete(save=False)
-                    file = request.FILES['attachment']
-                    file_name = default_storage.save(f'agreements/{file.name}', ContentFile(file.read()))
-                    agreement.attachment = file_name
+                    # Stored in the blob store by Agreement.save(), which also
+                    # releases any attachment it replaces
+                    agreement.attachment = request.FILES['attachment']
 
                 agreement.save()
                 form.save_m2m()
-                agreement.send_notification(request.user, 'created')
+                saved = True
+                agreement.queue_notification(request.user, 'created')
 
                 logger.info(f"Agreement {agreement.id} saved successfully")
                 return Response({
@@ -453,6 +381,130 @@ class SubmitAgreementAPIView(APIView):
                 'success': False,
                 'message': f'Error creating agreement: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            if temp_file:
+                temp_file.close()
+                # Keep a finished upload for a corrected resubmit if validation failed
+                if saved:
+                    uploads.release_temp_attachment(temp_path)
+
+class UploadSessionCreateAPIView(APIView):
+    """Start a resumable attachment upload"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = default_storage.get_valid_name(os.path.basename(str(request.data.get('filename', ''))))
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = -1
+        max_size = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+        if not filename or size <= 0:
+            return Response({
+                'error': 'filename and a positive size are required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if size > max_size:
+            return Response({
+                'error': f'File is larger than the {max_size} byte limit.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadSession.objects.create(
+            user=request.user,
+            filename=filename,
+            size=size,
+            chunk_size=getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024),
+        )
+        return Response(upload_session_data(session), status=status.HTTP_201_CREATED)
+
+class UploadSessionAPIView(APIView):
+    """Report how much of an upload has been received"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+        return Response(upload_session_data(session))
+
+class UploadChunkAPIView(APIView):
+    """Receive chunk ``index`` of an upload as the raw request body"""
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, index):
+        session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+        if session.completed_at:
+            return Response({
+                'error': 'Upload is already finalized.'
+            }, status=status.HTTP_409_CONFLICT)
+        if index >= session.chunk_count:
+            return Response({
+                'error': f'Chunk index must be below {session.chunk_count}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        expected = session.expected_chunk_size(index)
+        if request.META.get('CONTENT_LENGTH') != str(expected):
+            return Response({
+                'error': f'Chunk {index} must be exactly {expected} bytes.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Read straight from the request stream; DRF never parses the body
+        written = uploads.save_chunk(session, index, request._request)
+        if written != expected:
+            uploads.discard_chunk(session, index)
+            return Response({
+                'error': f'Received {written} of {expected} bytes for chunk {index}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        session = uploads.advance(session.pk)
+        return Response(upload_session_data(session))
+
+class UploadFinalizeAPIView(APIView):
+    """Assemble the received chunks into a temp file usable as attachment_path"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        # The row lock serializes concurrent finalizes; the loser waits, then
+        # sees the session completed (409) or released (404) by the winner
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=upload_id, user=request.user
+            )
+            if session.completed_at:
+                return Response({
+                    'error': 'Upload is already finalized.',
+                    'attachment_path': session.file_path,
+                    **upload_session_data(session)
+                }, status=status.HTTP_409_CONFLICT)
+            if session.received_chunks < session.chunk_count:
+                return Response({
+                    'error': 'Upload is incomplete.',
+                    **upload_session_data(session)
+                }, status=status.HTTP_409_CONFLICT)
+            uploads.assemble(session)
+
+            expected_sha256 = request.data.get('sha256')
+            if expected_sha256 and expected_sha256.lower() != session.sha256:
+                uploads.release_temp_attachment(session.file_path)
+                return Response({
+                    'error': 'Checksum mismatch, upload the file again.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'attachment_path': session.file_path,
+            **upload_session_data(session)
+        })
+
+def upload_session_data(session):
+    return {
+        'upload_id': str(session.pk),
+        'filename': session.filename,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'chunk_count': session.chunk_count,
+        'offset': session.received_offset,
+        'received_chunks': session.received_chunks,
+        'complete': session.completed_at is not None,
+        'sha256': session.sha256,
+    }
 
 class EditAgreementAPIView(APIView):
     """API view for editing agreements - matches path('edit/<int:agreement_id>/', views.edit_agreement)"""
@@ -460,32 +512,16 @@ class EditAgreementAPIView(APIView):
     
     def get(self, request, agreement_id):
         """Get agreement data for editing"""
-        agreement = get_object_or_404(Agreement, id=agreement_id)
-        user = request.user
+        agreement = get_object_or_404(Agreement.objects.for_detail(), id=agreement_id)
+        scope = get_access_scope(request.user)
         
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
-        
-        if is_executive:
+        if scope.is_executive:
             return Response({
                 'error': 'Executive users cannot edit agreements.'
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Check if user has permission to edit
-        has_permission = (
-            user in agreement.assigned_users.all() or
-            (hasattr(user, 'department') and user.department == agreement.department) or
-            DepartmentPermission.objects.filter(
-                user=user,
-                department=agreement.department,
-                permission_type='edit'
-            ).exists()
-        )
-        
-        if not has_permission:
+        if not can_edit_agreement(request.user, agreement):
             return Response({
                 'error': 'You do not have permission to edit this agreement.'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -495,32 +531,16 @@ class EditAgreementAPIView(APIView):
     
     def put(self, request, agreement_id):
         """Update an existing agreement"""
-        agreement = get_object_or_404(Agreement, id=agreement_id)
-        user = request.user
-        
-        # Check if user is in an executive department
-        is_executive = Department.objects.filter(
-            executive=True,
-            users=user
-        ).exists()
+        agreement = get_object_or_404(Agreement.objects.for_detail(), id=agreement_id)
+        scope = get_access_scope(request.user)
         
-        if is_executive:
+        if scope.is_executive:
             return Response({
                 'error': 'Executive users cannot edit agreements.'
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Check if user has permission to edit
-        has_permission = (
-            user in agreement.assigned_users.all() or
-            (hasattr(user, 'department') and user.department == agreement.department) or
-            DepartmentPermission.objects.filter(
-                user=user,
-                department=agreement.department,
-                permission_type='edit'
-            ).exists()
-        )
-        
-        if not has_permission:
+        if not can_edit_agreement(request.user, agreement):
             return Response({
                 'error': 'You do not have permission to edit this agreement.'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -529,7 +549,7 @@ class EditAgreementAPIView(APIView):
         if serializer.is_valid():
             updated_agreement = serializer.save()
             # Send notification to assigned users
-            updated_agreement.send_notification(request.user, 'updated')
+            updated_agreement.queue_notification(request.user, 'updated')
             return Response({
                 'success': True,
                 'message': 'Agreement updated successfully!',
@@ -627,36 +647,55 @@ class DashboardStatsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Agreement stats
-        today = date.today()
-        three_months = today + timedelta(days=90)
-        # Only include agreements that exist (not deleted)
-        agreements = Agreement.objects.all()
-        # If you have a soft delete field like is_active or deleted, filter here, e.g.:
-        # agreements = agreements.filter(is_active=True)
-        active = agreements.filter(status='ongoing', expiry_date__gte=today).count()
-        expiring_soon = agreements.filter(status='ongoing', expiry_date__lte=three_months, expiry_date__gte=today).count()
-        expired = agreements.filter(status='expired').count()
-
-        # Mock chart data (replace with real aggregation if needed)
-        agreement_dept_data = [
-            { 'name': dept.name, 'value': agreements.filter(department=dept).count() }
-            for dept in Department.objects.filter(executive=False)
-        ]
-        one_month = today + timedelta(days=30)
-        expiry_in_1_month = agreements.filter(expiry_date__gt=today, expiry_date__lte=one_month).count()
-        agreement_status_data = [
-            { 'name': 'Expiry in 6 months', 'value': agreements.filter(expiry_date__lte=today + timedelta(days=180), expiry_date__gt=three_months).count(), 'color': '#2980b9' },
-            { 'name': 'Expiry in 3 months', 'value': expiring_soon, 'color': '#f39c12' },
-            { 'name': 'Expiry within 1 month', 'value': expiry_in_1_month, 'color': '#e67e22' },
-            { 'name': 'Expired', 'value': expired, 'color': '#e74c3c' },
-        ]
+        return Response(get_dashboard_stats())
+
 
+class NotificationListAPIView(APIView):
+    """The user's in-app notifications, newest first, with the unread count"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        queryset = Notification.objects.filter(recipient=request.user)
+        if request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(read_at__isnull=True)
+        paginator = NotificationKeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        data = NotificationSerializer(page, many=True).data
         return Response({
-            'active': active,
-            'expiringSoon': expiring_soon,
-            'expired': expired,
-            'agreementDeptData': agreement_dept_data,
-            'agreementStatusData': agreement_status_data,
+            'results': data,
+            'unread_count': notifications.unread_count(request.user),
+            **paginator.get_paginated_data(data),
         })
 
+
+class NotificationUnreadCountAPIView(APIView):
+    """Header badge: one primary-key read of the user's NotificationCounter"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': notifications.unread_count(request.user)})
+
+
+class NotificationMarkReadAPIView(APIView):
+    """Mark the notifications listed in ``ids`` (or all of them with ``all``) read"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.data.get('all'):
+            updated = notifications.mark_all_read(request.user)
+        else:
+            ids = request.data.get('ids')
+            if not isinstance(ids, list) or not ids:
+                return Response({'error': 'Provide a list of notification ids or "all".'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                ids = [int(pk) for pk in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'Notification ids must be integers.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            updated = notifications.mark_read(request.user, ids)
+        return Response({
+            'success': True,
+            'marked_read': updated,
+            'unread_count': notifications.unread_count(request.user),
+        })
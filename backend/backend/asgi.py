@@ -3,6 +3,9 @@ ASGI config for Agreement_tracking project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Served by uvicorn alongside gunicorn (see entrypoint.sh) for long-lived
+streams such as agreements/dashboard-stream/.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -11,6 +14,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Agreement_tracking.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
@@ -77,9 +77,33 @@ CORS_ALLOW_HEADERS = [
 
 # File Upload Settings
 FILE_UPLOAD_PERMISSIONS = 0o644
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+# Larger uploads spool to a temp file that Agreement.save() streams into the
+# blob store, so a request holds at most this much of a file in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB, Django's default
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Resumable uploads (agreements/uploads.py)
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB per PUT
+CHUNKED_UPLOAD_MAX_SIZE = 500 * 1024 * 1024  # 500MB per file
+
+# Internal nginx location serving MEDIA_ROOT for permission-checked downloads
+# (agreements/downloads.py). Used only for requests nginx marks with
+# X-Sendfile-Type: X-Accel-Redirect; others are streamed by Django.
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Seconds a signed attachment link rendered by the API stays valid
+ATTACHMENT_URL_MAX_AGE = 900
+
+# Background jobs (agreements/jobs.py, manage.py run_jobs): attempts before a
+# job is dead-lettered, first retry delay (doubled per attempt, capped) and how
+# long a claimed job may run before another worker takes it over, in seconds
+JOB_QUEUE_MAX_ATTEMPTS = 5
+JOB_QUEUE_RETRY_DELAY = 30
+JOB_QUEUE_MAX_RETRY_DELAY = 3600
+JOB_QUEUE_LOCK_TIMEOUT = 600
+JOB_QUEUE_POLL_INTERVAL = 2
+# Days finished jobs are kept
+JOB_QUEUE_KEEP_DONE_DAYS = 7
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -144,6 +168,27 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
+# File-based cache so entries (and their invalidation) are shared by all
+# gunicorn workers in the backend container
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+# Seconds a user's cached access scope (accounts/access.py) stays valid
+ACCESS_SCOPE_CACHE_TIMEOUT = 300
+
+# Dashboard Server-Sent Events (agreements/events.py): how often the shared
+# broadcaster checks for changes, the keepalive comment interval, how long a
+# stream ticket is valid and how long one stream runs before the client
+# reconnects with a new ticket (keep it near SLIDING_TOKEN_LIFETIME), in seconds
+DASHBOARD_EVENTS_POLL_INTERVAL = 2
+DASHBOARD_EVENTS_KEEPALIVE = 15
+DASHBOARD_EVENTS_TICKET_MAX_AGE = 60
+DASHBOARD_EVENTS_MAX_DURATION = 300
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
@@ -163,6 +208,14 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Agreement list pagination (keyset, see agreements/pagination.py)
+AGREEMENT_LIST_PAGE_SIZE = 50
+AGREEMENT_LIST_MAX_PAGE_SIZE = 500
+
+# In-app notification feed page size (keyset, see agreements/pagination.py)
+NOTIFICATION_PAGE_SIZE = 20
+NOTIFICATION_MAX_PAGE_SIZE = 100
+
 SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.SlidingToken",),
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
@@ -181,6 +234,30 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'noreply@sonaliintellect.com'  # Replace with your Office365 email
 EMAIL_HOST_PASSWORD = 'SP4ft@111'         # Replace with your password
 DEFAULT_FROM_EMAIL = 'noreply@sonaliintellect.com'  # Should match EMAIL_HOST_USER
+EMAIL_TIMEOUT = 30  # seconds, so a hung connection fails (and is retried) instead of blocking
+
+# Outgoing mail (agreements/utils/mailer.py): Office365 allows 30 messages a
+# minute per mailbox. Connections are kept open and reused across messages.
+# The limit is shared by every process sending mail (a RateLimitBucket row).
+EMAIL_RATE_LIMIT_PER_MINUTE = 30
+EMAIL_RATE_LIMIT_BURST = 5
+EMAIL_CONNECTION_POOL_SIZE = 2
+EMAIL_CONNECTION_MAX_MESSAGES = 100
+EMAIL_CONNECTION_IDLE_TIMEOUT = 60
+# Retries of a message after a transient failure, first delay in seconds (doubled each time)
+EMAIL_SEND_RETRIES = 3
+EMAIL_SEND_RETRY_DELAY = 2
+
+# Reminder dispatch (agreements/reminders.py): days before expiry reminders
+# go out (besides each agreement's own reminder_time), monthly follow-ups
+# sent after expiry, and how many days back a run still sends reminders it
+# missed. Run manage.py rebuild_reminder_schedule after changing the stages.
+REMINDER_BEFORE_DAYS = (180, 90, 30, 7)
+REMINDER_AFTER_MONTHS = 3
+REMINDER_CATCH_UP_DAYS = 7
+# Seconds after which a claimed but unsent reminder (its run died) is sent
+# again by the next run; must exceed the longest run, rate limit included
+REMINDER_CLAIM_LEASE = 6 * 60 * 60
 
 # Company Information for Email Templates
 COMPANY_NAME = 'Sonali Intellect Limited'
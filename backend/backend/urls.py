@@ -1,7 +1,5 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 from .views import get_csrf_token
 
 
@@ -17,5 +15,5 @@ urlpatterns = [
     path('api/get-csrf/', get_csrf_token),
 ]
 
-# ✅ Media file serving in development only
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media is not served publicly; attachments go through the permission-checked
+# api/agreements/<id>/attachment/ endpoint
@@ -26,6 +26,18 @@ python manage.py shell -c "from django.contrib.auth import get_user_model; \
 User = get_user_model(); \
 User.objects.filter(email='$email').exists() or User.objects.create_superuser(email='$email', password='$password')"
 
+# Start Uvicorn for streaming endpoints (dashboard events) in the background
+echo "Starting Uvicorn..."
+uvicorn backend.asgi:application --host 0.0.0.0 --port 8001 &
+
+# Start the background job worker (notification emails)
+echo "Starting job worker..."
+python manage.py run_jobs &
+
+# Send agreement reminders as they fall due (hourly; each is sent once)
+echo "Starting reminder dispatcher..."
+python manage.py send_due_reminders --loop &
+
 # Start Gunicorn
 echo "Starting Gunicorn..."
 exec gunicorn backend.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
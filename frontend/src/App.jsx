@@ -8,6 +8,7 @@ import EditAgreementPage from './Pages/EditAgreement';
 import SignIn from './Pages/SignIn';
 import ResetPassword from './Pages/ResetPassword';
 import ChangePassword from './Pages/ChangePassword';
+import NotificationSettings from './Pages/NotificationSettings';
 import React, { useEffect, useState } from 'react';
 import ForgotPasswordReset from './Pages/ForgotPasswordReset';
 import axiosInstance from './axiosConfig';
@@ -123,6 +124,7 @@ function App() {
           </ProtectedAgreementRoute>
         } />
         <Route path="change-password" element={<ChangePassword />} />
+        <Route path="notification-settings" element={<NotificationSettings />} />
       </Route>
     </Routes>
   );
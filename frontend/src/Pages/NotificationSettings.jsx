@@ -0,0 +1,47 @@
+import React, { useEffect, useState } from 'react';
+import axiosInstance from '../axiosConfig';
+
+export default function NotificationSettings() {
+  const [reminderDigest, setReminderDigest] = useState(false);
+  const [message, setMessage] = useState('');
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    axiosInstance.get('accounts/notification-preferences/')
+      .then(response => setReminderDigest(response.data.reminder_digest))
+      .catch(() => setMessage('Error loading notification settings.'))
+      .finally(() => setLoading(false));
+  }, []);
+
+  const handleSubmit = async (e) => {
+    e.preventDefault();
+    setMessage('');
+    setLoading(true);
+    try {
+      const response = await axiosInstance.patch('accounts/notification-preferences/', {
+        reminder_digest: reminderDigest,
+      });
+      setMessage(response.data.success || 'Settings saved successfully.');
+    } catch (error) {
+      setMessage(error.response?.data?.error || 'Error saving notification settings.');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <form onSubmit={handleSubmit} style={{ maxWidth: 400, margin: '2rem auto', background: '#fff', padding: 32, borderRadius: 8, boxShadow: '0 2px 10px rgba(0,0,0,0.07)' }}>
+      <h2 style={{ textAlign: 'center', marginBottom: 24 }}>Notification Settings</h2>
+      <div className="form-group">
+        <label style={{ display: 'flex', alignItems: 'flex-start', gap: 8, cursor: 'pointer' }}>
+          <input type="checkbox" checked={reminderDigest} onChange={e => setReminderDigest(e.target.checked)} disabled={loading} style={{ marginTop: 5 }} />
+          <span>Send my agreement reminders as one daily digest email instead of one email per agreement</span>
+        </label>
+      </div>
+      <button type="submit" className="btn btn-primary" disabled={loading} style={{ width: '100%', marginTop: 16 }}>
+        {loading ? 'Saving...' : 'Save'}
+      </button>
+      {message && <div style={{ marginTop: 16, color: message.includes('success') ? 'green' : 'red', textAlign: 'center' }}>{message}</div>}
+    </form>
+  );
+}
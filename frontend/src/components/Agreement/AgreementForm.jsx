@@ -3,6 +3,7 @@ import axiosInstance from '../../axiosConfig';
 import { useAgreementContext } from '../../context/AgreementContext';
 import { getUserData, getUserPermissions, isUserLoggedIn } from '../../utils/userUtils';
 import AgreementPreview from './AgreementPreview';
+import { uploadInChunks, CHUNKED_UPLOAD_THRESHOLD } from '../../utils/chunkedUpload';
 import { useNavigate } from 'react-router-dom';
 
 export default function AgreementForm({ onSubmit, initialData }) {
@@ -277,7 +278,10 @@ export default function AgreementForm({ onSubmit, initialData }) {
         payload.append('reminder_time', form.reminder_time);
         payload.append('party_name', form.party_name);
         payload.append('remarks', form.remarks || '');
-        if (form.attachment instanceof File) {
+        if (form.attachment instanceof File && form.attachment.size > CHUNKED_UPLOAD_THRESHOLD) {
+          // Large files are uploaded resumably first, then referenced by path
+          payload.append('attachment_path', await uploadInChunks(form.attachment));
+        } else if (form.attachment instanceof File) {
           payload.append('attachment', form.attachment);
         } else if (typeof form.attachment === 'string') {
           payload.append('existing_attachment', form.attachment);
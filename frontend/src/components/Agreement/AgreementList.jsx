@@ -15,6 +15,8 @@ export default function AgreementList({ agreements: propAgreements }) {
   const [agreements, setAgreements] = useState([]);
   const [departments, setDepartments] = useState([]);
   const [isExecutive, setIsExecutive] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const handleCreate = async () => {
     if (isExecutive) {
@@ -56,6 +58,7 @@ export default function AgreementList({ agreements: propAgreements }) {
         if (response.data.departments) {
           setDepartments(response.data.departments);
         }
+        setNextCursor(response.data.next_cursor || null);
       } catch (error) {
         console.error('Error fetching agreements:', error);
         setError('Failed to load agreements');
@@ -66,6 +69,23 @@ export default function AgreementList({ agreements: propAgreements }) {
     fetchAgreements();
   }, []);
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const response = await axiosInstance.get('agreements/', {
+        params: { cursor: nextCursor, count: 'false' }
+      });
+      setAgreements((prev) => [...prev, ...(response.data.agreements || [])]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching more agreements:', error);
+      setError('Failed to load agreements');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Determine if user is executive by trying to access form-data endpoint
   useEffect(() => {
     const checkUserPermissions = async () => {
@@ -169,6 +189,13 @@ export default function AgreementList({ agreements: propAgreements }) {
           </tbody>
         </table>
       )}
+      {nextCursor && (
+        <div style={{ textAlign: 'center', padding: '1rem' }}>
+          <button onClick={handleLoadMore} disabled={loadingMore} style={{ padding: '0.5rem 1rem', background: '#007bff', color: '#fff', border: 'none', borderRadius: '5px', cursor: 'pointer' }}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   );
 } 
\ No newline at end of file
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import axiosInstance from '../../axiosConfig';
+import { uploadInChunks, CHUNKED_UPLOAD_THRESHOLD } from '../../utils/chunkedUpload';
 
 export default function AgreementPreview({
   data,
@@ -158,6 +159,7 @@ export default function AgreementPreview({
         payload.append('reminder_time', data.reminderDate || data.reminder_time);
         if (data.attachment) {
           if (typeof data.attachment === 'string') payload.append('attachment_path', data.attachment);
+          else if (data.attachment.size > CHUNKED_UPLOAD_THRESHOLD) payload.append('attachment_path', await uploadInChunks(data.attachment));
           else payload.append('attachment', data.attachment);
         }
         config = { headers: { 'Content-Type': 'multipart/form-data' } };
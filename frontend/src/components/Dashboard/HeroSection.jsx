@@ -4,6 +4,10 @@ import Dashboard2 from './Dashboard2';
 import axiosInstance from '../../axiosConfig';
 
 const POLL_INTERVAL = 30000; // 30 seconds
+const STREAM_TIMEOUT = 10000; // fall back to polling if the stream sends nothing
+// Same origin on purpose: nginx (and the Vite dev proxy) route this path to
+// uvicorn on port 8001. The API base URL is gunicorn, which answers 503 here.
+const STREAM_URL = '/api/agreements/dashboard-stream/';
 
 const staticInvoiceStats = {
   submitted: 54,
@@ -38,9 +42,68 @@ const HeroSection = () => {
   };
 
   useEffect(() => {
-    fetchStats();
-    const interval = setInterval(fetchStats, POLL_INTERVAL);
-    return () => clearInterval(interval);
+    let interval = null;
+    let source = null;
+    let firstEventTimer = null;
+    let stopped = false;
+
+    const startPolling = () => {
+      if (source) source.close();
+      source = null;
+      fetchStats();
+      if (!interval) interval = setInterval(fetchStats, POLL_INTERVAL);
+    };
+
+    // Prefer server-pushed updates; fall back to polling if the stream is unavailable.
+    // The stream is authorized by a short-lived ticket so the JWT never goes in a URL.
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await axiosInstance.post('agreements/dashboard-stream/ticket/');
+        ticket = response.data.ticket;
+      } catch (err) {
+        startPolling();
+        return;
+      }
+      if (stopped) return;
+
+      let received = false;
+      source = new EventSource(`${STREAM_URL}?ticket=${encodeURIComponent(ticket)}`);
+      // A proxy that never flushes the stream looks like a hung connection
+      firstEventTimer = setTimeout(() => {
+        if (!received) startPolling();
+      }, STREAM_TIMEOUT);
+      source.addEventListener('stats', (event) => {
+        received = true;
+        setAgreementStats(JSON.parse(event.data));
+        setError(null);
+        setLoading(false);
+      });
+      source.addEventListener('reconnect', () => {
+        // The server ends each stream after a while; reconnect with a new ticket
+        source.close();
+        source = null;
+        clearTimeout(firstEventTimer);
+        if (!stopped) connect();
+      });
+      source.onerror = () => {
+        clearTimeout(firstEventTimer);
+        startPolling();
+      };
+    };
+
+    if (window.EventSource && localStorage.getItem('token')) {
+      connect();
+    } else {
+      startPolling();
+    }
+
+    return () => {
+      stopped = true;
+      clearTimeout(firstEventTimer);
+      if (source) source.close();
+      if (interval) clearInterval(interval);
+    };
   }, []);
 
   if (loading) return <div>Loading dashboard...</div>;
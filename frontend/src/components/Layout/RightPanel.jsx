@@ -1,17 +1,90 @@
+import { useCallback, useEffect, useState } from 'react';
+import { useNavigate } from 'react-router-dom';
 import { FiBell } from 'react-icons/fi';
+import axiosInstance from '../../axiosConfig';
 
-const notifications = [
-  { id: 1, text: 'New agreement created', time: 'Just now' },
-  { id: 2, text: 'New permission - Saim', time: '59 minutes ago' },
-  { id: 3, text: 'New agreement created', time: 'Today, 11:59 AM' },
-  { id: 4, text: 'New agreement created', time: '14 Jan 2025, 11:57 AM' }
-];
+const PAGE_SIZE = 10;
+// The unread count is a single primary-key read, cheap enough to poll
+const POLL_INTERVAL = 60000;
+
+export const formatNotificationTime = (value) => {
+  const date = new Date(value);
+  const minutes = Math.floor((Date.now() - date.getTime()) / 60000);
+  if (minutes < 1) return 'Just now';
+  if (minutes < 60) return `${minutes} minute${minutes === 1 ? '' : 's'} ago`;
+  return date.toLocaleString(undefined, { day: 'numeric', month: 'short', year: 'numeric', hour: 'numeric', minute: '2-digit' });
+};
 
 const RightPanel = ({ show, onClose }) => {
+  const navigate = useNavigate();
+  const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
+
+  const loadNotifications = useCallback(async (cursor = null) => {
+    setLoading(true);
+    try {
+      const params = { page_size: PAGE_SIZE };
+      if (cursor) params.cursor = cursor;
+      const response = await axiosInstance.get('agreements/notifications/', { params });
+      setNotifications(prev => cursor ? [...prev, ...response.data.results] : response.data.results);
+      setNextCursor(response.data.next_cursor);
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error('Failed to load notifications:', error);
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  useEffect(() => {
+    loadNotifications();
+  }, [loadNotifications]);
+
+  useEffect(() => {
+    const timer = setInterval(async () => {
+      try {
+        const response = await axiosInstance.get('agreements/notifications/unread-count/');
+        if (response.data.unread_count !== unreadCount) {
+          loadNotifications();
+        }
+      } catch (error) {
+        console.error('Failed to check notifications:', error);
+      }
+    }, POLL_INTERVAL);
+    return () => clearInterval(timer);
+  }, [unreadCount, loadNotifications]);
+
+  const markRead = async (payload) => {
+    try {
+      const response = await axiosInstance.post('agreements/notifications/read/', payload);
+      setUnreadCount(response.data.unread_count);
+      const readAt = new Date().toISOString();
+      setNotifications(prev => prev.map(notification =>
+        payload.all || payload.ids.includes(notification.id)
+          ? { ...notification, is_read: true, read_at: notification.read_at || readAt }
+          : notification
+      ));
+    } catch (error) {
+      console.error('Failed to mark notifications read:', error);
+    }
+  };
+
+  const handleClick = (notification) => {
+    if (!notification.is_read) {
+      markRead({ ids: [notification.id] });
+    }
+    if (notification.agreement) {
+      navigate(`/agreements/preview/${notification.agreement}`);
+      if (onClose) onClose();
+    }
+  };
+
   return (
     <div className={`right-panel${show ? ' active' : ''}`}>
-      <button 
-        className="close-sidebar-btn" 
+      <button
+        className="close-sidebar-btn"
         onClick={onClose}
         aria-label="Close notifications"
       >
@@ -20,21 +93,44 @@ const RightPanel = ({ show, onClose }) => {
       <div style={{display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '20px'}}>
         <div style={{display: 'flex', alignItems: 'center'}}>
           <FiBell size={20} style={{color: '#1a237e', marginRight: '8px'}} />
-          <span className="badge" style={{background: '#e74c3c', color: '#fff', borderRadius: '50%', padding: '2px 6px', fontSize: 11, marginRight: '8px'}}>{notifications.length}</span>
+          {unreadCount > 0 && (
+            <span className="badge" style={{background: '#e74c3c', color: '#fff', borderRadius: '50%', padding: '2px 6px', fontSize: 11, marginRight: '8px'}}>{unreadCount}</span>
+          )}
           <h2 style={{fontSize: 20, fontWeight: 600, margin: 0}}>Notifications</h2>
         </div>
-        <a href="#" style={{fontSize: 13, color: '#aaa', textDecoration: 'none'}}>See all</a>
+        {unreadCount > 0 && (
+          <button
+            type="button"
+            onClick={() => markRead({ all: true })}
+            style={{fontSize: 13, color: '#aaa', background: 'none', border: 'none', padding: 0, cursor: 'pointer'}}
+          >
+            Mark all read
+          </button>
+        )}
       </div>
       <div className="notifications-list">
+        {notifications.length === 0 && !loading && (
+          <div style={{fontSize: 14, color: '#888'}}>No notifications yet</div>
+        )}
         {notifications.map(notification => (
-          <div key={notification.id} className="notification-item" style={{padding: '10px 0', borderBottom: '1px solid #f0f0f0', cursor: 'pointer', transition: 'background 0.2s'}} onMouseOver={e => e.currentTarget.style.background='#f5f7fa'} onMouseOut={e => e.currentTarget.style.background='transparent'}>
-            <div className="notification-text" style={{fontWeight: 500, fontSize: '16px'}}>{notification.text}</div>
-            <div className="notification-time" style={{fontSize: 12, color: '#888'}}>{notification.time}</div>
+          <div key={notification.id} className="notification-item" onClick={() => handleClick(notification)} style={{padding: '10px 0', borderBottom: '1px solid #f0f0f0', cursor: 'pointer', transition: 'background 0.2s'}} onMouseOver={e => e.currentTarget.style.background='#f5f7fa'} onMouseOut={e => e.currentTarget.style.background='transparent'}>
+            <div className="notification-text" style={{fontWeight: notification.is_read ? 400 : 600, fontSize: '16px'}}>{notification.message}</div>
+            <div className="notification-time" style={{fontSize: 12, color: '#888'}}>{formatNotificationTime(notification.created_at)}</div>
           </div>
         ))}
+        {nextCursor && (
+          <button
+            type="button"
+            onClick={() => loadNotifications(nextCursor)}
+            disabled={loading}
+            style={{marginTop: '10px', fontSize: 13, color: '#1a237e', background: 'none', border: 'none', padding: 0, cursor: 'pointer'}}
+          >
+            {loading ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
     </div>
   );
 };
 
-export default RightPanel;
\ No newline at end of file
+export default RightPanel;
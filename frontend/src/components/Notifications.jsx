@@ -1,22 +1,32 @@
+import { useEffect, useState } from 'react';
+import axiosInstance from '../axiosConfig';
+import { formatNotificationTime } from './Layout/RightPanel';
+
 export const Notifications = () => {
-  const notifications = [
-    { text: 'New agreement created', time: 'Just now' },
-    { text: 'New permission- Saim', time: 'Submitted also' },
-    { text: 'New agreement created', time: 'Ready to pay out' },
-    { text: 'New agreement created', time: '14 Jan 2025, 11:59 AM' }
-  ];
+  const [notifications, setNotifications] = useState([]);
+
+  useEffect(() => {
+    axiosInstance.get('agreements/notifications/', { params: { page_size: 4 } })
+      .then(response => setNotifications(response.data.results))
+      .catch(error => console.error('Failed to load notifications:', error));
+  }, []);
 
   return (
     <div className="notifications-card">
       <h3>Notifications</h3>
       <div className="notification-list">
-        {notifications.map((notif, index) => (
-          <div key={index} className="notification-item">
-            <div className="notification-text">{notif.text}</div>
-            <div className="notification-time">{notif.time}</div>
+        {notifications.length === 0 && (
+          <div className="notification-item">
+            <div className="notification-text">No notifications yet</div>
+          </div>
+        )}
+        {notifications.map(notif => (
+          <div key={notif.id} className="notification-item">
+            <div className="notification-text">{notif.message}</div>
+            <div className="notification-time">{formatNotificationTime(notif.created_at)}</div>
           </div>
         ))}
       </div>
     </div>
   );
-};
\ No newline at end of file
+};
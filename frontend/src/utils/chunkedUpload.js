@@ -0,0 +1,62 @@
+import axiosInstance from '../axiosConfig';
+
+// Files above this size go through the resumable upload API instead of a single multipart POST
+export const CHUNKED_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+
+const MAX_RETRIES = 5;
+
+const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Remember the session per file so a later attempt resumes instead of starting over
+const sessionKey = (file) => `upload:${file.name}:${file.size}:${file.lastModified}`;
+
+async function getSession(file) {
+  const savedId = localStorage.getItem(sessionKey(file));
+  if (savedId) {
+    try {
+      const response = await axiosInstance.get(`agreements/uploads/${savedId}/`);
+      if (!response.data.complete) return response.data;
+    } catch (error) {
+      // Expired or unknown session, start a new one
+    }
+  }
+  const response = await axiosInstance.post('agreements/uploads/', { filename: file.name, size: file.size });
+  localStorage.setItem(sessionKey(file), response.data.upload_id);
+  return response.data;
+}
+
+/**
+ * Upload a file in chunks, resuming from the server's received offset, and
+ * return the attachment_path to send with the agreement.
+ */
+export async function uploadInChunks(file, onProgress) {
+  let session = await getSession(file);
+  let index = session.received_chunks;
+
+  while (index < session.chunk_count) {
+    const start = index * session.chunk_size;
+    const chunk = file.slice(start, Math.min(start + session.chunk_size, file.size));
+    let attempt = 0;
+    for (;;) {
+      try {
+        const response = await axiosInstance.put(
+          `agreements/uploads/${session.upload_id}/chunks/${index}/`,
+          chunk,
+          { headers: { 'Content-Type': 'application/octet-stream' } }
+        );
+        session = response.data;
+        break;
+      } catch (error) {
+        attempt += 1;
+        if (attempt > MAX_RETRIES || (error.response && error.response.status < 500)) throw error;
+        await wait(1000 * 2 ** (attempt - 1));
+      }
+    }
+    if (onProgress) onProgress(session.offset / session.size);
+    index = session.received_chunks;
+  }
+
+  const response = await axiosInstance.post(`agreements/uploads/${session.upload_id}/finalize/`);
+  localStorage.removeItem(sessionKey(file));
+  return response.data.attachment_path;
+}
@@ -6,6 +6,11 @@ export default defineConfig({
   plugins: [react()],
     server: {
     proxy: {
+      // Dashboard Server-Sent Events are served by uvicorn (ASGI), see backend/entrypoint.sh
+      '/api/agreements/dashboard-stream/': {
+        target: 'http://127.0.0.1:8001',
+        changeOrigin: true,
+      },
       '/api': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,